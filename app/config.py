@@ -1,5 +1,6 @@
 # app/config.py
 import os
+from typing import List, Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -14,9 +15,98 @@ class Settings(BaseSettings):
     mysql_database: str
     mysql_charset: str = "utf8mb4"
 
-    # 自动生成数据库 URL
+    # 自动生成数据库 URL（显式设置 DATABASE_URL 时以其为准）
     database_url: str = ""
 
+    # 只读副本，JSON 列表形式，如 '["mysql+pymysql://...replica1/db", "mysql+pymysql://...replica2/db"]'
+    database_replica_urls: List[str] = []
+    replica_health_interval: float = 10.0
+    replica_retry_interval: float = 5.0
+    replica_read_after_write_seconds: int = 3
+
+    # 静态文件目录
+    static_dir: str = "static"
+
+    # Cloudinary 配置（首次上传时才校验）
+    cloudinary_cloud_name: Optional[str] = None
+    cloudinary_api_key: Optional[str] = None
+    cloudinary_api_secret: Optional[str] = None
+
+    # 本地索引快照目录（相似度等）
+    index_dir: str = "data/indexes"
+    # 新增材料后延迟多少秒再在后台重写相似度快照，窗口内的新增合并为一次写入
+    similarity_save_delay: float = 30.0
+
+    # 最新更新缓冲区：容量和时间窗口（天）
+    recent_feed_size: int = 200
+    recent_feed_days: int = 7
+
+    # 就绪检查超时（秒）
+    readiness_timeout: float = 5.0
+
+    # 启动预热：预先建立的连接数、预加载详情的热门材料数
+    warmup_enabled: bool = True
+    warmup_pool_connections: int = 5
+    warmup_popular_materials: int = 20
+
+    # 共享缓存配置：shm（单机多 worker 共享内存，默认）/ network（多主机共享的网络缓存）/ local（进程内，仅限单 worker）
+    cache_backend: str = "shm"
+    cache_dir: Optional[str] = None
+    cache_max_bytes: int = 256 * 1024 * 1024
+    cache_counter_slots: int = 4096
+    cache_network_url: Optional[str] = None
+    cache_default_ttl: int = 300
+    # 发布标识：shm 缓存目录中的标识与之不同时清空旧发布的缓存；不设置时按 app 源码文件计算
+    app_release: Optional[str] = None
+    # 材料列表查询结果的缓存时间（秒）；目录变化时按版本号立即失效，不依赖过期
+    material_list_cache_ttl: int = 120
+
+    # 认证配置：未设置密钥时在 index_dir 的上级目录生成并复用一个本机密钥文件
+    auth_secret_key: Optional[str] = None
+    auth_token_ttl: int = 7 * 24 * 3600
+    auth_token_cache_size: int = 10000
+    auth_revocation_check_interval: float = 5.0
+    # 过渡期：未携带令牌的请求按该用户处理（前端尚未接入登录，默认沿用原来的 CURRENT_USER_ID=1），
+    # 前端改为携带 Authorization: Bearer 后设为 0，未携带令牌的请求返回 401
+    auth_anonymous_user_id: int = 1
+
+    # 播放器进度流：进度变化达到该百分点数或距上次保存超过该秒数才落库
+    study_stream_progress_step: int = 5
+    study_stream_flush_interval: float = 30.0
+
+    # 批量导出接口的管理令牌（请求头 X-Export-Token），未设置时 HTTP 导出接口关闭，命令行导出不受影响
+    export_token: Optional[str] = None
+
+    # Idempotency-Key：结果保留时间、处理中记录的过期时间（秒）、重试请求最长等待时间（秒）
+    idempotency_ttl: int = 24 * 3600
+    idempotency_pending_ttl: int = 600
+    idempotency_wait_timeout: float = 30.0
+
+    # 上传准入控制（每个 worker）：并发上传数、在途字节数、等待队列长度和等待超时（秒）
+    upload_paths: List[str] = ["/api/materials/"]
+    upload_max_concurrent: int = 4
+    upload_max_inflight_bytes: int = 256 * 1024 * 1024
+    upload_max_request_bytes: int = 110 * 1024 * 1024  # 100MB 文件加表单字段
+    upload_queue_size: int = 8
+    upload_queue_timeout: float = 10.0
+    upload_retry_after: int = 5
+
+    # 按请求性能分析：关闭时不注册中间件；令牌通过 X-Profile-Token 触发并用于查看报告，
+    # 采样率为随机分析的请求比例；报告目录默认为 index_dir 上级目录下的 profiles
+    profiling_enabled: bool = False
+    profiling_token: Optional[str] = None
+    profiling_sample_rate: float = 0.0
+    profiling_interval: float = 0.005
+    profiling_dir: Optional[str] = None
+    profiling_max_reports: int = 50
+
+    # 响应压缩配置
+    compression_minimum_size: int = 1024
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 5
+    compressed_cache_entries: int = 512
+    compressed_cache_ttl: int = 60
+
     model_config = {
         "env_file": ".env",
         "case_sensitive": False,
@@ -25,8 +115,9 @@ class Settings(BaseSettings):
 
 settings = Settings()
 
-settings.database_url = (
-    f"mysql+pymysql://{settings.mysql_username}:{settings.mysql_password}"
-    f"@{settings.mysql_host}:{settings.mysql_port}/{settings.mysql_database}"
-    f"?charset={settings.mysql_charset}"
-)
\ No newline at end of file
+if not settings.database_url:
+    settings.database_url = (
+        f"mysql+pymysql://{settings.mysql_username}:{settings.mysql_password}"
+        f"@{settings.mysql_host}:{settings.mysql_port}/{settings.mysql_database}"
+        f"?charset={settings.mysql_charset}"
+    )
\ No newline at end of file
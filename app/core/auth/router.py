@@ -0,0 +1,32 @@
+# app/core/auth/router.py
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.core.auth.schemas import LoginRequest, TokenResponse
+from app.core.auth.tokens import get_current_user_id, issue_token, revoke_tokens, verify_password
+from app.core.user.models import User
+
+router = APIRouter(prefix="/api/auth", tags=["auth"])
+
+
+@router.post("/login", response_model=TokenResponse)
+def login(credentials: LoginRequest, db: Session = Depends(get_db)):
+    """用户名密码登录，返回访问令牌"""
+    user = db.query(User).filter(User.username == credentials.username, User.is_active == True).first()
+    if not user or not verify_password(credentials.password, user.password_hash):
+        raise HTTPException(status_code=401, detail="用户名或密码错误")
+
+    token, expires_at = issue_token(user.id, user.token_version or 0)
+    print(f"✅ 用户登录: {user.username}")
+    return TokenResponse(access_token=token, expires_at=expires_at)
+
+
+@router.post("/logout")
+def logout(user_id: int = Depends(get_current_user_id), db: Session = Depends(get_db)):
+    """吊销当前用户已签发的全部令牌"""
+    user = db.query(User).filter(User.id == user_id).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="用户不存在")
+    revoke_tokens(db, user)
+    return {"message": "已退出登录"}
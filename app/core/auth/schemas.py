@@ -0,0 +1,14 @@
+# app/core/auth/schemas.py
+from pydantic import BaseModel
+from datetime import datetime
+
+
+class LoginRequest(BaseModel):
+    username: str
+    password: str
+
+
+class TokenResponse(BaseModel):
+    access_token: str
+    token_type: str = "bearer"
+    expires_at: datetime
@@ -0,0 +1,185 @@
+# app/core/auth/tokens.py
+"""
+无状态签名令牌
+
+令牌格式为 "用户id.令牌版本.过期时间戳.签名"，签名为 HMAC-SHA256，校验只需本地计算，不查数据库。
+校验通过的令牌放入进程内 LRU，命中时只比较过期时间；吊销通过用户的令牌版本号实现，
+每个令牌最多每隔 auth_revocation_check_interval 秒复查一次。版本号缓存在共享缓存中，
+共享后端（shm / network）下吊销对所有 worker 生效；进程内后端下复查直接读数据库。
+"""
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.core.user.models import User
+from app.shared.cache import shared_cache
+from app.shared.startup import LazyResource
+
+PASSWORD_ITERATIONS = 200_000
+
+
+def hash_password(password: str) -> str:
+    salt = secrets.token_hex(16)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt.encode("ascii"), PASSWORD_ITERATIONS)
+    return f"pbkdf2_sha256${PASSWORD_ITERATIONS}${salt}${digest.hex()}"
+
+
+def verify_password(password: str, password_hash: str) -> bool:
+    try:
+        _, iterations, salt, expected = password_hash.split("$")
+    except ValueError:
+        return False
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt.encode("ascii"), int(iterations))
+    return hmac.compare_digest(digest.hex(), expected)
+
+
+def _load_secret() -> bytes:
+    """优先使用配置的密钥；否则在本机生成一次并写入文件，同一主机的 worker 共用"""
+    if settings.auth_secret_key:
+        return settings.auth_secret_key.encode("utf-8")
+
+    path = os.path.join(os.path.dirname(os.path.abspath(settings.index_dir)), "auth_secret")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "w") as f:
+            f.write(secrets.token_hex(32))
+        print(f"⚠️ 未设置 AUTH_SECRET_KEY，已生成本机密钥 {path}，多台主机部署时必须显式配置")
+    except FileExistsError:
+        pass
+    with open(path) as f:
+        return f.read().strip().encode("utf-8")
+
+
+_secret = LazyResource("auth_secret", _load_secret)
+
+
+def _sign(payload: str) -> str:
+    digest = hmac.new(_secret.get(), payload.encode("ascii"), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
+
+
+def issue_token(user_id: int, token_version: int) -> Tuple[str, datetime]:
+    expires_at = int(time.time()) + settings.auth_token_ttl
+    payload = f"{user_id}.{token_version}.{expires_at}"
+    return f"{payload}.{_sign(payload)}", datetime.fromtimestamp(expires_at, tz=timezone.utc)
+
+
+def decode_token(token: str) -> Tuple[int, int, int]:
+    """校验签名并返回 (用户id, 令牌版本, 过期时间戳)，无效时抛出 ValueError"""
+    payload, _, signature = token.rpartition(".")
+    # 按字节比较：compare_digest 遇到非 ASCII 的 str 会抛 TypeError
+    if not payload or not payload.isascii() or not hmac.compare_digest(
+            signature.encode("utf-8"), _sign(payload).encode("ascii")):
+        raise ValueError("令牌签名无效")
+    user_id, token_version, expires_at = (int(part) for part in payload.split("."))
+    return user_id, token_version, expires_at
+
+
+def _version_key(user_id: int) -> str:
+    return f"auth:token_version:{user_id}"
+
+
+def current_token_version(user_id: int) -> Optional[int]:
+    """
+    用户当前的令牌版本，用户不存在或已停用时返回 None。
+    共享缓存未命中时才查库；进程内缓存看不到其他 worker 的吊销，此时每次复查都直接查库。
+    """
+    backend = shared_cache.backend
+    cached = backend.get(_version_key(user_id)) if backend.shared else None
+    if cached is not None:
+        value = int(cached)
+        return value if value >= 0 else None
+
+    db = SessionLocal()
+    try:
+        version = db.query(User.token_version).filter(User.id == user_id, User.is_active == True).scalar()
+    finally:
+        db.close()
+    if backend.shared:
+        backend.set(_version_key(user_id), str(-1 if version is None else version).encode(),
+                    settings.cache_default_ttl)
+    return version
+
+
+def revoke_tokens(db: Session, user: User):
+    """令牌版本加一，所有 worker 在下一次复查时拒绝该用户之前签发的令牌"""
+    user.token_version = (user.token_version or 0) + 1
+    db.commit()
+    shared_cache.backend.set(_version_key(user.id), str(user.token_version).encode(), settings.cache_default_ttl)
+    verified_tokens.forget_user(user.id)
+
+
+class VerifiedTokenCache:
+    """已校验令牌的 LRU：值为 [用户id, 令牌版本, 过期时间戳, 上次复查吊销的时间]"""
+
+    def __init__(self, max_entries: int, recheck_interval: float):
+        self.max_entries = max_entries
+        self.recheck_interval = recheck_interval
+        self._entries: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def verify(self, token: str) -> int:
+        now = time.time()
+        entry = self._entries.get(token)
+        if entry is None:
+            user_id, token_version, expires_at = decode_token(token)
+            entry = [user_id, token_version, expires_at, 0.0]
+            with self._lock:
+                self._entries[token] = entry
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        else:
+            with self._lock:
+                if token in self._entries:
+                    self._entries.move_to_end(token)
+
+        user_id, token_version, expires_at, checked_at = entry
+        if expires_at <= now:
+            self._drop(token)
+            raise ValueError("令牌已过期")
+        if now - checked_at >= self.recheck_interval:
+            if current_token_version(user_id) != token_version:
+                self._drop(token)
+                raise ValueError("令牌已被吊销")
+            entry[3] = now
+        return user_id
+
+    def _drop(self, token: str):
+        with self._lock:
+            self._entries.pop(token, None)
+
+    def forget_user(self, user_id: int):
+        with self._lock:
+            for token in [t for t, entry in self._entries.items() if entry[0] == user_id]:
+                del self._entries[token]
+
+
+verified_tokens = VerifiedTokenCache(settings.auth_token_cache_size, settings.auth_revocation_check_interval)
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+
+def get_current_user_id(credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme)) -> int:
+    """从 Authorization: Bearer 令牌解析当前用户，不访问数据库"""
+    if credentials is None:
+        if settings.auth_anonymous_user_id:
+            return settings.auth_anonymous_user_id
+        raise HTTPException(status_code=401, detail="未登录", headers={"WWW-Authenticate": "Bearer"})
+    try:
+        return verified_tokens.verify(credentials.credentials)
+    except ValueError as e:
+        raise HTTPException(status_code=401, detail=str(e), headers={"WWW-Authenticate": "Bearer"})
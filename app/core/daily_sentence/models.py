@@ -1,9 +1,8 @@
 # app/core/daily_sentence/models.py
 from sqlalchemy import Column, Integer, Text, String, DateTime, Boolean
-from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
 
-Base = declarative_base()
+from app.database import Base
 
 
 class DailySentence(Base):
@@ -0,0 +1,157 @@
+# app/core/export/exporter.py
+"""
+流式数据导出
+
+使用服务端游标（stream_results + yield_per）按批读取，逐批编码为 NDJSON / CSV / Parquet，
+内存占用只与批大小有关，与表的行数无关。接口和命令行脚本 export_data.py 共用这里的生成器。
+"""
+import csv
+import io
+import json
+from datetime import date, datetime, timedelta
+from typing import Iterator, Optional
+
+from sqlalchemy import Boolean, DateTime, Float, Integer, select
+from sqlalchemy.orm import Session
+
+from app.core.materials.models import PracticeMaterial
+from app.core.study_records.models import StudyRecord
+
+try:  # pyarrow 为可选依赖，仅 Parquet 导出需要
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover
+    pa = pq = None
+
+BATCH_SIZE = 1000
+
+# 可导出的表及其日期筛选列
+EXPORT_TABLES = {
+    "materials": (PracticeMaterial, PracticeMaterial.created_at),
+    "study_records": (StudyRecord, StudyRecord.last_studied_at),
+}
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def _plain(value):
+    """转换为 CSV / Parquet 可直接写入的值，JSON 列序列化为字符串"""
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"无法序列化 {type(value).__name__}")
+
+
+def _arrow_type(column):
+    if isinstance(column.type, Boolean):
+        return pa.bool_()
+    if isinstance(column.type, Integer):
+        return pa.int64()
+    if isinstance(column.type, Float):
+        return pa.float64()
+    if isinstance(column.type, DateTime):
+        return pa.timestamp("us")
+    return pa.string()
+
+
+def iter_batches(db: Session, table: str, start: Optional[date] = None,
+                 end: Optional[date] = None, batch_size: int = BATCH_SIZE):
+    """按 id 顺序分批读取，end 当天包含在内"""
+    model, date_column = EXPORT_TABLES[table]
+    statement = select(*model.__table__.columns).order_by(model.id)
+    if start:
+        statement = statement.where(date_column >= start)
+    if end:
+        statement = statement.where(date_column < end + timedelta(days=1))
+
+    result = db.execute(statement.execution_options(stream_results=True, yield_per=batch_size))
+    for partition in result.partitions():
+        yield [row._asdict() for row in partition]
+
+
+def _ndjson(batches) -> Iterator[bytes]:
+    for rows in batches:
+        yield "".join(
+            json.dumps(row, ensure_ascii=False, default=_json_default) + "\n" for row in rows
+        ).encode("utf-8")
+
+
+def _csv(batches, columns) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for rows in batches:
+        writer.writerows([_plain(row[name]) for name in columns] for row in rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Parquet 写入目标：只暂存尚未发送的字节，位置按累计写入量计算"""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _parquet(batches, columns) -> Iterator[bytes]:
+    schema = pa.schema([(column.name, _arrow_type(column)) for column in columns])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        # 每批写成一个 row group，写完即发送
+        for rows in batches:
+            writer.write_table(pa.Table.from_pylist(
+                [{name: _plain(row[name]) for name in schema.names} for row in rows], schema=schema
+            ))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def stream_export(db: Session, table: str, fmt: str, start: Optional[date] = None,
+                  end: Optional[date] = None, batch_size: int = BATCH_SIZE) -> Iterator[bytes]:
+    """按指定格式逐块生成导出内容"""
+    if table not in EXPORT_TABLES:
+        raise ValueError(f"不支持导出的表: {table}")
+    if fmt not in FORMATS:
+        raise ValueError(f"不支持的导出格式: {fmt}")
+    if fmt == "parquet" and pa is None:
+        raise ValueError("Parquet 导出需要安装 pyarrow")
+
+    columns = list(EXPORT_TABLES[table][0].__table__.columns)
+    batches = iter_batches(db, table, start, end, batch_size)
+    if fmt == "ndjson":
+        return _ndjson(batches)
+    if fmt == "csv":
+        return _csv(batches, [column.name for column in columns])
+    return _parquet(batches, columns)
@@ -0,0 +1,61 @@
+# app/core/export/router.py
+import hmac
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app.config import settings
+from app.database import SessionLocal, replica_router
+from app.core.export.exporter import EXPORT_TABLES, FORMATS, stream_export
+
+router = APIRouter(prefix="/api/export", tags=["export"])
+
+
+def require_export_token(x_export_token: Optional[str] = Header(None)):
+    """导出包含全部用户的学习记录，只对持有管理令牌的请求开放"""
+    if not settings.export_token:
+        raise HTTPException(status_code=404, detail="导出接口未启用")
+    if not x_export_token or not hmac.compare_digest(
+            x_export_token.encode("utf-8"), settings.export_token.encode("utf-8")):
+        raise HTTPException(status_code=403, detail="导出令牌无效")
+
+
+def _open_session():
+    """导出是长时间的只读查询，优先使用只读副本"""
+    replica = replica_router.pick() if replica_router.urls else None
+    return replica.session_factory() if replica else SessionLocal()
+
+
+@router.get("/{table}", dependencies=[Depends(require_export_token)])
+def export_table(
+        table: str,
+        format: str = Query("ndjson", pattern=f"^({'|'.join(FORMATS)})$"),
+        start: Optional[date] = Query(None, description="开始日期(YYYY-MM-DD)"),
+        end: Optional[date] = Query(None, description="结束日期(YYYY-MM-DD)，包含当天"),
+):
+    """流式导出材料或学习记录"""
+    if table not in EXPORT_TABLES:
+        raise HTTPException(status_code=404, detail=f"不支持导出的表，可选: {', '.join(EXPORT_TABLES)}")
+
+    # 会话由生成器自己管理，保证在响应发送完毕后才关闭
+    db = _open_session()
+    try:
+        chunks = stream_export(db, table, format, start, end)
+    except ValueError as e:
+        db.close()
+        raise HTTPException(status_code=400, detail=str(e))
+
+    def body():
+        try:
+            yield from chunks
+        finally:
+            db.close()
+
+    filename = f"{table}.{format}"
+    return StreamingResponse(
+        body(),
+        media_type=FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -0,0 +1,138 @@
+# app/core/glossary/index.py
+"""
+跨材料术语表索引
+
+从所有有效材料的 terms 构建去重后的双向术语索引（英→中、中→英），
+每个方向维护一个有序键数组，前缀查询用二分查找定位，不需要扫描全表。
+加载时新键先追加，整批加载完再排序一次，避免全量重建时逐个插入的平方复杂度。
+"""
+import bisect
+import json
+import re
+from collections import Counter
+from typing import Dict, List, Optional
+
+from app.core.materials.events import on_material_created
+from app.core.materials.models import PracticeMaterial
+from app.core.materials.sync import CatalogIndex
+
+EN_ZH = "en-zh"
+ZH_EN = "zh-en"
+
+_CJK = re.compile(r"[\u3400-\u9fff\uf900-\ufaff]")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_term(text: str) -> str:
+    """规范化术语：去首尾空白、合并空白、忽略大小写"""
+    return _SPACES.sub(" ", text.strip()).casefold()
+
+
+def detect_direction(text: str) -> str:
+    """含中文字符按中→英查询，否则按英→中"""
+    return ZH_EN if _CJK.search(text) else EN_ZH
+
+
+class GlossaryEntry:
+    __slots__ = ("term", "translations", "material_ids")
+
+    def __init__(self, term: str):
+        self.term = term
+        self.translations: Counter = Counter()
+        self.material_ids = set()
+
+
+class GlossaryIndex(CatalogIndex):
+    columns = (PracticeMaterial.id, PracticeMaterial.terms)
+
+    def reset(self):
+        self._entries: Dict[str, Dict[str, GlossaryEntry]] = {EN_ZH: {}, ZH_EN: {}}
+        self._keys: Dict[str, List[str]] = {EN_ZH: [], ZH_EN: []}
+        self._unsorted = False
+
+    def _insert(self, direction: str, term: str, translation: str, material_id: int):
+        key = normalize_term(term)
+        if not key:
+            return
+        entries = self._entries[direction]
+        entry = entries.get(key)
+        if entry is None:
+            entry = entries[key] = GlossaryEntry(term.strip())
+            self._keys[direction].append(key)
+            self._unsorted = True
+        if translation.strip():
+            entry.translations[translation.strip()] += 1
+        entry.material_ids.add(material_id)
+
+    def add_row(self, row):
+        terms = row.terms
+        if isinstance(terms, str):
+            try:
+                terms = json.loads(terms)
+            except ValueError:
+                return
+        if not isinstance(terms, list):
+            return
+        for pair in terms:
+            # 早期材料的 terms 可能不是 {term, translation} 对象，跳过而不是让整个索引加载失败
+            if not isinstance(pair, dict):
+                continue
+            term = pair.get("term")
+            translation = pair.get("translation")
+            term = term.strip() if isinstance(term, str) else ""
+            translation = translation.strip() if isinstance(translation, str) else ""
+            if not term:
+                continue
+            # 以实际文字判断方向，兼容中译英材料
+            if detect_direction(term) == ZH_EN:
+                self._insert(ZH_EN, term, translation, row.id)
+                if translation:
+                    self._insert(EN_ZH, translation, term, row.id)
+            else:
+                self._insert(EN_ZH, term, translation, row.id)
+                if translation:
+                    self._insert(ZH_EN, translation, term, row.id)
+
+    def _sort_keys(self):
+        if self._unsorted:
+            for keys in self._keys.values():
+                keys.sort()
+            self._unsorted = False
+
+    def after_load(self):
+        self._sort_keys()
+
+    def add_material(self, material):
+        with self._lock:
+            super().add_material(material)
+            self._sort_keys()
+
+    def prefix(self, query: str, direction: Optional[str] = None, limit: int = 10) -> List[GlossaryEntry]:
+        """前缀查询：完全匹配优先，其次按出现的材料数排序"""
+        prefix = normalize_term(query)
+        if not prefix:
+            return []
+        direction = direction or detect_direction(query)
+
+        with self._lock:
+            keys = self._keys[direction]
+            entries = self._entries[direction]
+            start = bisect.bisect_left(keys, prefix)
+            # 只看有序数组中紧邻的一段，短前缀时也保持低延迟
+            scan_limit = max(limit * 10, 100)
+            matched = []
+            for key in keys[start:start + scan_limit]:
+                if not key.startswith(prefix):
+                    break
+                matched.append((key, entries[key]))
+
+        matched.sort(key=lambda item: (item[0] != prefix, -len(item[1].material_ids), item[0]))
+        return [entry for _, entry in matched[:limit]]
+
+    def size(self) -> Dict[str, int]:
+        with self._lock:
+            return {direction: len(keys) for direction, keys in self._keys.items()} if self._loaded else {}
+
+
+glossary_index = GlossaryIndex()
+on_material_created(glossary_index.add_material)
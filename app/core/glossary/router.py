@@ -0,0 +1,51 @@
+# app/core/glossary/router.py
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+
+from app.database import get_read_db
+from app.core.glossary.index import glossary_index, detect_direction, EN_ZH, ZH_EN
+from app.core.glossary.schemas import GlossaryEntry, GlossarySuggestion
+
+router = APIRouter(prefix="/api/glossary", tags=["glossary"])
+
+
+@router.get("/autocomplete", response_model=List[GlossarySuggestion])
+def autocomplete_terms(
+        q: str = Query(..., min_length=1, description="术语前缀，中英文均可"),
+        direction: Optional[str] = Query(None, pattern=f"^({EN_ZH}|{ZH_EN})$", description="默认按输入自动判断"),
+        limit: int = Query(10, ge=1, le=50),
+        db: Session = Depends(get_read_db)
+):
+    """术语自动补全"""
+    glossary_index.ensure_fresh(db)
+    return [
+        GlossarySuggestion(
+            term=entry.term,
+            translations=[t for t, _ in entry.translations.most_common(3)],
+            material_count=len(entry.material_ids)
+        )
+        for entry in glossary_index.prefix(q, direction, limit)
+    ]
+
+
+@router.get("/search", response_model=List[GlossaryEntry])
+def search_terms(
+        q: str = Query(..., min_length=1, description="术语前缀，中英文均可"),
+        direction: Optional[str] = Query(None, pattern=f"^({EN_ZH}|{ZH_EN})$", description="默认按输入自动判断"),
+        limit: int = Query(20, ge=1, le=100),
+        db: Session = Depends(get_read_db)
+):
+    """查询术语及其出现的材料"""
+    glossary_index.ensure_fresh(db)
+    direction = direction or detect_direction(q)
+    return [
+        GlossaryEntry(
+            term=entry.term,
+            translations=[t for t, _ in entry.translations.most_common()],
+            material_count=len(entry.material_ids),
+            direction=direction,
+            material_ids=sorted(entry.material_ids)
+        )
+        for entry in glossary_index.prefix(q, direction, limit)
+    ]
@@ -0,0 +1,14 @@
+# app/core/glossary/schemas.py
+from pydantic import BaseModel
+from typing import List
+
+
+class GlossarySuggestion(BaseModel):
+    term: str
+    translations: List[str]
+    material_count: int
+
+
+class GlossaryEntry(GlossarySuggestion):
+    direction: str
+    material_ids: List[int]
@@ -0,0 +1,84 @@
+# app/core/materials/difficulty.py
+"""
+材料难度分布
+
+按 (练习类型, 语言) 维护升序的难度数组，并同时维护只按练习类型、只按语言和全部材料的数组，
+百分位排名、直方图和等量分位点都用二分查找得到，不再对整张表扫描 difficulty。
+新增材料通过材料创建事件插入，下架材料时随目录重置全量重建。
+"""
+from bisect import bisect_left, insort
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from app.core.materials.events import on_material_created
+from app.core.materials.models import PracticeMaterial
+from app.core.materials.sync import CatalogIndex
+
+GroupKey = Tuple[Optional[str], Optional[str]]
+
+
+def _group_keys(practice_type: Optional[str], language: Optional[str]) -> List[GroupKey]:
+    """一条材料所属的全部分组，None 表示该维度不限"""
+    return [(None, None), (practice_type, None), (None, language), (practice_type, language)]
+
+
+class DifficultyStats(CatalogIndex):
+    columns = (PracticeMaterial.id, PracticeMaterial.practice_type, PracticeMaterial.language,
+               PracticeMaterial.difficulty)
+
+    def reset(self):
+        self._sorted: Dict[GroupKey, List[float]] = defaultdict(list)
+        self._materials: Dict[int, Tuple[Optional[str], Optional[str], float]] = {}
+
+    def add_row(self, row):
+        if row.difficulty is None:
+            return
+        difficulty = float(row.difficulty)
+        self._materials[row.id] = (row.practice_type, row.language, difficulty)
+        for key in _group_keys(row.practice_type, row.language):
+            insort(self._sorted[key], difficulty)
+
+    def _values(self, practice_type: Optional[str], language: Optional[str]) -> List[float]:
+        return self._sorted.get((practice_type, language), [])
+
+    def material(self, material_id: int) -> Optional[Tuple[Optional[str], Optional[str], float]]:
+        """材料的 (练习类型, 语言, 难度)，不存在或已下架时返回 None"""
+        return self._materials.get(material_id)
+
+    def percentile_rank(self, difficulty: float, practice_type: Optional[str] = None,
+                        language: Optional[str] = None) -> Tuple[float, int]:
+        """返回 (严格低于该难度的材料占比 0-100, 分组材料数)"""
+        with self._lock:
+            values = self._values(practice_type, language)
+            if not values:
+                return 0.0, 0
+            return bisect_left(values, difficulty) / len(values) * 100, len(values)
+
+    def histogram(self, bins: int, practice_type: Optional[str] = None,
+                  language: Optional[str] = None) -> List[Tuple[float, float, int]]:
+        """在分组的 [最小, 最大] 难度上等宽分桶，返回 (起点, 终点, 数量)；最后一个桶包含终点"""
+        with self._lock:
+            values = self._values(practice_type, language)
+            if not values:
+                return []
+            low, high = values[0], values[-1]
+            if high == low:
+                return [(low, high, len(values))]
+            width = (high - low) / bins
+            edges = [low + width * i for i in range(bins)] + [high]
+            counts = [bisect_left(values, edges[i + 1]) - bisect_left(values, edges[i]) for i in range(bins - 1)]
+            counts.append(len(values) - bisect_left(values, edges[-2]))
+            return [(round(edges[i], 4), round(edges[i + 1], 4), counts[i]) for i in range(bins)]
+
+    def quantiles(self, parts: int, practice_type: Optional[str] = None,
+                  language: Optional[str] = None) -> List[float]:
+        """把分组按材料数均分为 parts 份的 parts-1 个分位点（最近秩），用于难度滑块的刻度"""
+        with self._lock:
+            values = self._values(practice_type, language)
+            if not values:
+                return []
+            return [values[min(len(values) - 1, len(values) * i // parts)] for i in range(1, parts)]
+
+
+difficulty_stats = DifficultyStats()
+on_material_created(difficulty_stats.add_material)
@@ -0,0 +1,25 @@
+# app/core/materials/events.py
+"""
+材料目录变更事件
+
+依赖目录的进程内索引（术语表、相似度等）在这里注册回调，
+create_material 提交成功后统一通知，避免路由逐个调用各子系统。
+"""
+from typing import Callable, List
+
+_created_hooks: List[Callable] = []
+
+
+def on_material_created(hook: Callable) -> Callable:
+    """注册材料创建回调，可作装饰器使用"""
+    _created_hooks.append(hook)
+    return hook
+
+
+def publish_material_created(material):
+    """通知所有回调，单个回调失败不影响其他回调和请求本身"""
+    for hook in _created_hooks:
+        try:
+            hook(material)
+        except Exception as e:
+            print(f"⚠️ 材料创建回调失败: {getattr(hook, '__qualname__', hook)} - {e}")
@@ -0,0 +1,87 @@
+# app/core/materials/feed.py
+"""
+最新更新缓冲区
+
+在内存中维护最近新增材料的有界、按时间排序的队列：启动时预热，
+create_material 通过材料创建事件直接推入，读取时通常无需查询数据库。
+"""
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.materials.events import on_material_created
+from app.core.materials.models import PracticeMaterial
+from app.core.materials.schemas import PracticeMaterialResponse
+from app.core.materials.sync import CatalogIndex
+
+BEIJING_TZ = timezone(timedelta(hours=8))
+
+
+def beijing_now() -> datetime:
+    """材料的 created_at 按北京时间写入且不带时区，比较时使用同样的表示"""
+    return datetime.now(BEIJING_TZ).replace(tzinfo=None)
+
+
+def _naive_beijing(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        value = value.astimezone(BEIJING_TZ).replace(tzinfo=None)
+    return value
+
+
+class RecentFeed(CatalogIndex):
+    """按 id（即创建顺序）升序保存最近的材料，超出容量时丢弃最旧的"""
+    columns = (PracticeMaterial,)
+
+    def __init__(self, size: int, days: int):
+        super().__init__()
+        self.size = size
+        self.days = days
+
+    def reset(self):
+        self._items: deque = deque(maxlen=self.size)
+
+    def _window_start(self) -> datetime:
+        return beijing_now() - timedelta(days=self.days)
+
+    def _query(self, db: Session):
+        return super()._query(db).filter(PracticeMaterial.created_at >= self._window_start())
+
+    def add_row(self, row):
+        item = PracticeMaterialResponse.model_validate(row)
+        item.created_at = _naive_beijing(item.created_at)
+        self._items.append(item)
+
+    def covers_window(self) -> bool:
+        """缓冲区是否包含时间窗口内的全部材料（未因容量丢弃过窗口内的材料）"""
+        with self._lock:
+            return len(self._items) < self.size or self._items[0].created_at < self._window_start()
+
+    def page(self, limit: int, cursor: Optional[int] = None,
+             search: Optional[str] = None) -> List[PracticeMaterialResponse]:
+        """从新到旧返回一页；cursor 为上一页最后一条的 id"""
+        window_start = self._window_start()
+        needle = search.lower() if search else None
+        with self._lock:
+            items = list(self._items)
+
+        result = []
+        for item in reversed(items):
+            if item.created_at < window_start:
+                break
+            if cursor is not None and item.id >= cursor:
+                continue
+            if needle and not any(
+                needle in (text or "").lower() for text in (item.title, item.chinese_title, item.transcript)
+            ):
+                continue
+            result.append(item)
+            if len(result) >= limit:
+                break
+        return result
+
+
+recent_feed = RecentFeed(settings.recent_feed_size, settings.recent_feed_days)
+on_material_created(recent_feed.add_material)
@@ -0,0 +1,244 @@
+# app/core/materials/media.py
+"""
+上传媒体分析
+
+纯 Python 解析 WAV / MP3 / MP4(M4A、MOV) 容器头得到精确时长；
+WAV(PCM) 音频再用 NumPy 计算降采样后的峰值数组，播放器只需拉取几 KB 的波形数据。
+"""
+import struct
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+
+# 波形桶数，峰值按 0-255 量化，序列化后约 3-4 KB
+WAVEFORM_BUCKETS = 1000
+
+
+@dataclass
+class MediaInfo:
+    duration_seconds: float
+    sample_rate: Optional[int] = None
+    channels: Optional[int] = None
+    peaks: Optional[List[int]] = None
+
+
+def format_duration(seconds: float) -> str:
+    """秒数转为 "分:秒"，与手工填写的 duration 格式一致（超过一小时时分钟数继续累加）"""
+    total = int(round(seconds))
+    return f"{total // 60}:{total % 60:02d}"
+
+
+# ---------- WAV ----------
+
+def _wav_chunks(data: bytes):
+    if len(data) < 12 or data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        return None
+    chunks = {}
+    offset = 12
+    while offset + 8 <= len(data):
+        chunk_id, size = struct.unpack_from("<4sI", data, offset)
+        chunks.setdefault(chunk_id, (offset + 8, size))
+        offset += 8 + size + (size & 1)
+    return chunks
+
+
+def _wav_format(data: bytes, chunks):
+    if b"fmt " not in chunks or b"data" not in chunks:
+        return None
+    fmt_offset, _ = chunks[b"fmt "]
+    audio_format, channels, sample_rate, byte_rate, block_align, bits = struct.unpack_from("<HHIIHH", data, fmt_offset)
+    if audio_format == 0xFFFE:  # WAVE_FORMAT_EXTENSIBLE，真实格式在子格式 GUID 的前两个字节
+        (audio_format,) = struct.unpack_from("<H", data, fmt_offset + 24)
+    data_offset, data_size = chunks[b"data"]
+    # 流式写出的文件 data 长度可能是占位值，以实际长度为准
+    data_size = min(data_size, len(data) - data_offset)
+    return audio_format, channels, sample_rate, byte_rate, block_align, bits, data_offset, data_size
+
+
+def _wav_peaks(data: bytes, audio_format: int, channels: int, bits: int, block_align: int,
+               data_offset: int, data_size: int, buckets: int) -> Optional[List[int]]:
+    frames = data_size // block_align if block_align else 0
+    if frames == 0 or channels == 0:
+        return None
+    raw = np.frombuffer(data, dtype=np.uint8, count=frames * block_align, offset=data_offset)
+
+    if audio_format == 1 and bits == 8:
+        samples = raw.astype(np.int16) - 128
+        scale = 128.0
+    elif audio_format == 1 and bits == 16:
+        samples = raw.view("<i2")
+        scale = 32768.0
+    elif audio_format == 1 and bits == 24:
+        triples = raw.reshape(-1, 3).astype(np.int32)
+        samples = (triples[:, 0] | (triples[:, 1] << 8) | (triples[:, 2] << 16)) << 8 >> 8
+        scale = 8388608.0
+    elif audio_format == 1 and bits == 32:
+        samples = raw.view("<i4")
+        scale = 2147483648.0
+    elif audio_format == 3 and bits == 32:
+        samples = raw.view("<f4")
+        scale = 1.0
+    else:
+        return None
+
+    # 多声道取各声道绝对值的最大值
+    amplitude = np.abs(samples.reshape(-1, channels).astype(np.float32)).max(axis=1) / scale
+    buckets = min(buckets, len(amplitude))
+    bounds = np.linspace(0, len(amplitude), buckets + 1, dtype=np.int64)
+    peaks = np.maximum.reduceat(amplitude, bounds[:-1])
+    return np.clip(np.round(peaks * 255), 0, 255).astype(np.uint8).tolist()
+
+
+def probe_wav(data: bytes, buckets: int = WAVEFORM_BUCKETS) -> Optional[MediaInfo]:
+    chunks = _wav_chunks(data)
+    if not chunks:
+        return None
+    fmt = _wav_format(data, chunks)
+    if fmt is None:
+        return None
+    audio_format, channels, sample_rate, byte_rate, block_align, bits, data_offset, data_size = fmt
+    if not byte_rate:
+        return None
+    return MediaInfo(
+        duration_seconds=data_size / byte_rate,
+        sample_rate=sample_rate,
+        channels=channels,
+        peaks=_wav_peaks(data, audio_format, channels, bits, block_align, data_offset, data_size, buckets),
+    )
+
+
+# ---------- MP3 ----------
+
+_MP3_BITRATES = {
+    # (MPEG 版本, 层) -> kbps 表
+    (1, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (1, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (1, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (2, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (2, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_MP3_BITRATES[(2, 3)] = _MP3_BITRATES[(2, 2)]
+_MP3_SAMPLE_RATES = {1: [44100, 48000, 32000], 2: [22050, 24000, 16000], 2.5: [11025, 12000, 8000]}
+
+
+def _mp3_header(data: bytes, offset: int):
+    if offset + 4 > len(data):
+        return None
+    (header,) = struct.unpack_from(">I", data, offset)
+    if header >> 21 != 0x7FF:
+        return None
+    version = {0: 2.5, 2: 2, 3: 1}.get((header >> 19) & 3)
+    layer = {1: 3, 2: 2, 3: 1}.get((header >> 17) & 3)
+    bitrate_index = (header >> 12) & 0xF
+    rate_index = (header >> 10) & 3
+    if version is None or layer is None or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    bitrate = _MP3_BITRATES[(1 if version == 1 else 2, layer)][bitrate_index] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[version][rate_index]
+    channels = 1 if (header >> 6) & 3 == 3 else 2
+    padding = (header >> 9) & 1
+    if layer == 1:
+        samples = 384
+        # Layer I 以 4 字节为一个槽位，填充也是一个槽位
+        frame_length = (12 * bitrate // sample_rate + padding) * 4
+    else:
+        samples = 576 if layer == 3 and version != 1 else 1152
+        frame_length = samples // 8 * bitrate // sample_rate + padding
+    return version, bitrate, sample_rate, channels, samples, frame_length
+
+
+def probe_mp3(data: bytes) -> Optional[MediaInfo]:
+    offset = 0
+    # 跳过 ID3v2 标签（大小为 synchsafe 整数）
+    if data[:3] == b"ID3" and len(data) >= 10:
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        offset = 10 + size + (10 if data[5] & 0x10 else 0)
+
+    # 找到第一个连续两帧都合法的帧头，避免误把数据当帧头
+    limit = min(len(data), offset + 64 * 1024)
+    while offset < limit:
+        header = _mp3_header(data, offset)
+        if header:
+            version, bitrate, sample_rate, channels, samples, frame_length = header
+            if _mp3_header(data, offset + frame_length) or offset + frame_length >= len(data):
+                break
+        offset += 1
+    else:
+        return None
+
+    # VBR：Xing/Info 或 VBRI 头中记录了总帧数
+    side_info = (32 if channels == 2 else 17) if version == 1 else (17 if channels == 2 else 9)
+    xing = offset + 4 + side_info
+    frames = None
+    if data[xing:xing + 4] in (b"Xing", b"Info"):
+        (flags,) = struct.unpack_from(">I", data, xing + 4)
+        if flags & 1:
+            (frames,) = struct.unpack_from(">I", data, xing + 8)
+    elif data[offset + 36:offset + 40] == b"VBRI":
+        (frames,) = struct.unpack_from(">I", data, offset + 36 + 14)
+
+    if frames:
+        duration = frames * samples / sample_rate
+    else:
+        audio_bytes = len(data) - offset - (128 if data[-128:-125] == b"TAG" else 0)
+        duration = audio_bytes * 8 / bitrate
+    return MediaInfo(duration_seconds=duration, sample_rate=sample_rate, channels=channels)
+
+
+# ---------- MP4 / M4A / MOV ----------
+
+def _boxes(data: bytes, start: int, end: int):
+    offset = start
+    while offset + 8 <= end:
+        size, box_type = struct.unpack_from(">I4s", data, offset)
+        header = 8
+        if size == 1:
+            if offset + 16 > end:
+                return
+            (size,) = struct.unpack_from(">Q", data, offset + 8)
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header:
+            return
+        yield box_type, offset + header, min(offset + size, end)
+        offset += size
+
+
+def probe_mp4(data: bytes) -> Optional[MediaInfo]:
+    for box_type, start, end in _boxes(data, 0, len(data)):
+        if box_type != b"moov":
+            continue
+        for child, child_start, child_end in _boxes(data, start, end):
+            if child != b"mvhd":
+                continue
+            version = data[child_start]
+            if version == 1:
+                timescale, duration = struct.unpack_from(">IQ", data, child_start + 20)
+            else:
+                timescale, duration = struct.unpack_from(">II", data, child_start + 12)
+            if timescale:
+                return MediaInfo(duration_seconds=duration / timescale)
+    return None
+
+
+PROBES = {
+    "wav": probe_wav,
+    "mp3": probe_mp3,
+    "m4a": probe_mp4,
+    "mp4": probe_mp4,
+    "mov": probe_mp4,
+}
+
+
+def analyze_media(data: bytes, extension: str) -> Optional[MediaInfo]:
+    """按扩展名选择解析器，无法识别或解析失败时返回 None"""
+    probe = PROBES.get(extension)
+    if probe is None:
+        return None
+    try:
+        return probe(data)
+    except (struct.error, ValueError, IndexError) as e:
+        print(f"⚠️ 媒体解析失败({extension}): {e}")
+        return None
@@ -1,10 +1,9 @@
 # app/core/materials/models.py
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime, JSON, Boolean
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime, JSON, Boolean, UniqueConstraint
 from datetime import datetime  # 修改这里
 from sqlalchemy.sql import func  # 添加这个导入
 
-Base = declarative_base()
+from app.database import Base
 
 
 class PracticeMaterial(Base):
@@ -30,4 +29,31 @@ class PracticeMaterial(Base):
     terms = Column(JSON)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=func.now())  # 修改这里
-    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())  # 修改这里
\ No newline at end of file
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())  # 修改这里
+
+
+class TranscriptSegment(Base):
+    __tablename__ = "transcript_segments"
+    __table_args__ = (UniqueConstraint("material_id", "seq", name="unique_material_seq"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    material_id = Column(Integer, nullable=False, index=True)
+    seq = Column(Integer, nullable=False)
+    source_text = Column(Text, nullable=False)
+    target_text = Column(Text, nullable=False)
+    source_offset = Column(Integer, nullable=False)  # 在 transcript 中的字符偏移
+    source_length = Column(Integer, nullable=False)
+    target_offset = Column(Integer, nullable=False)  # 在 translation 中的字符偏移
+    target_length = Column(Integer, nullable=False)
+
+
+class MaterialMedia(Base):
+    """上传时解析得到的媒体信息和波形峰值，与材料一对一"""
+    __tablename__ = "material_media"
+
+    material_id = Column(Integer, primary_key=True)
+    duration_seconds = Column(Float, nullable=False)
+    sample_rate = Column(Integer)
+    channels = Column(Integer)
+    peaks = Column(JSON)  # 0-255 量化的峰值数组，无法解码的格式为空
+    created_at = Column(DateTime, default=func.now())
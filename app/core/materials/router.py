@@ -1,46 +1,79 @@
 # app/core/materials/router.py
-import cloudinary
-import cloudinary.uploader
 import os
-from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, Form, Header, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.staticfiles import StaticFiles
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Dict, List, Optional
 import json
-from app.database import get_db
-from app.core.materials.models import PracticeMaterial
-from app.core.materials.schemas import PracticeMaterialResponse, PracticeMaterialCreate
-from sqlalchemy import func
+from app.config import settings
+from app.database import get_db, get_read_db, replica_router
+from app.shared.cache import shared_cache, CATALOG, CATALOG_RESET, MATERIAL_DETAIL
+from app.shared.compression import CompressedBodyCache, encode_json
+from app.shared.idempotency import IdempotencyStore, request_fingerprint
+from app.shared.startup import LazyResource
+from app.core.materials.events import publish_material_created
+from app.core.materials.difficulty import difficulty_stats
+from app.core.materials.feed import recent_feed, beijing_now
+from app.core.materials.media import analyze_media, format_duration
+from app.core.materials.models import PracticeMaterial, TranscriptSegment, MaterialMedia
+from app.core.materials.segments import build_segments
+from app.core.search.bm25 import search_index
+from app.core.materials.schemas import (
+    PracticeMaterialResponse, PracticeMaterialCreate, MaterialFilter, MaterialFacets, FacetCount,
+    PracticeMaterialOutline, TranscriptSegmentResponse, TranscriptSegmentPage, MaterialWaveform,
+    MaterialBatch, DifficultyBucket, DifficultyDistribution, DifficultyRank
+)
+from sqlalchemy import func, cast, literal, Integer, String
+from collections import Counter
 from datetime import datetime, timezone, timedelta
 router = APIRouter(prefix="/api/materials", tags=["materials"])
-# Cloudinary 配置
-CLOUDINARY_CLOUD_NAME = os.getenv("CLOUDINARY_CLOUD_NAME")
-CLOUDINARY_API_KEY = os.getenv("CLOUDINARY_API_KEY")
-CLOUDINARY_API_SECRET = os.getenv("CLOUDINARY_API_SECRET")
-
-# 初始化 Cloudinary 配置
-cloudinary.config(
-    cloud_name=CLOUDINARY_CLOUD_NAME,
-    api_key=CLOUDINARY_API_KEY,
-    api_secret=CLOUDINARY_API_SECRET
-)
-
 MAX_FILE_SIZE = 100 * 1024 * 1024  # 100MB
 
-# 添加 Cloudinary 配置验证
-if not CLOUDINARY_CLOUD_NAME:
-    print("❌ CLOUDINARY_CLOUD_NAME 未设置")
-    raise ValueError("CLOUDINARY_CLOUD_NAME 环境变量未设置")
 
-if not CLOUDINARY_API_KEY:
-    print("❌ CLOUDINARY_API_KEY 未设置")
-    raise ValueError("CLOUDINARY_API_KEY 环境变量未设置")
+def _init_cloudinary():
+    """导入并配置 Cloudinary，仅在首次上传时执行"""
+    required = {
+        "CLOUDINARY_CLOUD_NAME": settings.cloudinary_cloud_name,
+        "CLOUDINARY_API_KEY": settings.cloudinary_api_key,
+        "CLOUDINARY_API_SECRET": settings.cloudinary_api_secret,
+    }
+    for name, value in required.items():
+        if not value:
+            print(f"❌ {name} 未设置")
+            raise ValueError(f"{name} 环境变量未设置")
+
+    import cloudinary
+    import cloudinary.uploader
+
+    cloudinary.config(
+        cloud_name=settings.cloudinary_cloud_name,
+        api_key=settings.cloudinary_api_key,
+        api_secret=settings.cloudinary_api_secret
+    )
+    print(f"✅ Cloudinary 配置: {settings.cloudinary_cloud_name}")
+    return cloudinary.uploader
+
+
+# Cloudinary 延迟初始化，导入路由时不再依赖其环境变量
+cloudinary_uploader = LazyResource("cloudinary", _init_cloudinary)
 
-if not CLOUDINARY_API_SECRET:
-    print("❌ CLOUDINARY_API_SECRET 未设置")
-    raise ValueError("CLOUDINARY_API_SECRET 环境变量未设置")
+# 材料详情和列表响应体的预压缩缓存
+compressed_bodies = CompressedBodyCache(
+    max_entries=settings.compressed_cache_entries,
+    ttl=settings.compressed_cache_ttl,
+    minimum_size=settings.compression_minimum_size,
+    gzip_level=settings.compression_gzip_level,
+    brotli_quality=settings.compression_brotli_quality,
+)
 
-print(f"✅ Cloudinary 配置: {CLOUDINARY_CLOUD_NAME}")
+# 上传材料的幂等键存储，所有 worker 通过共享缓存共用
+CREATE_MATERIAL_SCOPE = "materials:create"
+idempotency_store = IdempotencyStore(
+    ttl=settings.idempotency_ttl,
+    pending_ttl=settings.idempotency_pending_ttl,
+    wait_timeout=settings.idempotency_wait_timeout,
+)
 
 ALLOWED_EXTENSIONS = {
     'audio/mpeg': 'mp3',
@@ -63,6 +96,14 @@ def get_file_extension(file: UploadFile) -> str:
     return ALLOWED_EXTENSIONS.get(file.content_type, 'bin')
 
 
+def serialize_materials(materials) -> bytes:
+    """将材料 ORM 对象序列化为响应 JSON"""
+    return encode_json([
+        PracticeMaterialResponse.model_validate(material).model_dump(mode="json")
+        for material in materials
+    ])
+
+
 async def save_upload_file_to_cloudinary(file: UploadFile, file_content: bytes) -> str:
     """保存上传的文件到 Cloudinary 并返回访问 URL"""
     try:
@@ -72,7 +113,7 @@ async def save_upload_file_to_cloudinary(file: UploadFile, file_content: bytes)
         filename = f"{timestamp}_{original_name}"
 
         # 上传到 Cloudinary
-        result = cloudinary.uploader.upload(
+        result = cloudinary_uploader.get().upload(
             file_content,
             resource_type="auto",  # 自动检测音频/视频
             folder="materials",  # 在 Cloudinary 中创建 materials 文件夹
@@ -91,6 +132,21 @@ async def save_upload_file_to_cloudinary(file: UploadFile, file_content: bytes)
         raise HTTPException(status_code=500, detail=f"上传文件到 Cloudinary 失败: {str(e)}")
 
 
+def parse_terms(value: Optional[str]) -> list:
+    """解析上传的术语表：必须是 {term, translation} 对象的列表，无法解析的 JSON 按空表处理"""
+    try:
+        terms_list = json.loads(value) if value else []
+    except json.JSONDecodeError:
+        return []
+    if not isinstance(terms_list, list) or not all(
+            isinstance(pair, dict) and isinstance(pair.get("term"), str)
+            and all(isinstance(text, str) for text in pair.values())
+            for pair in terms_list
+    ):
+        raise HTTPException(status_code=400, detail="terms 必须是 {\"term\": ..., \"translation\": ...} 对象的列表")
+    return terms_list
+
+
 @router.post("/", response_model=PracticeMaterialResponse)
 async def create_material(
         title: str = Form(...),
@@ -99,7 +155,7 @@ async def create_material(
         type: str = Form(...),
         practice_type: str = Form(...),
         difficulty: float = Form(...),
-        duration: str = Form(...),
+        duration: Optional[str] = Form(None, description="不填时按上传文件解析"),
         date: str = Form(...),
         format: str = Form(...),
         language: str = Form(...),
@@ -110,12 +166,28 @@ async def create_material(
         translation: str = Form(...),
         terms: Optional[str] = Form(None),
         file: Optional[UploadFile] = File(None),
+        idempotency_key: Optional[str] = Header(None, max_length=255),
         db: Session = Depends(get_db)
 ):
-    """上传新的学习材料"""
+    """上传新的学习材料，带 Idempotency-Key 头的重试请求直接返回首次结果"""
+    if idempotency_key:
+        fingerprint = request_fingerprint(
+            title, chinese_title, theme, type, practice_type, difficulty, duration, date, format, language,
+            skills, source, introduction, transcript, translation, terms,
+            file.filename if file else None, file.size if file else None
+        )
+        replay = await idempotency_store.begin(CREATE_MATERIAL_SCOPE, idempotency_key, fingerprint)
+        if replay is not None:
+            print(f"🔁 重复的上传请求，返回首次结果: {idempotency_key}")
+            return replay
+
     try:
+        # 先校验术语表，格式不对时不必上传文件
+        terms_list = parse_terms(terms)
+
         # 验证文件
         content_url = None
+        media_info = None
         if file and file.filename:
             # 检查文件大小 - 需要先读取内容
             file_content = await file.read()
@@ -133,8 +205,18 @@ async def create_material(
                     detail=f"不支持的文件类型。允许的类型: {allowed_types}"
                 )
 
+            # 解析时长和波形，CPU 密集，放到线程池
+            media_info = await run_in_threadpool(analyze_media, file_content, get_file_extension(file))
+            if media_info is not None:
+                duration = format_duration(media_info.duration_seconds)
+                print(f"🎵 媒体解析: 时长 {duration}，波形 {len(media_info.peaks or [])} 点")
+            if not duration:
+                raise HTTPException(status_code=400, detail="无法从文件解析时长，请填写 duration")
+
             # 保存文件到 Cloudinary
             content_url = await save_upload_file_to_cloudinary(file, file_content)
+        elif not duration:
+            raise HTTPException(status_code=400, detail="未上传文件时必须填写 duration")
 
         # 解析技能列表和术语表
         try:
@@ -142,11 +224,6 @@ async def create_material(
         except json.JSONDecodeError:
             skills_list = []
 
-        try:
-            terms_list = json.loads(terms) if terms else []
-        except json.JSONDecodeError:
-            terms_list = []
-
         # 创建材料记录
         material_data = {
             "title": title,
@@ -174,19 +251,47 @@ async def create_material(
         # 创建数据库记录
         db_material = PracticeMaterial(**material_data)
         db.add(db_material)
+        db.flush()
+
+        # 原文/译文分段对齐后与材料在同一事务中写入
+        db.add_all(
+            TranscriptSegment(material_id=db_material.id, **segment)
+            for segment in build_segments(transcript, translation)
+        )
+        if media_info is not None:
+            db.add(MaterialMedia(
+                material_id=db_material.id,
+                duration_seconds=media_info.duration_seconds,
+                sample_rate=media_info.sample_rate,
+                channels=media_info.channels,
+                peaks=media_info.peaks,
+            ))
         db.commit()
         db.refresh(db_material)
 
+        # 目录发生变化，通知所有 worker 丢弃已缓存的列表，随后的读请求暂时走主库
+        replica_router.note_write()
+        shared_cache.invalidate(CATALOG)
+        publish_material_created(db_material)
+
+        if idempotency_key:
+            idempotency_store.complete(
+                CREATE_MATERIAL_SCOPE, idempotency_key, fingerprint, 200,
+                PracticeMaterialResponse.model_validate(db_material).model_dump(mode="json")
+            )
         return db_material
 
     except HTTPException:
+        if idempotency_key:
+            idempotency_store.release(CREATE_MATERIAL_SCOPE, idempotency_key)
         raise
     except Exception as e:
         db.rollback()
+        if idempotency_key:
+            idempotency_store.release(CREATE_MATERIAL_SCOPE, idempotency_key)
         raise HTTPException(status_code=500, detail=f"上传材料失败: {str(e)}")
 
-@router.get("/", response_model=List[PracticeMaterialResponse])
-def get_materials(
+def material_filter_params(
         theme: Optional[str] = Query(None),
         type: Optional[str] = Query(None),
         practice_type: Optional[str] = Query(None),
@@ -200,42 +305,305 @@ def get_materials(
         date_start: Optional[str] = Query(None, description="开始日期(YYYY-MM-DD)"),  # 新增
         date_end: Optional[str] = Query(None, description="结束日期(YYYY-MM-DD)"),  # 新增
         search: Optional[str] = Query(None),
-        skip: int = 0,
-        limit: int = 100,
-        db: Session = Depends(get_db)
+) -> MaterialFilter:
+    """材料列表和筛选统计共用的查询参数"""
+    return MaterialFilter(
+        theme=theme, type=type, practice_type=practice_type, language=language, format=format,
+        skill=skill, difficulty_min=difficulty_min, difficulty_max=difficulty_max,
+        duration_min=duration_min, duration_max=duration_max,
+        date_start=date_start, date_end=date_end, search=search,
+    )
+
+
+def filter_cache_key(filters: MaterialFilter) -> str:
+    """筛选条件的规范化缓存键，忽略未设置的参数和参数顺序"""
+    return "&".join(f"{k}={v}" for k, v in sorted(filters.model_dump(exclude_none=True).items()))
+
+
+# 列表可选的排序方式，id 作为次序保证分页稳定
+SORT_ORDERS = {
+    "newest": (PracticeMaterial.created_at.desc(), PracticeMaterial.id.desc()),
+    "oldest": (PracticeMaterial.created_at.asc(), PracticeMaterial.id.asc()),
+    "difficulty": (PracticeMaterial.difficulty.asc(), PracticeMaterial.id.asc()),
+    "-difficulty": (PracticeMaterial.difficulty.desc(), PracticeMaterial.id.asc()),
+}
+
+
+@router.get("/", response_model=List[PracticeMaterialResponse])
+def get_materials(
+        request: Request,
+        filters: MaterialFilter = Depends(material_filter_params),
+        skip: int = Query(0, ge=0),
+        limit: int = Query(100, ge=1, le=500),
+        sort: Optional[str] = Query(None, pattern=f"^({'|'.join(SORT_ORDERS)})$",
+                                    description="默认按数据库顺序，带搜索词时按相关度"),
+        db: Session = Depends(get_read_db)
 ):
     """获取练习材料列表"""
+    # 规范化的缓存键：忽略未设置的参数、参数顺序和未知参数
+    query_key = f"{filter_cache_key(filters)}|sort={sort}|skip={skip}|limit={limit}"
+
+    # 压缩缓存的键带上目录版本号，其他 worker 失效目录后这里自然不再命中
+    version = shared_cache.version(CATALOG)
+    return compressed_bodies.respond(
+        request, f"materials:list:{version}:{query_key}",
+        lambda: cached_material_page(db, filters, skip, limit, sort)
+    )
+
+
+def cached_material_page(db: Session, filters: MaterialFilter, skip: int = 0, limit: int = 100,
+                         sort: Optional[str] = None) -> bytes:
+    """材料列表的一页，结果缓存在目录命名空间中"""
+    query_key = f"{filter_cache_key(filters)}|sort={sort}|skip={skip}|limit={limit}"
+    return shared_cache.get_or_set(
+        CATALOG, f"list:{query_key}",
+        lambda: serialize_materials(load_material_page(db, filters, skip, limit, sort)),
+        ttl=settings.material_list_cache_ttl
+    )
+
+
+def material_id_query(query):
+    """只取筛选结果的 id 列，带搜索词时用于相关度排序"""
+    return query.with_entities(PracticeMaterial.id)
+
+
+def load_material_page(db: Session, filters: MaterialFilter, skip: int, limit: int,
+                       sort: Optional[str] = None) -> List[PracticeMaterial]:
+    """按筛选条件取一页材料；指定 sort 时按其排序，否则带搜索词时按 BM25 相关度排序，不相关的排在最后"""
+    query = apply_material_filters(db, filters)
+    if sort:
+        return query.order_by(*SORT_ORDERS[sort]).offset(skip).limit(limit).all()
+    if not filters.search:
+        return query.offset(skip).limit(limit).all()
+
+    # 先只取匹配材料的 id 排序，再加载当前页的完整记录
+    ids = [material_id for (material_id,) in material_id_query(query).all()]
+    search_index.ensure_fresh(db)
+    scores = search_index.score(filters.search, ids)
+    page_ids = sorted(ids, key=lambda material_id: (-scores.get(material_id, 0.0), material_id))[skip:skip + limit]
+    if not page_ids:
+        return []
+
+    materials = {
+        material.id: material
+        for material in db.query(PracticeMaterial).filter(PracticeMaterial.id.in_(page_ids)).all()
+    }
+    return [materials[material_id] for material_id in page_ids if material_id in materials]
+
+
+# 参与分面统计的单值字段
+FACET_COLUMNS = {
+    "theme": PracticeMaterial.theme,
+    "type": PracticeMaterial.type,
+    "practice_type": PracticeMaterial.practice_type,
+    "language": PracticeMaterial.language,
+    "format": PracticeMaterial.format,
+    # 难度按整数分桶：3.5 -> "3"
+    "difficulty": cast(func.floor(PracticeMaterial.difficulty), Integer),
+}
+
+
+def facet_count_query(base):
+    """单值字段的取值计数，各字段的分组查询合并为一条 UNION ALL"""
+    grouped = [
+        base.with_entities(
+            literal(name).label("facet"),
+            cast(column, String).label("value"),
+            func.count().label("count"),
+        ).group_by(column)
+        for name, column in FACET_COLUMNS.items()
+    ]
+    return grouped[0].union_all(*grouped[1:])
+
+
+def facet_skills_query(base):
+    return base.with_entities(PracticeMaterial.skills)
+
+
+def compute_facets(db: Session, filters: MaterialFilter) -> MaterialFacets:
+    """在筛选结果上统计各字段取值数量：单值字段一条 UNION ALL 分组查询，技能一条轻量查询"""
+    base = apply_material_filters(db, filters)
+    rows = facet_count_query(base).all()
+
+    counts: Dict[str, Dict[str, int]] = {name: {} for name in FACET_COLUMNS}
+    for facet, value, count in rows:
+        if value is not None:
+            counts[facet][value] = count
+
+    # skills 是 JSON 数组，只取这一列在内存中计数
+    skill_counts: Counter = Counter()
+    for (skills,) in facet_skills_query(base).all():
+        if isinstance(skills, str):
+            skills = json.loads(skills)
+        skill_counts.update(set(skills or []))
+
+    def to_list(values) -> List[FacetCount]:
+        return [FacetCount(value=str(v), count=c) for v, c in sorted(values.items(), key=lambda x: (-x[1], x[0]))]
+
+    return MaterialFacets(
+        total=sum(counts["practice_type"].values()),
+        skills=to_list(skill_counts),
+        **{name: to_list(values) for name, values in counts.items()}
+    )
+
+
+@router.get("/facets", response_model=MaterialFacets)
+def get_material_facets(
+        request: Request,
+        filters: MaterialFilter = Depends(material_filter_params),
+        db: Session = Depends(get_read_db)
+):
+    """获取筛选面板各选项的材料数量"""
+    filter_key = filter_cache_key(filters)
+
+    def build() -> bytes:
+        return shared_cache.get_or_set(
+            CATALOG, f"facets:{filter_key}",
+            lambda: compute_facets(db, filters).model_dump_json().encode("utf-8")
+        )
+
+    version = shared_cache.version(CATALOG)
+    return compressed_bodies.respond(request, f"materials:facets:{version}:{filter_key}", build)
+
+
+MAX_BATCH_IDS = 200
+
+
+def parse_id_list(value: str, limit: int) -> List[int]:
+    """解析逗号分隔的 id 列表，去重并保持顺序"""
+    try:
+        ids = list(dict.fromkeys(int(part) for part in value.split(",") if part.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids 必须是逗号分隔的整数")
+    if not ids:
+        raise HTTPException(status_code=400, detail="ids 不能为空")
+    if len(ids) > limit:
+        raise HTTPException(status_code=400, detail=f"单次最多获取 {limit} 个材料")
+    return ids
+
+
+@router.get("/batch", response_model=MaterialBatch)
+def get_materials_batch(
+        ids: str = Query(..., description="逗号分隔的材料 id，按此顺序返回"),
+        fields: Optional[str] = Query(None, description="逗号分隔的返回字段，默认返回全部"),
+        db: Session = Depends(get_read_db)
+):
+    """批量获取材料详情：优先读详情缓存，未命中的用一条 IN 查询补齐并写回缓存"""
+    material_ids = parse_id_list(ids, MAX_BATCH_IDS)
+
+    projection = None
+    if fields:
+        projection = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = [name for name in projection if name not in PracticeMaterialResponse.model_fields]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"未知字段: {', '.join(unknown)}")
+
+    details: Dict[int, dict] = {}
+    misses = []
+    for material_id in material_ids:
+        cached = shared_cache.get(MATERIAL_DETAIL, str(material_id))
+        if cached is not None:
+            details[material_id] = json.loads(cached)
+        else:
+            misses.append(material_id)
+
+    if misses:
+        for material in db.query(PracticeMaterial).filter(
+            PracticeMaterial.id.in_(misses),
+            PracticeMaterial.is_active == True
+        ).all():
+            detail = PracticeMaterialResponse.model_validate(material).model_dump(mode="json")
+            shared_cache.set(MATERIAL_DETAIL, str(material.id), encode_json(detail))
+            details[material.id] = detail
+
+    materials = []
+    for material_id in material_ids:
+        detail = details.get(material_id)
+        if detail is not None:
+            materials.append({name: detail[name] for name in projection} if projection else detail)
+    return MaterialBatch(
+        materials=materials,
+        missing=[material_id for material_id in material_ids if material_id not in details]
+    )
+
+
+@router.get("/difficulty/distribution", response_model=DifficultyDistribution)
+def get_difficulty_distribution(
+        practice_type: Optional[str] = Query(None),
+        language: Optional[str] = Query(None),
+        bins: int = Query(10, ge=1, le=100, description="直方图桶数"),
+        quantiles: int = Query(4, ge=2, le=100, description="按材料数均分的份数"),
+        db: Session = Depends(get_read_db)
+):
+    """难度直方图和分位点，可按练习类型、语言限定范围"""
+    difficulty_stats.ensure_fresh(db)
+    histogram = difficulty_stats.histogram(bins, practice_type, language)
+    return DifficultyDistribution(
+        practice_type=practice_type,
+        language=language,
+        total=sum(count for _, _, count in histogram),
+        min=histogram[0][0] if histogram else None,
+        max=histogram[-1][1] if histogram else None,
+        histogram=[DifficultyBucket(start=start, end=end, count=count) for start, end, count in histogram],
+        quantiles=difficulty_stats.quantiles(quantiles, practice_type, language),
+    )
+
+
+@router.get("/{material_id}/difficulty-rank", response_model=DifficultyRank)
+def get_difficulty_rank(material_id: int, db: Session = Depends(get_read_db)):
+    """材料难度的百分位排名：全部材料中和同练习类型、同语言的材料中"""
+    difficulty_stats.ensure_fresh(db)
+    material = difficulty_stats.material(material_id)
+    if material is None:
+        raise HTTPException(status_code=404, detail="材料未找到")
+    practice_type, language, difficulty = material
+    percentile, total = difficulty_stats.percentile_rank(difficulty)
+    group_percentile, group_total = difficulty_stats.percentile_rank(difficulty, practice_type, language)
+    return DifficultyRank(
+        material_id=material_id,
+        difficulty=difficulty,
+        practice_type=practice_type,
+        language=language,
+        percentile=round(percentile, 1),
+        total=total,
+        group_percentile=round(group_percentile, 1),
+        group_total=group_total,
+    )
+
+
+def apply_material_filters(db: Session, filters: MaterialFilter):
+    """按筛选条件构建材料查询"""
     query = db.query(PracticeMaterial).filter(PracticeMaterial.is_active == True)
 
     # 应用筛选条件
-    if theme:
-        query = query.filter(PracticeMaterial.theme == theme)
-    if type:
-        query = query.filter(PracticeMaterial.type == type)
-    if practice_type:
-        query = query.filter(PracticeMaterial.practice_type == practice_type)
-    if language:
-        query = query.filter(PracticeMaterial.language == language)
-    if format:
-        query = query.filter(PracticeMaterial.format == format)
-    if skill:
+    if filters.theme:
+        query = query.filter(PracticeMaterial.theme == filters.theme)
+    if filters.type:
+        query = query.filter(PracticeMaterial.type == filters.type)
+    if filters.practice_type:
+        query = query.filter(PracticeMaterial.practice_type == filters.practice_type)
+    if filters.language:
+        query = query.filter(PracticeMaterial.language == filters.language)
+    if filters.format:
+        query = query.filter(PracticeMaterial.format == filters.format)
+    if filters.skill:
         # 方法1：使用 like 查询（如果技能是字符串数组）
-        query = query.filter(PracticeMaterial.skills.like(f'%"{skill}"%'))
-    if difficulty_min is not None:
-        query = query.filter(PracticeMaterial.difficulty >= difficulty_min)
-    if difficulty_max is not None:
-        query = query.filter(PracticeMaterial.difficulty <= difficulty_max)
+        query = query.filter(PracticeMaterial.skills.like(f'%"{filters.skill}"%'))
+    if filters.difficulty_min is not None:
+        query = query.filter(PracticeMaterial.difficulty >= filters.difficulty_min)
+    if filters.difficulty_max is not None:
+        query = query.filter(PracticeMaterial.difficulty <= filters.difficulty_max)
 
     # 新增：时长范围筛选
-    if duration_min is not None or duration_max is not None:
+    if filters.duration_min is not None or filters.duration_max is not None:
         # 需要创建一个函数来解析时长字符串 "8:30" -> 8.5分钟
         from sqlalchemy import or_, and_
 
         # 创建一个子查询来过滤时长
         duration_filter = or_()
 
-        # 获取所有材料来手动过滤（这不是最优方案，但对于小数据量可以）
-        all_materials = query.all()
+        # 获取所有材料来手动过滤（这不是最优方案，但对于小数据量可以），只取 id 和时长两列
+        all_materials = query.with_entities(PracticeMaterial.id, PracticeMaterial.duration).all()
         filtered_material_ids = []
 
         for material in all_materials:
@@ -247,9 +615,9 @@ def get_materials(
                 total_minutes = minutes + seconds / 60.0
 
                 # 检查是否在范围内
-                if duration_min is not None and total_minutes < duration_min:
+                if filters.duration_min is not None and total_minutes < filters.duration_min:
                     continue
-                if duration_max is not None and total_minutes > duration_max:
+                if filters.duration_max is not None and total_minutes > filters.duration_max:
                     continue
 
                 filtered_material_ids.append(material.id)
@@ -258,72 +626,120 @@ def get_materials(
         query = query.filter(PracticeMaterial.id.in_(filtered_material_ids))
 
     # 新增：发布时间范围筛选
-    if date_start:
-        query = query.filter(PracticeMaterial.date >= date_start)
-    if date_end:
-        query = query.filter(PracticeMaterial.date <= date_end)
+    if filters.date_start:
+        query = query.filter(PracticeMaterial.date >= filters.date_start)
+    if filters.date_end:
+        query = query.filter(PracticeMaterial.date <= filters.date_end)
 
-    if search:
+    if filters.search:
         query = query.filter(
-            (PracticeMaterial.title.ilike(f"%{search}%")) |
-            (PracticeMaterial.chinese_title.ilike(f"%{search}%")) |
-            (PracticeMaterial.transcript.ilike(f"%{search}%"))
+            (PracticeMaterial.title.ilike(f"%{filters.search}%")) |
+            (PracticeMaterial.chinese_title.ilike(f"%{filters.search}%")) |
+            (PracticeMaterial.transcript.ilike(f"%{filters.search}%"))
         )
 
-    materials = query.offset(skip).limit(limit).all()
-    return materials
+    return query
 
 
 @router.get("/{material_id}", response_model=PracticeMaterialResponse)
-def get_material(material_id: int, db: Session = Depends(get_db)):
+def get_material(material_id: int, request: Request, db: Session = Depends(get_read_db)):
     """获取特定材料详情"""
+    version = shared_cache.version(MATERIAL_DETAIL)
+    return compressed_bodies.respond(
+        request, f"materials:detail:{version}:{material_id}",
+        lambda: cached_material_detail(db, material_id)
+    )
+
+
+def cached_material_detail(db: Session, material_id: int) -> bytes:
+    """材料详情响应体，在所有 worker 间共享缓存"""
+
+    def load() -> bytes:
+        material = db.query(PracticeMaterial).filter(
+            PracticeMaterial.id == material_id,
+            PracticeMaterial.is_active == True
+        ).first()
+
+        if not material:
+            raise HTTPException(status_code=404, detail="材料未找到")
+
+        return encode_json(PracticeMaterialResponse.model_validate(material).model_dump(mode="json"))
+
+    return shared_cache.get_or_set(MATERIAL_DETAIL, str(material_id), load)
+
+
+@router.delete("/{material_id}")
+def deactivate_material(material_id: int, db: Session = Depends(get_db)):
+    """下架材料（软删除）"""
     material = db.query(PracticeMaterial).filter(
         PracticeMaterial.id == material_id,
         PracticeMaterial.is_active == True
     ).first()
-
     if not material:
         raise HTTPException(status_code=404, detail="材料未找到")
 
-    return material
+    material.is_active = False
+    material.updated_at = datetime.now(timezone(timedelta(hours=8)))
+    db.commit()
 
+    # 列表、详情缓存立即失效；各 worker 的目录索引在下次使用时全量重建以剔除该材料
+    replica_router.note_write()
+    shared_cache.invalidate(CATALOG)
+    shared_cache.invalidate(MATERIAL_DETAIL)
+    shared_cache.invalidate(CATALOG_RESET)
+    print(f"🗑️ 材料已下架: {material_id}")
+    return {"message": "材料已下架", "id": material_id}
 
-@router.get("/recent/updates", response_model=List[PracticeMaterialResponse])
-def get_recent_updates(
-    search: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
-):
-    """获取最新更新（最近7天）"""
-    one_week_ago = datetime.utcnow() - timedelta(days=7)
 
+def recent_updates_query(db: Session, days: int, before_id: Optional[int] = None, search: Optional[str] = None):
+    """最近 days 天新增的材料，从新到旧；before_id 为分页游标"""
     query = db.query(PracticeMaterial).filter(
         PracticeMaterial.is_active == True,
-        PracticeMaterial.created_at >= one_week_ago
+        PracticeMaterial.created_at >= beijing_now() - timedelta(days=days)
     )
-
-    # 添加搜索功能
+    if before_id is not None:
+        query = query.filter(PracticeMaterial.id < before_id)
     if search:
         query = query.filter(
             (PracticeMaterial.title.ilike(f"%{search}%")) |
             (PracticeMaterial.chinese_title.ilike(f"%{search}%")) |
             (PracticeMaterial.transcript.ilike(f"%{search}%"))
         )
+    return query.order_by(PracticeMaterial.id.desc())
+
 
-    materials = query.order_by(PracticeMaterial.created_at.desc()).all()
-    return materials
+@router.get("/recent/updates", response_model=List[PracticeMaterialResponse])
+def get_recent_updates(
+    search: Optional[str] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[int] = Query(None, description="上一页最后一条材料的 id"),
+    db: Session = Depends(get_read_db)
+):
+    """获取最新更新（最近7天），从新到旧分页"""
+    recent_feed.ensure_fresh(db)
+    materials = recent_feed.page(limit, cursor, search)
+    if len(materials) >= limit or recent_feed.covers_window():
+        return materials
 
+    # 缓冲区容量不足以覆盖整个时间窗口，翻到缓冲区之外时再查数据库
+    before_id = materials[-1].id if materials else cursor
+    query = recent_updates_query(db, recent_feed.days, before_id, search)
+    return materials + query.limit(limit - len(materials)).all()
 
 
+def random_material_query(db: Session, practice_type: str):
+    """随机排序的某练习类型材料"""
+    return db.query(PracticeMaterial).filter(
+        PracticeMaterial.is_active == True,
+        PracticeMaterial.practice_type == practice_type
+    ).order_by(func.random())
 
 
 @router.get("/practice-type/{practice_type}", response_model=PracticeMaterialResponse)
-def get_random_practice_type_material(practice_type: str, db: Session = Depends(get_db)):
+def get_random_practice_type_material(practice_type: str, db: Session = Depends(get_read_db)):
     """获取特定练习类型的随机一个材料"""
     # 方法1: 使用数据库的随机函数（推荐，性能好）
-    material = db.query(PracticeMaterial).filter(
-        PracticeMaterial.is_active == True,
-        PracticeMaterial.practice_type == practice_type
-    ).order_by(func.random()).first()
+    material = random_material_query(db, practice_type).first()
 
 
 
@@ -333,3 +749,118 @@ def get_random_practice_type_material(practice_type: str, db: Session = Depends(
     return material
 
 
+MAX_SEGMENT_RANGE = 200
+
+
+def load_segments(db: Session, material_id: int) -> List[TranscriptSegmentResponse]:
+    """读取材料的全部分段；早期没有分段的材料按全文即时切分"""
+    rows = db.query(TranscriptSegment).filter(
+        TranscriptSegment.material_id == material_id
+    ).order_by(TranscriptSegment.seq).all()
+    if rows:
+        return [TranscriptSegmentResponse.model_validate(row) for row in rows]
+
+    material = db.query(PracticeMaterial.transcript, PracticeMaterial.translation).filter(
+        PracticeMaterial.id == material_id,
+        PracticeMaterial.is_active == True
+    ).first()
+    if not material:
+        raise HTTPException(status_code=404, detail="材料未找到")
+    return [
+        TranscriptSegmentResponse(**segment)
+        for segment in build_segments(material.transcript, material.translation)
+    ]
+
+
+@router.get("/{material_id}/outline", response_model=PracticeMaterialOutline)
+def get_material_outline(material_id: int, db: Session = Depends(get_read_db)):
+    """获取材料信息和分段数量，不含原文和译文全文"""
+
+    def load() -> bytes:
+        columns = [
+            getattr(PracticeMaterial, name)
+            for name in PracticeMaterialOutline.model_fields if name != "segment_count"
+        ]
+        material = db.query(*columns).filter(
+            PracticeMaterial.id == material_id,
+            PracticeMaterial.is_active == True
+        ).first()
+        if not material:
+            raise HTTPException(status_code=404, detail="材料未找到")
+
+        segment_count = db.query(func.count(TranscriptSegment.id)).filter(
+            TranscriptSegment.material_id == material_id
+        ).scalar()
+        if not segment_count:
+            segment_count = len(load_segments(db, material_id))
+
+        return PracticeMaterialOutline(**material._asdict(), segment_count=segment_count) \
+            .model_dump_json().encode("utf-8")
+
+    return PracticeMaterialOutline.model_validate_json(
+        shared_cache.get_or_set(MATERIAL_DETAIL, f"outline:{material_id}", load)
+    )
+
+
+@router.get("/{material_id}/segments", response_model=TranscriptSegmentPage)
+def get_material_segments(
+        material_id: int,
+        start: int = Query(0, ge=0, description="起始段序号（含）"),
+        end: Optional[int] = Query(None, ge=1, description="结束段序号（不含），默认取 20 段"),
+        db: Session = Depends(get_read_db)
+):
+    """按段范围获取对齐的原文/译文，供播放器懒加载"""
+    if end is None:
+        end = start + 20
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end 必须大于 start")
+    if end - start > MAX_SEGMENT_RANGE:
+        raise HTTPException(status_code=400, detail=f"单次最多获取 {MAX_SEGMENT_RANGE} 段")
+
+    def load() -> bytes:
+        active = db.query(PracticeMaterial.id).filter(
+            PracticeMaterial.id == material_id,
+            PracticeMaterial.is_active == True
+        ).first()
+        if not active:
+            raise HTTPException(status_code=404, detail="材料未找到")
+
+        rows = db.query(TranscriptSegment).filter(
+            TranscriptSegment.material_id == material_id,
+            TranscriptSegment.seq >= start,
+            TranscriptSegment.seq < end
+        ).order_by(TranscriptSegment.seq).all()
+        total = db.query(func.count(TranscriptSegment.id)).filter(
+            TranscriptSegment.material_id == material_id
+        ).scalar()
+
+        if total:
+            segments = [TranscriptSegmentResponse.model_validate(row) for row in rows]
+        else:
+            all_segments = load_segments(db, material_id)
+            total = len(all_segments)
+            segments = all_segments[start:end]
+
+        return TranscriptSegmentPage(
+            material_id=material_id, total=total, start=start,
+            end=min(end, total), segments=segments
+        ).model_dump_json().encode("utf-8")
+
+    return TranscriptSegmentPage.model_validate_json(
+        shared_cache.get_or_set(MATERIAL_DETAIL, f"segments:{material_id}:{start}:{end}", load)
+    )
+
+
+@router.get("/{material_id}/waveform", response_model=MaterialWaveform)
+def get_material_waveform(material_id: int, db: Session = Depends(get_read_db)):
+    """获取上传时预计算的时长和波形峰值，播放器无需下载完整媒体文件绘制波形"""
+
+    def load() -> bytes:
+        media = db.query(MaterialMedia).filter(MaterialMedia.material_id == material_id).first()
+        if not media:
+            raise HTTPException(status_code=404, detail="该材料没有媒体分析数据")
+        return MaterialWaveform.model_validate(media).model_dump_json().encode("utf-8")
+
+    return MaterialWaveform.model_validate_json(
+        shared_cache.get_or_set(MATERIAL_DETAIL, f"waveform:{material_id}", load)
+    )
@@ -32,16 +32,126 @@ class PracticeMaterialResponse(PracticeMaterialBase):
         from_attributes = True
 
 
+class PracticeMaterialOutline(BaseModel):
+    """不含 transcript / translation 全文的材料信息，配合分段接口懒加载"""
+    id: int
+    title: str
+    chinese_title: Optional[str] = None
+    theme: str
+    type: str
+    practice_type: str
+    difficulty: float
+    duration: str
+    date: str
+    format: str
+    language: str
+    skills: List[str]
+    source: Optional[str] = None
+    content_url: Optional[str] = None
+    introduction: Optional[str] = None
+    terms: Optional[List[Dict[str, str]]] = None
+    created_at: datetime
+    segment_count: int
+
+    class Config:
+        from_attributes = True
+
+
+class TranscriptSegmentResponse(BaseModel):
+    seq: int
+    source_text: str
+    target_text: str
+    source_offset: int
+    source_length: int
+    target_offset: int
+    target_length: int
+
+    class Config:
+        from_attributes = True
+
+
+class TranscriptSegmentPage(BaseModel):
+    material_id: int
+    total: int
+    start: int
+    end: int
+    segments: List[TranscriptSegmentResponse]
+
+
 class MaterialFilter(BaseModel):
     theme: Optional[str] = None
     type: Optional[str] = None
     practice_type: Optional[str] = None
     language: Optional[str] = None
     format: Optional[str] = None
+    skill: Optional[str] = None
     difficulty_min: Optional[float] = None
     difficulty_max: Optional[float] = None
+    duration_min: Optional[int] = None
+    duration_max: Optional[int] = None
+    date_start: Optional[str] = None
+    date_end: Optional[str] = None
     search: Optional[str] = None
 
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+
+class MaterialFacets(BaseModel):
+    total: int
+    theme: List[FacetCount]
+    type: List[FacetCount]
+    practice_type: List[FacetCount]
+    language: List[FacetCount]
+    format: List[FacetCount]
+    skills: List[FacetCount]
+    difficulty: List[FacetCount]
+
+
+class MaterialWaveform(BaseModel):
+    material_id: int
+    duration_seconds: float
+    sample_rate: Optional[int] = None
+    channels: Optional[int] = None
+    peaks: Optional[List[int]] = None  # 0-255，按时间均匀分桶
+
+    class Config:
+        from_attributes = True
+
+
+class MaterialBatch(BaseModel):
+    materials: List[Dict[str, Any]]  # 按请求顺序，指定 fields 时只含这些字段
+    missing: List[int]  # 不存在或已下架的 id
+
+
+class DifficultyBucket(BaseModel):
+    start: float
+    end: float
+    count: int
+
+
+class DifficultyDistribution(BaseModel):
+    practice_type: Optional[str] = None
+    language: Optional[str] = None
+    total: int
+    min: Optional[float] = None
+    max: Optional[float] = None
+    histogram: List[DifficultyBucket]
+    quantiles: List[float]  # 按材料数均分的分位点，用于难度滑块刻度
+
+
+class DifficultyRank(BaseModel):
+    material_id: int
+    difficulty: float
+    practice_type: Optional[str] = None
+    language: Optional[str] = None
+    percentile: float  # 难度高于全部材料中的百分之多少
+    total: int
+    group_percentile: float  # 在同练习类型、同语言的材料中
+    group_total: int
+
+
 class TermSchema(BaseModel):
     term: str
     translation: str
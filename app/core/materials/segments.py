@@ -0,0 +1,145 @@
+# app/core/materials/segments.py
+"""
+原文/译文分段对齐
+
+按句末标点切句，再按累计字符比例把译文句子对齐到原文句子，
+生成若干对齐段落，每段记录在原文和译文中的偏移，播放器可以按段范围懒加载。
+"""
+import re
+from bisect import bisect_left
+from typing import List, Tuple
+
+# 句末标点（中英文）及其后可能跟随的引号、括号
+_SENTENCE_END = re.compile(r"[.!?。！？；;…]+[\"'”’)）」』]*|\n+")
+
+Span = Tuple[int, int]  # (offset, length)
+
+
+def split_sentences(text: str) -> List[Span]:
+    """切分句子，返回每句在原字符串中的 (偏移, 长度)，不含首尾空白"""
+    spans: List[Span] = []
+    start = 0
+    for match in _SENTENCE_END.finditer(text):
+        _append_span(text, start, match.end(), spans)
+        start = match.end()
+    _append_span(text, start, len(text), spans)
+    return spans
+
+
+def _append_span(text: str, start: int, end: int, spans: List[Span]):
+    chunk = text[start:end]
+    stripped = chunk.strip()
+    if not stripped:
+        return
+    offset = start + (len(chunk) - len(chunk.lstrip()))
+    spans.append((offset, len(stripped)))
+
+
+def align(source_spans: List[Span], target_spans: List[Span]) -> List[Tuple[List[int], List[int]]]:
+    """
+    把译文句子对齐到原文句子，返回 [(原文句子下标列表, 译文句子下标列表), ...]
+
+    句数相同时一一对应；否则按每个译文句子中点所在的累计长度比例归到对应原文句子，
+    没有分到译文的原文句子并入相邻段，保证每段两边都不为空。
+    """
+    if not source_spans or not target_spans:
+        return [(list(range(len(source_spans))), list(range(len(target_spans))))] \
+            if source_spans or target_spans else []
+
+    if len(source_spans) == len(target_spans):
+        return [([i], [i]) for i in range(len(source_spans))]
+
+    def cumulative(spans: List[Span]) -> List[float]:
+        total = float(sum(length for _, length in spans)) or 1.0
+        ends, acc = [], 0
+        for _, length in spans:
+            acc += length
+            ends.append(acc / total)
+        return ends
+
+    source_ends = cumulative(source_spans)
+    target_ends = cumulative(target_spans)
+
+    buckets: List[List[int]] = [[] for _ in source_spans]
+    previous = 0.0
+    for j, end in enumerate(target_ends):
+        midpoint = (previous + end) / 2
+        previous = end
+        i = min(bisect_left(source_ends, midpoint), len(source_spans) - 1)
+        buckets[i].append(j)
+
+    segments: List[Tuple[List[int], List[int]]] = []
+    pending: List[int] = []
+    for i, targets in enumerate(buckets):
+        pending.append(i)
+        if targets:
+            segments.append((pending, targets))
+            pending = []
+    if pending:
+        segments[-1][0].extend(pending)
+    return segments
+
+
+def build_segments(transcript: str, translation: str) -> List[dict]:
+    """生成对齐段落，字段与 TranscriptSegment 一致（不含 material_id）"""
+    source_spans = split_sentences(transcript or "")
+    target_spans = split_sentences(translation or "")
+
+    def merge(text: str, spans: List[Span], indexes: List[int]) -> Tuple[str, int, int]:
+        if not indexes:
+            return "", 0, 0
+        offset = spans[indexes[0]][0]
+        last_offset, last_length = spans[indexes[-1]]
+        length = last_offset + last_length - offset
+        return text[offset:offset + length], offset, length
+
+    segments = []
+    for seq, (source_idx, target_idx) in enumerate(align(source_spans, target_spans)):
+        source_text, source_offset, source_length = merge(transcript, source_spans, source_idx)
+        target_text, target_offset, target_length = merge(translation, target_spans, target_idx)
+        segments.append({
+            "seq": seq,
+            "source_text": source_text,
+            "target_text": target_text,
+            "source_offset": source_offset,
+            "source_length": source_length,
+            "target_offset": target_offset,
+            "target_length": target_length,
+        })
+    return segments
+
+
+def backfill_segments(db) -> int:
+    """为还没有分段的材料补建分段，返回处理的材料数"""
+    from app.core.materials.models import PracticeMaterial, TranscriptSegment
+
+    segmented = db.query(TranscriptSegment.material_id).distinct()
+    material_ids = [
+        material_id for (material_id,) in db.query(PracticeMaterial.id).filter(
+            PracticeMaterial.id.notin_(segmented)
+        ).all()
+    ]
+
+    for material_id in material_ids:
+        material = db.query(PracticeMaterial.transcript, PracticeMaterial.translation).filter(
+            PracticeMaterial.id == material_id
+        ).first()
+        db.add_all(
+            TranscriptSegment(material_id=material_id, **segment)
+            for segment in build_segments(material.transcript, material.translation)
+        )
+        db.commit()
+        print(f"✅ 材料 {material_id} 分段完成")
+    return len(material_ids)
+
+
+if __name__ == "__main__":
+    # python -m app.core.materials.segments
+    from app.database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        count = backfill_segments(session)
+        print(f"✅ 共补建 {count} 个材料的分段")
+    finally:
+        session.close()
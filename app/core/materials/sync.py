@@ -0,0 +1,87 @@
+# app/core/materials/sync.py
+"""
+基于材料目录的进程内索引基类
+
+首次使用时全量加载；目录版本号变化（可能是其他 worker 新增了材料）时，
+只增量加载 id 大于已加载最大 id 的材料，不再全量重建。
+材料被下架时 CATALOG_RESET 版本号变化，各 worker 的索引在下一次使用时全量重建。
+"""
+import threading
+from typing import Optional, Sequence
+
+from sqlalchemy.orm import Session
+
+from app.core.materials.models import PracticeMaterial
+from app.shared.cache import shared_cache, CATALOG, CATALOG_RESET
+
+
+class CatalogIndex:
+    # 子类声明需要加载的列，第一列必须是 PracticeMaterial.id
+    columns: Sequence = (PracticeMaterial.id,)
+    # 全量重建时是否仍从磁盘快照恢复；快照中残留已下架材料不影响结果时可设为 True
+    restore_on_reset = False
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._version: Optional[int] = None
+        self._generation: Optional[int] = None
+        self._max_id = 0
+
+    def reset(self):
+        """清空索引结构，全量加载前调用"""
+        raise NotImplementedError
+
+    def add_row(self, row):
+        """把一条材料（ORM 对象或只含 columns 的行）加入索引"""
+        raise NotImplementedError
+
+    def restore(self) -> Optional[int]:
+        """从磁盘快照恢复索引，返回快照覆盖的最大材料 id；没有快照时返回 None"""
+        return None
+
+    def after_load(self):
+        """从数据库加载了新材料后的钩子，可用于重算派生数据或写快照"""
+
+    def _add(self, row):
+        self.add_row(row)
+        self._max_id = max(self._max_id, row.id)
+
+    def _query(self, db: Session):
+        return db.query(*self.columns).filter(PracticeMaterial.is_active == True)
+
+    def ensure_fresh(self, db: Session):
+        """保证索引覆盖当前目录版本"""
+        version = shared_cache.version(CATALOG)
+        generation = shared_cache.version(CATALOG_RESET)
+        if self._loaded and version == self._version and generation == self._generation:
+            return
+
+        with self._lock:
+            if self._loaded and version == self._version and generation == self._generation:
+                return
+            if not self._loaded or generation != self._generation:
+                resetting = self._loaded
+                self.reset()
+                self._max_id = (self.restore() if not resetting or self.restore_on_reset else None) or 0
+                self._generation = generation
+
+            rows = self._query(db).filter(
+                PracticeMaterial.id > self._max_id
+            ).order_by(PracticeMaterial.id).all()
+            for row in rows:
+                self._add(row)
+            self._version = version
+            self._loaded = True
+            if rows:
+                self.after_load()
+
+    def add_material(self, material):
+        """本进程新增材料时直接写入；尚未加载时等首次使用再全量加载"""
+        with self._lock:
+            if self._loaded and material.id > self._max_id:
+                self._add(material)
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
@@ -0,0 +1,42 @@
+# app/core/profiling/router.py
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import FileResponse
+
+from app.config import settings
+from app.shared.profiling import PROFILE_API_PREFIX, check_profile_token, profile_store
+
+router = APIRouter(prefix=PROFILE_API_PREFIX, tags=["profiling"])
+
+DOWNLOAD_FORMATS = {
+    "json": "application/json",
+    "folded": "text/plain",
+}
+
+
+def require_profile_token(x_profile_token: Optional[str] = Header(None)):
+    """报告里有 SQL 原文，查看时需要与触发分析相同的令牌"""
+    if not settings.profiling_enabled:
+        raise HTTPException(status_code=404, detail="性能分析未启用")
+    if not check_profile_token(x_profile_token):
+        raise HTTPException(status_code=403, detail="性能分析令牌无效")
+
+
+@router.get("/", dependencies=[Depends(require_profile_token)])
+def list_profiles():
+    """最近的性能分析报告摘要，最新的在前"""
+    return {"profiles": profile_store.list()}
+
+
+@router.get("/{profile_id}", dependencies=[Depends(require_profile_token)])
+def download_profile(
+        profile_id: str,
+        format: str = Query("json", pattern=f"^({'|'.join(DOWNLOAD_FORMATS)})$",
+                            description="json 为完整报告，folded 为折叠栈，可用 flamegraph.pl 或 speedscope 打开"),
+):
+    """下载单份报告"""
+    path = profile_store.path(profile_id, format)
+    if path is None:
+        raise HTTPException(status_code=404, detail="报告不存在或已被轮转删除")
+    return FileResponse(path, media_type=DOWNLOAD_FORMATS[format], filename=f"{profile_id}.{format}")
@@ -0,0 +1,193 @@
+# app/core/recommendations/engine.py
+"""
+个性化推荐打分
+
+目录特征（难度、主题、技能、发布时间）常驻内存为 NumPy 数组，
+对某个用户打分时只查询他的学习记录，其余计算都是对全部候选材料的向量运算：
+
+- 难度：以用户最近学习材料的平均难度略微上浮为目标，高斯衰减
+- 主题 / 技能偏好：按该主题、技能上累计学习时长加权
+- 新近度：发布时间越近越高
+- 未完成的材料额外加分（越近学过加分越多），已完成的材料不再推荐
+"""
+import json
+import math
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.materials.events import on_material_created
+from app.core.materials.models import PracticeMaterial
+from app.core.materials.sync import CatalogIndex
+from app.core.study_records.models import StudyRecord
+
+WEIGHTS = {"difficulty": 0.4, "theme": 0.25, "skill": 0.2, "recency": 0.15}
+RESUME_BONUS = 0.3
+DIFFICULTY_STRETCH = 0.3  # 推荐比最近平均略难一点的材料
+DIFFICULTY_SIGMA = 1.0
+RECENCY_DAYS = 30.0
+RECENT_HISTORY = 10
+COMPLETED_PROGRESS = 100
+
+
+def _now_ts() -> float:
+    # 数据库中时间按 UTC+8 存为无时区时间，这里保持同一基准
+    return datetime.now(timezone(timedelta(hours=8))).replace(tzinfo=None).timestamp()
+
+
+class CatalogFeatures(CatalogIndex):
+    columns = (
+        PracticeMaterial.id, PracticeMaterial.theme, PracticeMaterial.skills,
+        PracticeMaterial.difficulty, PracticeMaterial.practice_type, PracticeMaterial.created_at,
+    )
+
+    def __init__(self):
+        super().__init__()
+        self._arrays_lock = threading.Lock()
+
+    def reset(self):
+        self._rows: List[Tuple[int, float, str, List[str], str, float]] = []
+        self._arrays: Optional[dict] = None
+
+    def add_row(self, row):
+        skills = row.skills
+        if isinstance(skills, str):
+            skills = json.loads(skills)
+        created = row.created_at.timestamp() if row.created_at else _now_ts()
+        self._rows.append((row.id, float(row.difficulty), row.theme, list(skills or []), row.practice_type, created))
+        self._arrays = None
+
+    def arrays(self) -> dict:
+        """按需把目录特征整理成数组，新增材料后重新整理"""
+        with self._lock:
+            arrays = self._arrays
+            rows = list(self._rows)
+        if arrays is not None:
+            return arrays
+
+        with self._arrays_lock:
+            themes: Dict[str, int] = {}
+            skills: Dict[str, int] = {}
+            practice_types: Dict[str, int] = {}
+            n = len(rows)
+            theme_idx = np.empty(n, dtype=np.int32)
+            practice_idx = np.empty(n, dtype=np.int32)
+            skill_pairs = []
+            for i, (_, _, theme, material_skills, practice_type, _) in enumerate(rows):
+                theme_idx[i] = themes.setdefault(theme, len(themes))
+                practice_idx[i] = practice_types.setdefault(practice_type, len(practice_types))
+                for skill in material_skills:
+                    skill_pairs.append((i, skills.setdefault(skill, len(skills))))
+
+            skill_matrix = np.zeros((n, max(len(skills), 1)), dtype=np.float32)
+            if skill_pairs:
+                r, c = np.array(skill_pairs).T
+                skill_matrix[r, c] = 1.0
+
+            arrays = {
+                "ids": np.array([row[0] for row in rows], dtype=np.int64),
+                "difficulty": np.array([row[1] for row in rows], dtype=np.float32),
+                "created": np.array([row[5] for row in rows], dtype=np.float64),
+                "theme_idx": theme_idx,
+                "practice_idx": practice_idx,
+                "skill_matrix": skill_matrix,
+                "themes": themes,
+                "skills": skills,
+                "practice_types": practice_types,
+            }
+            arrays["position"] = {int(mid): i for i, mid in enumerate(arrays["ids"])}
+            with self._lock:
+                # 整理期间又有新材料加入时不缓存，下次重新整理
+                if len(self._rows) == len(rows):
+                    self._arrays = arrays
+            return arrays
+
+
+catalog_features = CatalogFeatures()
+on_material_created(catalog_features.add_material)
+
+
+def study_history_query(db: Session, user_id: int):
+    """用户的学习历史，只取打分用到的列（覆盖索引 idx_user_history）"""
+    return db.query(
+        StudyRecord.material_id, StudyRecord.progress,
+        StudyRecord.study_duration_seconds, StudyRecord.last_studied_at
+    ).filter(StudyRecord.user_id == user_id).order_by(StudyRecord.last_studied_at.desc())
+
+
+def score_candidates(db: Session, user_id: int, practice_type: Optional[str] = None,
+                     limit: int = 100) -> List[Tuple[int, float, str]]:
+    """为用户打分，返回 [(材料 id, 分数, 推荐理由)]，按分数降序"""
+    catalog_features.ensure_fresh(db)
+    a = catalog_features.arrays()
+    n = len(a["ids"])
+    if n == 0:
+        return []
+
+    history = study_history_query(db, user_id).all()
+
+    position = a["position"]
+    studied = [(position[h.material_id], h) for h in history if h.material_id in position]
+    idx = np.array([p for p, _ in studied], dtype=np.int64)
+    progress = np.array([h.progress or 0 for _, h in studied], dtype=np.float32)
+    seconds = np.array([h.study_duration_seconds or 0 for _, h in studied], dtype=np.float32)
+    now = _now_ts()
+    last_ts = np.array([h.last_studied_at.timestamp() if h.last_studied_at else now for _, h in studied])
+
+    # 难度：最近学习材料的平均难度，没有记录时取目录中位数
+    if len(idx):
+        target = float(a["difficulty"][idx[:RECENT_HISTORY]].mean()) + DIFFICULTY_STRETCH
+    else:
+        target = float(np.median(a["difficulty"]))
+    difficulty_score = np.exp(-((a["difficulty"] - target) ** 2) / (2 * DIFFICULTY_SIGMA ** 2))
+
+    # 主题 / 技能偏好：学习时长取对数后按主题、技能累加并归一化
+    weight = np.log1p(seconds)
+    theme_pref = np.bincount(a["theme_idx"][idx], weights=weight, minlength=len(a["themes"])) if len(idx) \
+        else np.zeros(len(a["themes"]))
+    theme_score = theme_pref[a["theme_idx"]] / theme_pref.max() if theme_pref.max() > 0 else np.zeros(n)
+
+    skill_pref = weight @ a["skill_matrix"][idx] if len(idx) else np.zeros(a["skill_matrix"].shape[1])
+    if skill_pref.max() > 0:
+        skill_counts = np.maximum(a["skill_matrix"].sum(axis=1), 1.0)
+        skill_score = (a["skill_matrix"] @ (skill_pref / skill_pref.max())) / skill_counts
+    else:
+        skill_score = np.zeros(n)
+
+    age_days = np.maximum(now - a["created"], 0) / 86400.0
+    recency_score = np.exp(-age_days / RECENCY_DAYS)
+
+    scores = (WEIGHTS["difficulty"] * difficulty_score + WEIGHTS["theme"] * theme_score
+              + WEIGHTS["skill"] * skill_score + WEIGHTS["recency"] * recency_score)
+
+    # 未完成的加分，已完成的排除
+    resume = np.zeros(n)
+    if len(idx):
+        unfinished = progress < COMPLETED_PROGRESS
+        since_days = (now - last_ts) / 86400.0
+        resume[idx[unfinished]] = RESUME_BONUS * np.exp(-since_days[unfinished] / 7.0)
+        scores[idx[~unfinished]] = -np.inf
+    scores = scores + resume
+
+    if practice_type is not None:
+        code = a["practice_types"].get(practice_type)
+        if code is None:
+            return []
+        scores[a["practice_idx"] != code] = -np.inf
+
+    k = min(limit, n)
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top])]
+
+    reasons = []
+    components = np.stack([difficulty_score, theme_score, skill_score, recency_score])
+    labels = ("难度适中", "常学主题", "相关技能", "最新上架")
+    for i in top:
+        if not math.isfinite(scores[i]):
+            break
+        reason = "继续学习" if resume[i] > 0 else labels[int(np.argmax(components[:, i] * list(WEIGHTS.values())))]
+        reasons.append((int(a["ids"][i]), round(float(scores[i]), 4), reason))
+    return reasons
@@ -0,0 +1,52 @@
+# app/core/recommendations/router.py
+import json
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+
+from app.database import get_db
+from app.core.materials.models import PracticeMaterial
+from app.core.recommendations.engine import score_candidates
+from app.core.recommendations.schemas import RecommendedMaterial
+from app.core.auth.tokens import get_current_user_id
+from app.shared.cache import shared_cache, recommendations_namespace, CATALOG
+
+router = APIRouter(prefix="/api/recommendations", tags=["recommendations"])
+
+# 每个用户缓存的候选数量，limit 在此范围内都直接切片
+CANDIDATE_POOL = 100
+
+
+@router.get("/", response_model=List[RecommendedMaterial])
+def get_recommendations(
+        limit: int = Query(10, ge=1, le=CANDIDATE_POOL),
+        practice_type: Optional[str] = Query(None),
+        user_id: int = Depends(get_current_user_id),
+        db: Session = Depends(get_db)
+):
+    """根据学习记录推荐下一批材料"""
+    # 键中带目录版本号，目录变化后候选自动重算；学习进度变化时整个用户命名空间失效
+    key = f"{shared_cache.version(CATALOG)}:{practice_type or '*'}"
+
+    def load() -> bytes:
+        candidates = score_candidates(db, user_id, practice_type, CANDIDATE_POOL)
+        return json.dumps(candidates).encode("utf-8")
+
+    candidates = json.loads(shared_cache.get_or_set(recommendations_namespace(user_id), key, load))[:limit]
+    if not candidates:
+        return []
+
+    rows = db.query(
+        PracticeMaterial.id, PracticeMaterial.title, PracticeMaterial.chinese_title,
+        PracticeMaterial.theme, PracticeMaterial.practice_type,
+        PracticeMaterial.difficulty, PracticeMaterial.duration,
+    ).filter(
+        PracticeMaterial.id.in_([material_id for material_id, _, _ in candidates]),
+        PracticeMaterial.is_active == True
+    ).all()
+    by_id = {row.id: row for row in rows}
+
+    return [
+        RecommendedMaterial(**by_id[material_id]._asdict(), score=score, reason=reason)
+        for material_id, score, reason in candidates if material_id in by_id
+    ]
@@ -0,0 +1,15 @@
+# app/core/recommendations/schemas.py
+from pydantic import BaseModel
+from typing import Optional
+
+
+class RecommendedMaterial(BaseModel):
+    id: int
+    title: str
+    chinese_title: Optional[str] = None
+    theme: str
+    practice_type: str
+    difficulty: float
+    duration: str
+    score: float
+    reason: str
@@ -0,0 +1,255 @@
+# app/core/search/bm25.py
+"""
+BM25 检索索引
+
+倒排表和文档统计写入一个紧凑的二进制快照，各 worker 以只读方式 mmap 该文件，
+不需要把索引读进各自的内存；快照之后新增的材料放在一个小的内存增量索引中。
+
+快照布局（小端，各段 8 字节对齐）：
+    header | doc_ids int64[N] | doc_len float32[N] | term_hash uint64[T] (升序)
+           | term_offset int64[T+1] | post_doc uint32[P] | post_tf uint16[P]
+"""
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.materials.events import on_material_created
+from app.core.materials.models import PracticeMaterial
+from app.core.materials.sync import CatalogIndex
+from app.shared.text import tokenize
+
+K1 = 1.2
+B = 0.75
+
+MAGIC = b"BM25IDX1"
+# magic, 文档数, 词项数, 倒排总数, 最大材料 id, 总文档长度
+_HEADER = struct.Struct("<8sqqqqd")
+SNAPSHOT_CHECK_INTERVAL = 30.0
+
+COLUMNS = (PracticeMaterial.id, PracticeMaterial.title, PracticeMaterial.chinese_title, PracticeMaterial.transcript)
+
+
+def term_hash(term: str) -> int:
+    return int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def document_tokens(row) -> List[str]:
+    return tokenize(f"{row.title or ''} {row.chinese_title or ''} {row.transcript or ''}")
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def write_snapshot(rows: Iterable, path: str) -> dict:
+    """根据材料行生成快照文件，原子替换旧文件"""
+    doc_ids: List[int] = []
+    doc_len: List[float] = []
+    postings: Dict[int, List[tuple]] = defaultdict(list)
+
+    for position, row in enumerate(rows):
+        counts = Counter(document_tokens(row))
+        doc_ids.append(row.id)
+        doc_len.append(float(sum(counts.values())))
+        for term, tf in counts.items():
+            postings[term_hash(term)].append((position, min(tf, 65535)))
+
+    hashes = np.array(sorted(postings), dtype=np.uint64)
+    term_offset = np.zeros(len(hashes) + 1, dtype=np.int64)
+    post_doc = []
+    post_tf = []
+    for i, h in enumerate(hashes):
+        entries = postings[int(h)]
+        term_offset[i + 1] = term_offset[i] + len(entries)
+        post_doc.extend(doc for doc, _ in entries)
+        post_tf.extend(tf for _, tf in entries)
+
+    sections = [
+        np.array(doc_ids, dtype=np.int64),
+        np.array(doc_len, dtype=np.float32),
+        hashes,
+        term_offset,
+        np.array(post_doc, dtype=np.uint32),
+        np.array(post_tf, dtype=np.uint16),
+    ]
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, len(doc_ids), len(hashes), len(post_doc),
+                             max(doc_ids) if doc_ids else 0, float(sum(doc_len))))
+        for array in sections:
+            f.write(b"\0" * (_align(f.tell()) - f.tell()))
+            f.write(array.tobytes())
+    os.replace(tmp_path, path)
+    return {"documents": len(doc_ids), "terms": len(hashes), "postings": len(post_doc)}
+
+
+class Snapshot:
+    """只读 mmap 的快照，各段都是零拷贝的 NumPy 视图"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self.mtime = os.fstat(f.fileno()).st_mtime_ns
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.n_docs, self.n_terms, n_postings, self.max_id, self.total_len = \
+            _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError("不是有效的 BM25 快照文件")
+
+        offset = _HEADER.size
+        views = []
+        for dtype, count in ((np.int64, self.n_docs), (np.float32, self.n_docs), (np.uint64, self.n_terms),
+                             (np.int64, self.n_terms + 1), (np.uint32, n_postings), (np.uint16, n_postings)):
+            offset = _align(offset)
+            views.append(np.frombuffer(self._mmap, dtype=dtype, count=count, offset=offset))
+            offset += np.dtype(dtype).itemsize * count
+        self.doc_ids, self.doc_len, self.term_hash, self.term_offset, self.post_doc, self.post_tf = views
+
+    def postings(self, term: str):
+        h = np.uint64(term_hash(term))
+        i = int(np.searchsorted(self.term_hash, h))
+        if i >= self.n_terms or self.term_hash[i] != h:
+            return None, None
+        start, end = self.term_offset[i], self.term_offset[i + 1]
+        return self.post_doc[start:end], self.post_tf[start:end]
+
+
+class BM25Index(CatalogIndex):
+    """mmap 快照 + 内存增量的 BM25 索引"""
+    columns = COLUMNS
+    # 检索只对数据库筛选出的候选打分，快照中已下架的材料不会出现在结果里
+    restore_on_reset = True
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self._snapshot: Optional[Snapshot] = None
+        self._checked_at = 0.0
+
+    def reset(self):
+        self._snapshot = None
+        self._delta_ids: List[int] = []
+        self._delta_len: List[float] = []
+        self._delta_postings: Dict[str, List[tuple]] = defaultdict(list)
+
+    def restore(self) -> Optional[int]:
+        self._checked_at = time.monotonic()
+        if not os.path.exists(self.path):
+            print(f"⚠️ 未找到检索快照 {self.path}，全部材料使用内存索引，可运行 python -m app.core.search.bm25 生成")
+            return None
+        try:
+            self._snapshot = Snapshot(self.path)
+        except Exception as e:
+            print(f"⚠️ 检索快照读取失败: {e}")
+            return None
+        return self._snapshot.max_id or None
+
+    def add_row(self, row):
+        counts = Counter(document_tokens(row))
+        position = len(self._delta_ids)
+        self._delta_ids.append(row.id)
+        self._delta_len.append(float(sum(counts.values())))
+        for term, tf in counts.items():
+            self._delta_postings[term].append((position, tf))
+
+    def _reload_if_rebuilt(self):
+        """定期检查快照文件是否被重建，是则重新映射并重载增量"""
+        now = time.monotonic()
+        if not self.loaded or now - self._checked_at < SNAPSHOT_CHECK_INTERVAL:
+            return
+        self._checked_at = now
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if self._snapshot is None or mtime != self._snapshot.mtime:
+            with self._lock:
+                self._loaded = False
+
+    def ensure_fresh(self, db: Session):
+        self._reload_if_rebuilt()
+        super().ensure_fresh(db)
+
+    def score(self, query: str, candidate_ids: Optional[Iterable[int]] = None) -> Dict[int, float]:
+        """计算查询对各材料的 BM25 分数，可限定候选材料"""
+        terms = set(tokenize(query))
+        if not terms:
+            return {}
+
+        with self._lock:
+            snapshot = self._snapshot
+            delta_ids = list(self._delta_ids)
+            delta_len = np.array(self._delta_len, dtype=np.float32)
+            delta_postings = {term: list(self._delta_postings.get(term, ())) for term in terms}
+
+        snap_docs = snapshot.n_docs if snapshot else 0
+        n_docs = snap_docs + len(delta_ids)
+        if n_docs == 0:
+            return {}
+        total_len = (snapshot.total_len if snapshot else 0.0) + float(delta_len.sum())
+        avgdl = total_len / n_docs or 1.0
+
+        snap_scores = np.zeros(snap_docs, dtype=np.float32)
+        delta_scores = np.zeros(len(delta_ids), dtype=np.float32)
+        for term in terms:
+            docs, tfs = snapshot.postings(term) if snapshot else (None, None)
+            delta = delta_postings[term]
+            df = (len(docs) if docs is not None else 0) + len(delta)
+            if df == 0:
+                continue
+            idf = np.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+
+            if docs is not None and len(docs):
+                tf = tfs.astype(np.float32)
+                norm = K1 * (1 - B + B * snapshot.doc_len[docs] / avgdl)
+                np.add.at(snap_scores, docs, idf * tf * (K1 + 1) / (tf + norm))
+            if delta:
+                positions = np.array([p for p, _ in delta])
+                tf = np.array([t for _, t in delta], dtype=np.float32)
+                norm = K1 * (1 - B + B * delta_len[positions] / avgdl)
+                np.add.at(delta_scores, positions, idf * tf * (K1 + 1) / (tf + norm))
+
+        scores: Dict[int, float] = {}
+        if snap_docs:
+            hit = np.nonzero(snap_scores)[0]
+            scores.update(zip(snapshot.doc_ids[hit].tolist(), snap_scores[hit].tolist()))
+        hit = np.nonzero(delta_scores)[0]
+        scores.update((delta_ids[i], float(delta_scores[i])) for i in hit)
+
+        if candidate_ids is not None:
+            candidates = set(candidate_ids)
+            scores = {mid: s for mid, s in scores.items() if mid in candidates}
+        return scores
+
+
+def rebuild_snapshot(db: Session, path: Optional[str] = None) -> dict:
+    """从数据库全量生成快照，按 id 流式读取"""
+    query = db.query(*COLUMNS).filter(PracticeMaterial.is_active == True).order_by(PracticeMaterial.id)
+    return write_snapshot(query.yield_per(500), path or search_index.path)
+
+
+search_index = BM25Index(os.path.join(settings.index_dir, "bm25.idx"))
+on_material_created(search_index.add_material)
+
+
+if __name__ == "__main__":
+    # python -m app.core.search.bm25
+    from app.database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        stats = rebuild_snapshot(session)
+        print(f"✅ 检索快照已重建: {search_index.path} {stats}")
+    finally:
+        session.close()
@@ -0,0 +1,250 @@
+# app/core/similarity/engine.py
+"""
+基于 TF-IDF 的相似材料引擎
+
+对 transcript、title、theme 建立稀疏 TF-IDF 矩阵（对数词频 × 平滑 IDF），
+预先做 L2 归一化，查询时一次稀疏矩阵乘向量就得到与所有材料的余弦相似度。
+新增材料只按上次全量计算的 IDF 归一化新增的行并追加到矩阵末尾（新词按只出现一次计算 IDF），
+累计新增超过上次全量计算时材料数的一定比例后再全量重算 IDF。
+原始词频矩阵持久化到磁盘，启动时直接加载，再增量补上快照之后新增的材料。
+新增材料后不在请求中重写快照，而是延迟到后台线程合并写入一次；
+进程异常退出时丢失的只是快照之后的材料，下次启动会从数据库增量补上。
+"""
+import os
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+from app.config import settings
+from app.core.materials.events import on_material_created
+from app.core.materials.models import PracticeMaterial
+from app.core.materials.sync import CatalogIndex
+from app.shared.text import tokenize
+
+# 标题和主题比正文更能代表材料内容，按重复次数加权
+TITLE_WEIGHT = 3
+THEME_WEIGHT = 2
+
+# 增量追加的行数超过上次全量计算时材料数的该比例（且不少于 IDF_REFRESH_MIN）时全量重算 IDF
+IDF_REFRESH_RATIO = 0.05
+IDF_REFRESH_MIN = 20
+
+
+def material_tokens(row) -> List[str]:
+    tokens = tokenize(row.transcript or "")
+    tokens += tokenize(f"{row.title or ''} {row.chinese_title or ''}") * TITLE_WEIGHT
+    tokens += tokenize(row.theme or "") * THEME_WEIGHT
+    return tokens
+
+
+class SimilarityEngine(CatalogIndex):
+    columns = (
+        PracticeMaterial.id, PracticeMaterial.title, PracticeMaterial.chinese_title,
+        PracticeMaterial.theme, PracticeMaterial.transcript,
+    )
+
+    def __init__(self, index_dir: str, save_delay: float = 30.0):
+        super().__init__()
+        self.path = os.path.join(index_dir, "similarity.npz")
+        self.save_delay = save_delay
+        self._matrix_lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._timer_lock = threading.Lock()
+        self._save_timer: Optional[threading.Timer] = None
+
+    def reset(self):
+        self._vocab: Dict[str, int] = {}
+        self._ids: List[int] = []
+        self._positions: Dict[int, int] = {}
+        # 新增材料先以 (列, 词频) 暂存，查询前再合并进 CSR 矩阵
+        self._tf = sp.csr_matrix((0, 0), dtype=np.float32)
+        self._pending: List[Tuple[np.ndarray, np.ndarray]] = []
+        self._normalized: Optional[sp.csr_matrix] = None
+        self._idf = np.zeros(0)
+        self._idf_docs = 0
+        self._appended_rows = 0
+
+    def add_row(self, row):
+        counts = Counter(material_tokens(row))
+        columns = np.fromiter(
+            (self._vocab.setdefault(term, len(self._vocab)) for term in counts), dtype=np.int32, count=len(counts)
+        )
+        values = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+        self._positions[row.id] = len(self._ids)
+        self._ids.append(row.id)
+        self._pending.append((columns, values))
+
+    def add_material(self, material):
+        super().add_material(material)
+        if self.loaded:
+            self.schedule_save()
+
+    def after_load(self):
+        self.schedule_save()
+
+    def schedule_save(self):
+        """延迟 save_delay 秒后在后台写快照，等待期间的多次新增只写一次"""
+        with self._timer_lock:
+            if self._save_timer is not None:
+                return
+            self._save_timer = threading.Timer(self.save_delay, self._scheduled_save)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def _scheduled_save(self):
+        with self._timer_lock:
+            self._save_timer = None
+        try:
+            self.save()
+        except OSError as e:
+            print(f"⚠️ 相似度索引快照写入失败: {e}")
+
+    def flush(self):
+        """取消等待中的延迟写入并立即保存，进程关闭时调用"""
+        with self._timer_lock:
+            timer, self._save_timer = self._save_timer, None
+        if timer is not None:
+            timer.cancel()
+            self.save()
+
+    def _merge_pending(self):
+        """把暂存的新增行合并进词频矩阵"""
+        n_terms = len(self._vocab)
+        tf = self._tf
+        if tf.shape[1] < n_terms:
+            tf = sp.csr_matrix((tf.data, tf.indices, tf.indptr), shape=(tf.shape[0], n_terms))
+        if self._pending:
+            indptr = np.cumsum([0] + [len(cols) for cols, _ in self._pending])
+            new_rows = sp.csr_matrix(
+                (np.concatenate([v for _, v in self._pending]),
+                 np.concatenate([c for c, _ in self._pending]),
+                 indptr),
+                shape=(len(self._pending), n_terms),
+            )
+            tf = sp.vstack([tf, new_rows], format="csr")
+            self._pending = []
+        self._tf = tf
+
+    @staticmethod
+    def _weigh(tf: sp.csr_matrix, idf: np.ndarray) -> sp.csr_matrix:
+        """对数词频 × IDF 后按行 L2 归一化"""
+        weighted = tf.copy()
+        weighted.data = (1.0 + np.log(weighted.data)) * idf[weighted.indices]
+        norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        return sp.csr_matrix(sp.diags(1.0 / norms) @ weighted, dtype=np.float32)
+
+    def _build_normalized(self) -> sp.csr_matrix:
+        """全量重算 IDF 并归一化全部行"""
+        tf = self._tf
+        n_docs = tf.shape[0]
+        df = np.bincount(tf.indices, minlength=tf.shape[1])
+        self._idf = np.log((1.0 + n_docs) / (1.0 + df)) + 1.0
+        self._idf_docs = n_docs
+        self._appended_rows = 0
+        return self._weigh(tf, self._idf)
+
+    def _append_normalized(self, normalized: sp.csr_matrix) -> sp.csr_matrix:
+        """沿用上次的 IDF，只归一化尚未进入矩阵的新增行并追加"""
+        tf = self._tf
+        n_terms = tf.shape[1]
+        if len(self._idf) < n_terms:
+            # 上次计算之后才出现的词，按只在一篇材料中出现计算
+            unseen = np.full(n_terms - len(self._idf), np.log(1.0 + self._idf_docs) + 1.0)
+            self._idf = np.concatenate([self._idf, unseen])
+        new_rows = tf[normalized.shape[0]:]
+        self._appended_rows += new_rows.shape[0]
+        normalized = sp.csr_matrix(
+            (normalized.data, normalized.indices, normalized.indptr), shape=(normalized.shape[0], n_terms)
+        )
+        return sp.vstack([normalized, self._weigh(new_rows, self._idf)], format="csr", dtype=np.float32)
+
+    def normalized(self) -> sp.csr_matrix:
+        """当前的归一化矩阵，覆盖全部已加载的材料；持有 self._lock 时调用"""
+        with self._matrix_lock:
+            self._merge_pending()
+            normalized = self._normalized
+            rows = self._tf.shape[0]
+            if normalized is None or (
+                    normalized.shape[0] < rows
+                    and self._appended_rows + rows - normalized.shape[0]
+                    > max(IDF_REFRESH_MIN, self._idf_docs * IDF_REFRESH_RATIO)):
+                normalized = self._build_normalized()
+            elif normalized.shape[0] < rows:
+                normalized = self._append_normalized(normalized)
+            self._normalized = normalized
+            return normalized
+
+    def prepare(self, db):
+        """启动时调用：恢复快照、补上新增材料并构建归一化矩阵，首个查询不再承担构建开销"""
+        self.ensure_fresh(db)
+        with self._lock:
+            self.normalized()
+
+    def similar(self, material_id: int, limit: int = 10) -> List[Tuple[int, float]]:
+        """返回与指定材料最相似的材料 (id, 相似度)，按相似度降序"""
+        with self._lock:
+            position = self._positions.get(material_id)
+            if position is None:
+                return []
+            matrix = self.normalized()
+            ids = self._ids
+
+        scores = (matrix @ matrix[position].T).toarray().ravel()
+        scores[position] = -1.0
+        k = min(limit, len(scores) - 1)
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(ids[i], float(scores[i])) for i in top if scores[i] > 0]
+
+    def save(self):
+        """原子写入快照：词表、材料 id 和原始词频矩阵；只在取数时持锁，写文件不阻塞查询"""
+        with self._save_lock:
+            with self._lock:
+                self._merge_pending()
+                # 合并后的矩阵只会被替换不会被原地修改，可以在锁外写出
+                tf = self._tf
+                ids = np.array(self._ids, dtype=np.int64)
+                terms = np.array(sorted(self._vocab, key=self._vocab.get), dtype=object)
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.savez(
+                    f,
+                    ids=ids,
+                    terms=terms.astype(str) if len(terms) else np.array([], dtype=str),
+                    data=tf.data, indices=tf.indices, indptr=tf.indptr,
+                    shape=np.array(tf.shape, dtype=np.int64),
+                )
+            os.replace(tmp_path, self.path)
+
+    def restore(self) -> Optional[int]:
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with np.load(self.path, allow_pickle=False) as snapshot:
+                ids = snapshot["ids"].tolist()
+                terms = snapshot["terms"].tolist()
+                self._tf = sp.csr_matrix(
+                    (snapshot["data"], snapshot["indices"], snapshot["indptr"]),
+                    shape=tuple(snapshot["shape"]),
+                )
+        except Exception as e:
+            print(f"⚠️ 相似度索引快照读取失败，将全量重建: {e}")
+            self.reset()
+            return None
+
+        self._vocab = {term: i for i, term in enumerate(terms)}
+        self._ids = ids
+        self._positions = {material_id: i for i, material_id in enumerate(ids)}
+        print(f"✅ 相似度索引从快照恢复: {len(ids)} 个材料, {len(terms)} 个词项")
+        return max(ids) if ids else None
+
+
+similarity_engine = SimilarityEngine(settings.index_dir, settings.similarity_save_delay)
+on_material_created(similarity_engine.add_material)
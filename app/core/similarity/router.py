@@ -0,0 +1,49 @@
+# app/core/similarity/router.py
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List
+
+from app.database import get_read_db
+from app.core.materials.models import PracticeMaterial
+from app.core.similarity.engine import similarity_engine
+from app.core.similarity.schemas import SimilarMaterial
+from app.shared.cache import shared_cache, CATALOG
+
+router = APIRouter(prefix="/api/materials", tags=["similarity"])
+
+
+@router.get("/{material_id}/similar", response_model=List[SimilarMaterial])
+def get_similar_materials(
+        material_id: int,
+        limit: int = Query(10, ge=1, le=50),
+        db: Session = Depends(get_read_db)
+):
+    """获取与指定材料内容相似的材料"""
+
+    def load() -> bytes:
+        similarity_engine.ensure_fresh(db)
+        ranked = similarity_engine.similar(material_id, limit)
+        if not ranked and not db.query(PracticeMaterial.id).filter(
+            PracticeMaterial.id == material_id,
+            PracticeMaterial.is_active == True
+        ).first():
+            raise HTTPException(status_code=404, detail="材料未找到")
+
+        scores = dict(ranked)
+        rows = db.query(
+            PracticeMaterial.id, PracticeMaterial.title, PracticeMaterial.chinese_title,
+            PracticeMaterial.theme, PracticeMaterial.practice_type,
+            PracticeMaterial.difficulty, PracticeMaterial.duration,
+        ).filter(
+            PracticeMaterial.id.in_(list(scores)),
+            PracticeMaterial.is_active == True
+        ).all()
+        by_id = {row.id: row for row in rows}
+
+        return json.dumps([
+            SimilarMaterial(**by_id[mid]._asdict(), score=round(score, 4)).model_dump()
+            for mid, score in ranked if mid in by_id
+        ], ensure_ascii=False).encode("utf-8")
+
+    return json.loads(shared_cache.get_or_set(CATALOG, f"similar:{material_id}:{limit}", load))
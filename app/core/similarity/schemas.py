@@ -0,0 +1,14 @@
+# app/core/similarity/schemas.py
+from pydantic import BaseModel
+from typing import Optional
+
+
+class SimilarMaterial(BaseModel):
+    id: int
+    title: str
+    chinese_title: Optional[str] = None
+    theme: str
+    practice_type: str
+    difficulty: float
+    duration: str
+    score: float
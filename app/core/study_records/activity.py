@@ -0,0 +1,72 @@
+# app/core/study_records/activity.py
+"""
+学习活动时间序列
+
+每次保存进度都追加一条活动记录，同时在同一事务中累加当天的预聚合桶，
+按日期范围查询时只读取预聚合表（一年最多 366 行），周统计在内存中由日统计合并。
+"""
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.study_records.models import StudyActivity, StudyActivityDaily
+from app.core.study_records.schemas import ActivityBucket, StudyActivitySeries
+
+
+def record_activity(db: Session, user_id: int, material_id: int, seconds: int, occurred_at: datetime):
+    """追加一条活动记录并累加当天的桶，由调用方提交事务"""
+    occurred_at = occurred_at.replace(tzinfo=None)
+    db.add(StudyActivity(user_id=user_id, material_id=material_id, occurred_at=occurred_at, seconds=seconds))
+
+    def bump() -> bool:
+        result = db.execute(
+            update(StudyActivityDaily)
+            .where(StudyActivityDaily.user_id == user_id, StudyActivityDaily.day == occurred_at.date())
+            .values(seconds=StudyActivityDaily.seconds + seconds, sessions=StudyActivityDaily.sessions + 1)
+        )
+        return result.rowcount > 0
+
+    if bump():
+        return
+    try:
+        with db.begin_nested():
+            db.add(StudyActivityDaily(user_id=user_id, day=occurred_at.date(), seconds=seconds, sessions=1))
+    except IntegrityError:
+        # 其他请求刚好先插入了当天的桶
+        bump()
+
+
+def _week_start(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+def activity_series(db: Session, user_id: int, start: date, end: date) -> StudyActivitySeries:
+    """返回 [start, end] 内每天和每周（周一开始）的学习分钟数，无活动的日期补 0"""
+    rows = db.query(StudyActivityDaily.day, StudyActivityDaily.seconds).filter(
+        StudyActivityDaily.user_id == user_id,
+        StudyActivityDaily.day >= start,
+        StudyActivityDaily.day <= end,
+    ).all()
+    seconds_by_day = {day: seconds for day, seconds in rows}
+
+    days = []
+    weeks: "OrderedDict[date, int]" = OrderedDict()
+    day = start
+    while day <= end:
+        seconds = seconds_by_day.get(day, 0)
+        days.append(ActivityBucket(start=day, minutes=round(seconds / 60, 1)))
+        week = _week_start(day)
+        weeks[week] = weeks.get(week, 0) + seconds
+        day += timedelta(days=1)
+
+    return StudyActivitySeries(
+        start=start,
+        end=end,
+        total_minutes=round(sum(seconds_by_day.values()) / 60, 1),
+        days=days,
+        weeks=[ActivityBucket(start=week, minutes=round(seconds / 60, 1)) for week, seconds in weeks.items()],
+    )
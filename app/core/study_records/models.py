@@ -1,10 +1,12 @@
 # app/core/study_record/models.py
-from sqlalchemy import Column, Integer, DateTime
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy import Column, Integer, DateTime, Date
+from sqlalchemy.orm import foreign, relationship
 from sqlalchemy.sql import func
 from typing import Optional
 from datetime import timedelta,timezone,datetime
-Base = declarative_base()
+
+from app.database import Base
+from app.core.materials.models import PracticeMaterial
 
 
 class StudyRecord(Base):
@@ -17,4 +19,33 @@ class StudyRecord(Base):
     progress = Column(Integer, default=0)
     last_studied_at = Column(DateTime, default=lambda: datetime.now(timezone(timedelta(hours=8))))
     study_duration_seconds = Column(Integer, default=0)  # 改为秒数
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone(timedelta(hours=8))))
\ No newline at end of file
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone(timedelta(hours=8))))
+
+    # 库表上没有外键约束，显式声明连接条件；只读，写入仍通过 material_id
+    material = relationship(
+        PracticeMaterial,
+        primaryjoin=foreign(material_id) == PracticeMaterial.id,
+        viewonly=True,
+    )
+
+
+class StudyActivity(Base):
+    """只追加的学习活动日志，每次保存进度（心跳）记一条"""
+    __tablename__ = "study_activity"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    material_id = Column(Integer, nullable=False)
+    # 分区键；MySQL 表上主键为 (id, occurred_at)，见 init_mysql_db.py
+    occurred_at = Column(DateTime, nullable=False)
+    seconds = Column(Integer, nullable=False, default=0)
+
+
+class StudyActivityDaily(Base):
+    """按用户、按天预聚合的学习时长，热力图和周统计直接读这张表"""
+    __tablename__ = "study_activity_daily"
+
+    user_id = Column(Integer, primary_key=True)
+    day = Column(Date, primary_key=True)
+    seconds = Column(Integer, nullable=False, default=0)
+    sessions = Column(Integer, nullable=False, default=0)
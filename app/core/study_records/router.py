@@ -1,128 +1,193 @@
 # app/core/study_record/router.py
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy.orm import Session, joinedload, load_only
+from typing import List, Optional
 import datetime
 from app.database import get_db
+from app.config import settings
+from app.core.auth.tokens import get_current_user_id, verified_tokens
+from app.shared.cache import shared_cache, user_stats_namespace
 from app.core.study_records.models import StudyRecord
-from app.core.study_records.schemas import StudyRecordResponse, StudyRecordCreate, UserStats
+from app.core.study_records.schemas import StudyRecordResponse, StudyRecordCreate, UserStats, StudyActivitySeries
+from app.core.study_records.activity import activity_series
+from app.core.study_records.service import save_study_progress
+from app.core.study_records.stream import ProgressSession, persist_progress
 from app.core.materials.models import PracticeMaterial
-from .schemas import StudyRecordResponse, StudyRecordCreate, PracticeMaterialBase,StudyRecordProgress
+from .schemas import StudyRecordResponse, StudyRecordCreate, StudyRecordProgress
 from datetime import timedelta
 router = APIRouter(prefix="/api/study-records", tags=["study-records"])
 
-# 硬编码用户ID
-CURRENT_USER_ID = 1
 
-from datetime import datetime, timezone
+from datetime import datetime, timezone, date
+
+
+# 学习记录响应只用到的列
+RECORD_COLUMNS = (
+    StudyRecord.id, StudyRecord.user_id, StudyRecord.material_id,
+    StudyRecord.progress, StudyRecord.started_at, StudyRecord.last_studied_at,
+)
+MATERIAL_COLUMNS = (
+    PracticeMaterial.id, PracticeMaterial.title, PracticeMaterial.chinese_title,
+    PracticeMaterial.practice_type, PracticeMaterial.theme, PracticeMaterial.duration,
+)
+
+
+def study_records_query(db: Session, user_id: int):
+    """用户学习记录及其材料，一条 INNER JOIN 查询，只取 StudyRecordResponse 需要的列"""
+    return db.query(StudyRecord).options(
+        load_only(*RECORD_COLUMNS),
+        joinedload(StudyRecord.material, innerjoin=True).load_only(*MATERIAL_COLUMNS),
+    ).filter(StudyRecord.user_id == user_id)
 
 
 @router.post("/", response_model=StudyRecordResponse)
-def create_study_record(record: StudyRecordCreate, db: Session = Depends(get_db)):
+def create_study_record(
+        record: StudyRecordCreate,
+        user_id: int = Depends(get_current_user_id),
+        db: Session = Depends(get_db)
+):
     """创建学习记录"""
     print(
         f"🔍 调试信息 - 接收到的数据: material_id={record.material_id}, progress={record.progress}, is_restart={record.is_restart}")
 
-    # 检查材料是否存在
-    material = db.query(PracticeMaterial).filter(
-        PracticeMaterial.id == record.material_id,
-        PracticeMaterial.is_active == True
-    ).first()
-
-    if not material:
+    saved = save_study_progress(
+        db, user_id, record.material_id, record.progress,
+        is_restart=record.is_restart, play_duration=record.play_duration
+    )
+    if saved is None:
         raise HTTPException(status_code=404, detail="材料未找到")
 
-    # 查找现有记录
-    study_record = db.query(StudyRecord).filter(
-        StudyRecord.user_id == CURRENT_USER_ID,
+    # 重新查询，只加载响应需要的列；(user_id, material_id) 唯一
+    response_data = study_records_query(db, user_id).filter(
         StudyRecord.material_id == record.material_id
     ).first()
+    if not response_data:
+        raise HTTPException(status_code=500, detail="创建记录后查询失败")
 
-    current_time = datetime.now(timezone(timedelta(hours=8)))
-
-    if study_record:
-        # 使用前端传递的实际播放时长（秒）
-        if record.play_duration > 0:
-            study_record.study_duration_seconds += record.play_duration
-            print(f"⏱️ 学习时长更新: {record.play_duration}秒, 总时长: {study_record.study_duration_seconds}秒")
-        else:
-            # 如果没有传递播放时长，使用保守估算（每次保存算10秒）
-            study_record.study_duration_seconds += 10
-            print(f"⏱️ 默认学习时长更新: 10秒, 总时长: {study_record.study_duration_seconds}秒")
-
-        # 更新进度
-        study_record.progress = record.progress
-        study_record.last_studied_at = current_time
-
-        if record.is_restart:
-            print("🔄 执行重新学习逻辑")
-            study_record.started_at = current_time
-
-        print(f"📈 更新进度: {record.progress}%")
-    else:
-        print("🆕 创建新记录")
-        # 创建新记录，使用正确的字段名
-        study_record = StudyRecord(
-            user_id=CURRENT_USER_ID,
-            material_id=record.material_id,
-            progress=record.progress,
-            started_at=current_time,
-            last_studied_at=current_time,
-            study_duration_seconds=10  # 新记录初始10秒
-        )
-        db.add(study_record)
-
-    db.commit()
-
-    # 重新查询，包含材料信息
-    result = db.query(StudyRecord, PracticeMaterial).join(
-        PracticeMaterial, StudyRecord.material_id == PracticeMaterial.id
-    ).filter(
-        StudyRecord.id == study_record.id
-    ).first()
+    print(f"✅ 最终返回的记录: id={response_data.id}, 进度={response_data.progress}")
+    return response_data
 
-    if not result:
-        raise HTTPException(status_code=500, detail="创建记录后查询失败")
 
-    record_obj, material_obj = result
+# 认证失败时的关闭码（4000-4999 为应用自定义）
+WS_UNAUTHORIZED = 4401
 
-    # 构建响应数据
-    material_info = PracticeMaterialBase(
-        id=material_obj.id,
-        title=material_obj.title,
-        chinese_title=material_obj.chinese_title,
-        practice_type=material_obj.practice_type,
-        theme=material_obj.theme,
-        duration=material.duration,
 
-    )
+async def _authenticate_websocket(websocket: WebSocket) -> Optional[tuple]:
+    """令牌取自查询参数 token，或第一帧 {"token": ...}；返回 (用户id, 未消费的第一帧)"""
+    token = websocket.query_params.get("token")
+    first_frame = None
+    if token is None:
+        first_frame = await websocket.receive_json()
+        if isinstance(first_frame, dict) and "token" in first_frame:
+            token = first_frame.pop("token")
+            first_frame = first_frame or None
 
-    response_data = StudyRecordResponse(
-        id=record_obj.id,
-        user_id=record_obj.user_id,
-        material_id=record_obj.material_id,
-        progress=record_obj.progress,
-        started_at=record_obj.started_at,
-        last_studied_at=record_obj.last_studied_at,
-        material=material_info
-    )
+    if token is None:
+        if settings.auth_anonymous_user_id:
+            return settings.auth_anonymous_user_id, first_frame
+        await websocket.close(code=WS_UNAUTHORIZED, reason="未登录")
+        return None
+    try:
+        # 复查吊销时可能访问数据库，放到线程池
+        user_id = await run_in_threadpool(verified_tokens.verify, token)
+    except ValueError as e:
+        await websocket.close(code=WS_UNAUTHORIZED, reason=str(e))
+        return None
+    return user_id, first_frame
+
+
+@router.websocket("/ws")
+async def study_progress_stream(websocket: WebSocket):
+    """
+    播放器进度流：每帧 {"material_id", "progress", "play_duration", "is_restart"}，
+    字段含义同 POST /api/study-records/，material_id 省略时沿用上一帧；{"type": "flush"} 立即保存。
+    有未保存的进度时，超过最小保存间隔仍未收到新帧（暂停、网络卡顿）也会保存。
+    服务端保存后回复 {"type": "saved", ...}，帧格式错误或材料不存在时回复 {"type": "error", ...}。
+    """
+    await websocket.accept()
+    try:
+        auth = await _authenticate_websocket(websocket)
+    except WebSocketDisconnect:
+        return
+    if auth is None:
+        return
+    user_id, frame = auth
+    session = ProgressSession(user_id, settings.study_stream_progress_step, settings.study_stream_flush_interval)
+    await websocket.send_json({"type": "ready", "user_id": user_id})
+
+    async def flush(notify: bool = True):
+        if not session.dirty:
+            return
+        snapshot = session.take()
+        try:
+            saved = await run_in_threadpool(persist_progress, user_id, snapshot)
+        except Exception as e:
+            print(f"⚠️ 进度流保存失败: user={user_id}, material={snapshot['material_id']} - {e}")
+            session.restore(snapshot)
+            if notify:
+                await websocket.send_json({"type": "error", "detail": "保存进度失败"})
+            return
+        if saved is None:
+            if notify:
+                await websocket.send_json(
+                    {"type": "error", "material_id": snapshot["material_id"], "detail": "材料未找到"})
+            return
+        session.saved(saved["progress"])
+        if notify:
+            await websocket.send_json({"type": "saved", "material_id": snapshot["material_id"], **saved})
 
-    print(
-        f"✅ 最终返回的记录: id={response_data.id}, 进度={response_data.progress}, 学习时长={record_obj.study_duration_seconds}秒")
-    return response_data
+    try:
+        while True:
+            if frame is None:
+                try:
+                    frame = await asyncio.wait_for(websocket.receive_json(), session.seconds_until_flush())
+                except asyncio.TimeoutError:
+                    await flush()
+                    continue
+            if not isinstance(frame, dict):
+                await websocket.send_json({"type": "error", "detail": "帧必须是 JSON 对象"})
+            elif frame.get("type") == "flush":
+                await flush()
+            else:
+                if session.material_id is not None:
+                    frame.setdefault("material_id", session.material_id)
+                try:
+                    tick = StudyRecordCreate.model_validate(frame)
+                except ValidationError as e:
+                    await websocket.send_json({"type": "error", "detail": e.errors(include_url=False, include_context=False)})
+                else:
+                    # 切换材料前先保存上一个材料的进度
+                    if session.switches_material(tick.material_id):
+                        await flush()
+                    session.apply(tick.material_id, tick.progress, tick.play_duration, tick.is_restart)
+                    if session.should_flush():
+                        await flush()
+            frame = None
+    except WebSocketDisconnect:
+        # 断开时保存剩余的进度和播放时长，连接已关闭不再回复
+        await flush(notify=False)
 
 
 @router.get("/user-stats", response_model=UserStats)
-def get_user_stats(db: Session = Depends(get_db)):
+def get_user_stats(user_id: int = Depends(get_current_user_id), db: Session = Depends(get_db)):
     """获取用户学习统计"""
     from sqlalchemy import func, distinct, Date
 
+    namespace = user_stats_namespace(user_id)
+    cached = shared_cache.get(namespace, "stats")
+    if cached is not None:
+        return UserStats.model_validate_json(cached)
+
     try:
         # 获取总学习秒数
         total_seconds_result = db.query(
             func.sum(StudyRecord.study_duration_seconds).label('total_seconds')
         ).filter(
-            StudyRecord.user_id == CURRENT_USER_ID
+            StudyRecord.user_id == user_id
         ).first()
 
         total_seconds = total_seconds_result.total_seconds or 0
@@ -131,7 +196,7 @@ def get_user_stats(db: Session = Depends(get_db)):
         training_days_result = db.query(
             func.count(distinct(func.date(StudyRecord.last_studied_at)))  # 改为 last_studied_at
         ).filter(
-            StudyRecord.user_id == CURRENT_USER_ID
+            StudyRecord.user_id == user_id
         ).first()
 
         training_days = training_days_result[0] or 0
@@ -141,26 +206,59 @@ def get_user_stats(db: Session = Depends(get_db)):
 
         print(f"📊 用户统计: 总秒数={total_seconds}, 训练天数={training_days}, 总小时={total_study_hours}")
 
-        return UserStats(
+        stats = UserStats(
             total_study_hours=total_study_hours,
             training_days=training_days
         )
+        shared_cache.set(namespace, "stats", stats.model_dump_json().encode("utf-8"))
+        return stats
 
     except Exception as e:
         print(f"计算用户统计错误: {e}")
         return UserStats(total_study_hours=1, training_days=0)
 
 
+# 热力图最长查询范围
+MAX_ACTIVITY_DAYS = 366
+
+
+@router.get("/activity", response_model=StudyActivitySeries)
+def get_study_activity(
+        start: Optional[date] = Query(None, description="开始日期(YYYY-MM-DD)，默认一年前"),
+        end: Optional[date] = Query(None, description="结束日期(YYYY-MM-DD)，默认今天"),
+        user_id: int = Depends(get_current_user_id),
+        db: Session = Depends(get_db)
+):
+    """按天、按周统计学习分钟数，用于日历热力图和周图表"""
+    end = end or datetime.now(timezone(timedelta(hours=8))).date()
+    start = start or end - timedelta(days=MAX_ACTIVITY_DAYS - 1)
+    if start > end:
+        raise HTTPException(status_code=400, detail="开始日期不能晚于结束日期")
+    if (end - start).days >= MAX_ACTIVITY_DAYS:
+        raise HTTPException(status_code=400, detail=f"查询范围不能超过 {MAX_ACTIVITY_DAYS} 天")
+
+    namespace = user_stats_namespace(user_id)
+    key = f"activity:{start}:{end}"
+    cached = shared_cache.get(namespace, key)
+    if cached is not None:
+        return StudyActivitySeries.model_validate_json(cached)
+
+    series = activity_series(db, user_id, start, end)
+    shared_cache.set(namespace, key, series.model_dump_json().encode("utf-8"))
+    return series
+
+
 @router.get("/material/{material_id}/progress", response_model=StudyRecordProgress)
 def get_study_progress_by_material(
         material_id: int,
+        user_id: int = Depends(get_current_user_id),
         db: Session = Depends(get_db)
 ):
     """获取用户对指定材料的学习进度"""
     try:
         # 查询用户对该材料的学习记录
         study_record = db.query(StudyRecord).filter(
-            StudyRecord.user_id == CURRENT_USER_ID,
+            StudyRecord.user_id == user_id,
             StudyRecord.material_id == material_id
         ).first()
 
@@ -185,47 +283,10 @@ def get_study_progress_by_material(
 
 
 @router.get("/", response_model=List[StudyRecordResponse])
-def get_user_study_records(db: Session = Depends(get_db)):
+def get_user_study_records(user_id: int = Depends(get_current_user_id), db: Session = Depends(get_db)):
     """获取用户学习记录"""
     try:
-        # 使用连接查询确保获取材料信息
-        results = db.query(
-            StudyRecord,
-            PracticeMaterial
-        ).join(
-            PracticeMaterial, StudyRecord.material_id == PracticeMaterial.id
-        ).filter(
-            StudyRecord.user_id == CURRENT_USER_ID
-        ).order_by(StudyRecord.last_studied_at.desc()).all()
-
-        # 手动构建响应数据
-        response_data = []
-        for record, material in results:
-            # 构建材料信息
-            material_info = PracticeMaterialBase(
-                id=material.id,
-                title=material.title,
-                chinese_title=material.chinese_title,
-                practice_type=material.practice_type,
-                theme=material.theme,
-                duration = material.duration
-            )
-
-            # 构建学习记录响应
-            record_response = StudyRecordResponse(
-                id=record.id,
-                user_id=record.user_id,
-                material_id=record.material_id,
-                progress=record.progress,
-                started_at=record.started_at,
-                last_studied_at=record.last_studied_at,
-                material=material_info
-
-            )
-            response_data.append(record_response)
-
-        return response_data
-
+        return study_records_query(db, user_id).order_by(StudyRecord.last_studied_at.desc()).all()
     except Exception as e:
         print(f"查询学习记录错误: {e}")
-        raise HTTPException(status_code=500, detail="获取学习记录失败")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="获取学习记录失败")
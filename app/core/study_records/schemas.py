@@ -1,7 +1,7 @@
 # app/core/study_record/schemas.py
 from pydantic import BaseModel
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime
+from typing import List, Optional
 
 
 class PracticeMaterialBase(BaseModel):
@@ -56,4 +56,17 @@ class StudyRecordProgress(BaseModel):
     study_record_id: Optional[int] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class ActivityBucket(BaseModel):
+    start: date  # 日统计为当天，周统计为该周周一
+    minutes: float
+
+
+class StudyActivitySeries(BaseModel):
+    start: date
+    end: date
+    total_minutes: float
+    days: List[ActivityBucket]
+    weeks: List[ActivityBucket]
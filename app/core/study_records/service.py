@@ -0,0 +1,81 @@
+# app/core/study_records/service.py
+"""
+学习进度保存
+
+HTTP 接口和播放器 WebSocket 共用同一套保存语义：材料校验、累加学习时长、
+is_restart 重置开始时间、追加活动日志，提交后失效该用户的统计和推荐缓存。
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.materials.models import PracticeMaterial
+from app.core.study_records.activity import record_activity
+from app.core.study_records.models import StudyRecord
+from app.shared.cache import shared_cache, user_stats_namespace, recommendations_namespace
+
+# 未传递播放时长时每次保存按 10 秒估算；新记录也按 10 秒起算
+DEFAULT_SAVE_SECONDS = 10
+
+
+def save_study_progress(
+        db: Session,
+        user_id: int,
+        material_id: int,
+        progress: int,
+        is_restart: bool = False,
+        play_duration: float = 0,
+) -> Optional[Tuple[StudyRecord, PracticeMaterial]]:
+    """保存一次学习进度并提交，材料不存在或已下架时返回 None"""
+    material = db.query(PracticeMaterial).filter(
+        PracticeMaterial.id == material_id,
+        PracticeMaterial.is_active == True
+    ).first()
+    if not material:
+        return None
+
+    study_record = db.query(StudyRecord).filter(
+        StudyRecord.user_id == user_id,
+        StudyRecord.material_id == material_id
+    ).first()
+
+    current_time = datetime.now(timezone(timedelta(hours=8)))
+
+    if study_record:
+        # 使用前端传递的实际播放时长（秒），没有时使用保守估算
+        added_seconds = play_duration if play_duration > 0 else DEFAULT_SAVE_SECONDS
+        study_record.study_duration_seconds += added_seconds
+        print(f"⏱️ 学习时长更新: {added_seconds}秒, 总时长: {study_record.study_duration_seconds}秒")
+
+        study_record.progress = progress
+        study_record.last_studied_at = current_time
+
+        if is_restart:
+            print("🔄 执行重新学习逻辑")
+            study_record.started_at = current_time
+
+        print(f"📈 更新进度: {progress}%")
+    else:
+        print("🆕 创建新记录")
+        study_record = StudyRecord(
+            user_id=user_id,
+            material_id=material_id,
+            progress=progress,
+            started_at=current_time,
+            last_studied_at=current_time,
+            study_duration_seconds=DEFAULT_SAVE_SECONDS
+        )
+        db.add(study_record)
+        added_seconds = DEFAULT_SAVE_SECONDS
+
+    # 追加活动日志并累加当天的统计桶，与学习记录在同一事务中提交
+    record_activity(db, user_id, material_id, int(round(added_seconds)), current_time)
+
+    db.commit()
+
+    # 学习数据变化，通知所有 worker 失效该用户的统计和推荐缓存
+    shared_cache.invalidate(user_stats_namespace(user_id))
+    shared_cache.invalidate(recommendations_namespace(user_id))
+
+    return study_record, material
@@ -0,0 +1,96 @@
+# app/core/study_records/stream.py
+"""
+播放器进度流
+
+播放器通过一个 WebSocket 连接持续发送进度帧，连接内维护当前材料的进度和累计播放时长，
+只在进度有明显变化、距上次保存超过最小间隔、切换材料、重新学习或断开连接时才落库；
+暂停或帧中断时，等待下一帧的超时到期也会保存未落库的进度和播放时长，
+落库复用 save_study_progress，与 POST /api/study-records/ 语义一致。
+"""
+import time
+from typing import Optional
+
+from app.database import SessionLocal
+from app.core.study_records.service import save_study_progress
+
+
+class ProgressSession:
+    """单个连接的进度状态：未保存的进度、累计播放时长和待执行的重新学习"""
+
+    def __init__(self, user_id: int, progress_step: int, flush_interval: float):
+        self.user_id = user_id
+        self.progress_step = progress_step
+        self.flush_interval = flush_interval
+        self.material_id: Optional[int] = None
+        self.progress: Optional[int] = None
+        self.saved_progress: Optional[int] = None
+        self.pending_seconds = 0.0
+        self.restart = False
+        self.dirty = False
+        self.last_saved = time.monotonic()
+
+    def switches_material(self, material_id: int) -> bool:
+        return self.material_id is not None and material_id != self.material_id
+
+    def apply(self, material_id: int, progress: int, play_duration: float, is_restart: bool):
+        if material_id != self.material_id:
+            self.material_id = material_id
+            self.saved_progress = None
+        self.progress = progress
+        self.pending_seconds += max(play_duration, 0)
+        self.restart = self.restart or is_restart
+        self.dirty = True
+
+    def should_flush(self) -> bool:
+        if not self.dirty:
+            return False
+        if self.restart or self.saved_progress is None:
+            return True
+        if self.progress != self.saved_progress and (
+                abs(self.progress - self.saved_progress) >= self.progress_step or self.progress >= 100):
+            return True
+        return time.monotonic() - self.last_saved >= self.flush_interval
+
+    def seconds_until_flush(self) -> Optional[float]:
+        """距按间隔保存还剩多少秒，没有未保存的数据时返回 None（无限等待下一帧）"""
+        if not self.dirty:
+            return None
+        return max(self.flush_interval - (time.monotonic() - self.last_saved), 0.0)
+
+    def take(self) -> dict:
+        """取出待保存的数据并清空累计值；保存失败时用 restore 放回"""
+        snapshot = {
+            "material_id": self.material_id,
+            "progress": self.progress,
+            "is_restart": self.restart,
+            "play_duration": self.pending_seconds,
+        }
+        self.pending_seconds = 0.0
+        self.restart = False
+        self.dirty = False
+        return snapshot
+
+    def restore(self, snapshot: dict):
+        if snapshot["material_id"] == self.material_id:
+            self.pending_seconds += snapshot["play_duration"]
+            self.restart = self.restart or snapshot["is_restart"]
+            self.dirty = True
+        # 保存失败后等满一个间隔再重试
+        self.last_saved = time.monotonic()
+
+    def saved(self, progress: int):
+        self.saved_progress = progress
+        self.last_saved = time.monotonic()
+
+
+def persist_progress(user_id: int, snapshot: dict):
+    """在线程池中执行：独立会话保存一次进度，材料不存在时返回 None"""
+    db = SessionLocal()
+    try:
+        result = save_study_progress(db, user_id, **snapshot)
+        if result is None:
+            return None
+        study_record, _ = result
+        return {"progress": study_record.progress, "last_studied_at": study_record.last_studied_at.isoformat()}
+    finally:
+        db.close()
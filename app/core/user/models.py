@@ -0,0 +1,18 @@
+# app/core/user/models.py
+from sqlalchemy import Column, Integer, String, DateTime, Boolean
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+
+class User(Base):
+    __tablename__ = "users"
+
+    id = Column(Integer, primary_key=True, index=True)
+    username = Column(String(50), nullable=False, unique=True)
+    password_hash = Column(String(200), nullable=False)
+    display_name = Column(String(100))
+    is_active = Column(Boolean, default=True)
+    # 递增后该用户之前签发的所有令牌失效
+    token_version = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=func.now())
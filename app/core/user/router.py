@@ -0,0 +1,37 @@
+# app/core/user/router.py
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.core.auth.tokens import get_current_user_id, hash_password
+from app.core.user.models import User
+from app.core.user.schemas import UserCreate, UserResponse
+
+router = APIRouter(prefix="/api/users", tags=["users"])
+
+
+@router.post("/", response_model=UserResponse)
+def register_user(user: UserCreate, db: Session = Depends(get_db)):
+    """注册新用户"""
+    if db.query(User.id).filter(User.username == user.username).first():
+        raise HTTPException(status_code=400, detail="用户名已存在")
+
+    db_user = User(
+        username=user.username,
+        password_hash=hash_password(user.password),
+        display_name=user.display_name,
+    )
+    db.add(db_user)
+    db.commit()
+    db.refresh(db_user)
+    print(f"🆕 新用户注册: {db_user.username}")
+    return db_user
+
+
+@router.get("/me", response_model=UserResponse)
+def get_me(user_id: int = Depends(get_current_user_id), db: Session = Depends(get_db)):
+    """获取当前登录用户信息"""
+    user = db.query(User).filter(User.id == user_id, User.is_active == True).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="用户不存在")
+    return user
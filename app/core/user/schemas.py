@@ -0,0 +1,20 @@
+# app/core/user/schemas.py
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Optional
+
+
+class UserCreate(BaseModel):
+    username: str = Field(..., min_length=3, max_length=50, pattern=r"^[A-Za-z0-9_.-]+$")
+    password: str = Field(..., min_length=8, max_length=128)
+    display_name: Optional[str] = Field(None, max_length=100)
+
+
+class UserResponse(BaseModel):
+    id: int
+    username: str
+    display_name: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
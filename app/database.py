@@ -1,14 +1,170 @@
 # app/database.py
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import itertools
+import threading
+import time
+from typing import List, Optional
+
+from fastapi import Request
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import declarative_base, sessionmaker
 from app.config import settings
 
 engine = create_engine(settings.database_url)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 所有模型共用一份元数据，跨模块的模型之间才能声明关系
+Base = declarative_base()
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+class Replica:
+    """一个只读副本及其连接池"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.engine = create_engine(url, pool_pre_ping=True)
+        self.session_factory = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.healthy = True
+        self.next_check_at = 0.0
+
+    @property
+    def display_url(self) -> str:
+        return make_url(self.url).render_as_string(hide_password=True)
+
+
+class ReplicaRouter:
+    """
+    只读副本路由：轮询选择健康副本，定期健康检查，副本故障时自动摘除并回退主库
+
+    主库写入后的短时间内读请求也走主库，保证读到自己的写入。写入标记保存在共享缓存中，
+    缓存后端为 shm / network 时所有 worker 共用这个时间窗口；进程内（local）后端只对本 worker 生效，
+    配置了只读副本的多 worker 部署必须使用共享后端。
+    """
+
+    WRITE_MARKER = "replica:primary_write"
+
+    def __init__(self, urls: List[str], health_interval: float = 10.0, retry_interval: float = 5.0,
+                 read_after_write_seconds: int = 3):
+        self.urls = list(urls)
+        self.health_interval = health_interval
+        self.retry_interval = retry_interval
+        self.read_after_write_seconds = read_after_write_seconds
+        self._replicas: Optional[List[Replica]] = None
+        self._cursor = itertools.count()
+        self._lock = threading.Lock()
+
+    @property
+    def replicas(self) -> List[Replica]:
+        # 首次使用时才创建副本连接池
+        if self._replicas is None:
+            with self._lock:
+                if self._replicas is None:
+                    self._replicas = [Replica(url) for url in self.urls]
+                    self._check_write_marker_scope()
+        return self._replicas
+
+    def _check_write_marker_scope(self):
+        from app.shared.cache import shared_cache
+        if self.urls and not shared_cache.backend.shared:
+            print("⚠️ 已配置只读副本但缓存后端不跨 worker 共享，写后读的主库窗口只在本 worker 内生效")
+
+    def _ping(self, replica: Replica) -> bool:
+        try:
+            with replica.engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+            return True
+        except Exception as e:
+            print(f"⚠️ 只读副本不可用: {replica.display_url} - {e}")
+            return False
+
+    def _is_available(self, replica: Replica) -> bool:
+        now = time.monotonic()
+        if now >= replica.next_check_at:
+            # 先推迟下一次检查时间，避免并发请求同时探测
+            replica.next_check_at = now + self.retry_interval
+            replica.healthy = self._ping(replica)
+            if replica.healthy:
+                replica.next_check_at = now + self.health_interval
+        return replica.healthy
+
+    def pick(self) -> Optional[Replica]:
+        """轮询选出一个健康副本，全部不可用时返回 None"""
+        replicas = self.replicas
+        if not replicas:
+            return None
+        start = next(self._cursor)
+        for i in range(len(replicas)):
+            replica = replicas[(start + i) % len(replicas)]
+            if self._is_available(replica):
+                return replica
+        return None
+
+    def mark_failed(self, replica: Replica):
+        replica.healthy = False
+        replica.next_check_at = time.monotonic() + self.retry_interval
+
+    def note_write(self):
+        """记录一次主库写入，之后的时间窗口内读请求都走主库"""
+        if not self.urls:
+            return
+        from app.shared.cache import shared_cache
+        shared_cache.backend.set(self.WRITE_MARKER, b"1", self.read_after_write_seconds)
+
+    def recently_written(self) -> bool:
+        from app.shared.cache import shared_cache
+        return shared_cache.backend.get(self.WRITE_MARKER) is not None
+
+    def status(self) -> List[dict]:
+        return [
+            {"url": replica.display_url, "healthy": replica.healthy}
+            for replica in (self._replicas or [])
+        ]
+
+
+replica_router = ReplicaRouter(
+    settings.database_replica_urls,
+    health_interval=settings.replica_health_interval,
+    retry_interval=settings.replica_retry_interval,
+    read_after_write_seconds=settings.replica_read_after_write_seconds,
+)
+
+
+def _open_read_session(request: Request):
+    """返回 (会话, 副本)；副本在取连接时不可用则摘除并改用主库，副本为 None 表示主库"""
+    if (replica_router.urls
+            and request.headers.get("x-consistency") != "strong"
+            and not replica_router.recently_written()):
+        replica = replica_router.pick()
+        if replica is not None:
+            db = replica.session_factory()
+            try:
+                # 提前取出连接，连接池的 pre-ping 在这里发现已宕机的副本
+                db.connection()
+                return db, replica
+            except OperationalError as e:
+                db.close()
+                replica_router.mark_failed(replica)
+                print(f"⚠️ 只读副本连接失败，本次请求改用主库: {replica.display_url} - {e}")
+    return SessionLocal(), None
+
+
+def get_read_db(request: Request):
+    """只读接口使用的会话：优先路由到只读副本，强一致请求、刚写入后和副本不可用时回退主库"""
+    db, replica = _open_read_session(request)
+    try:
+        yield db
+    except OperationalError:
+        # 请求处理中途副本断开：摘除副本，后续请求走其他副本或主库
+        if replica is not None:
+            replica_router.mark_failed(replica)
+        raise
+    finally:
+        db.close()
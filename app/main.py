@@ -1,12 +1,67 @@
 # main.py
+# 最先导入启动报告，让计时从应用导入开始
+from app.shared.startup import startup_report, run_readiness_checks, run_warmup, seed_indexes
+
+import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 
+from app.config import settings
+from app.database import replica_router
+from app.shared.admission import AdmissionController, UploadAdmissionMiddleware
+from app.shared.cache import shared_cache
+from app.shared.compression import CompressionMiddleware
+from app.shared.profiling import ProfilingMiddleware, install_sql_hooks, profile_store
+
 # 导入路由
-from app.core.materials.router import router as materials_router
-from app.core.study_records.router import router as study_record_router
-from app.core.daily_sentence.router import router as daily_sentence_router
+with startup_report.phase("import_routers"):
+    from app.core.materials.router import router as materials_router, compressed_bodies
+    from app.core.study_records.router import router as study_record_router
+    from app.core.daily_sentence.router import router as daily_sentence_router
+    from app.core.glossary.router import router as glossary_router
+    from app.core.similarity.router import router as similarity_router
+    from app.core.similarity.engine import similarity_engine
+    from app.core.recommendations.router import router as recommendations_router
+    from app.core.export.router import router as export_router
+    from app.core.auth.router import router as auth_router
+    from app.core.user.router import router as user_router
+    from app.core.profiling.router import router as profiling_router
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """启动时执行一次并发就绪检查、索引初始化和可选的预热并记录耗时，失败不阻止进程启动"""
+    with startup_report.phase("readiness_checks"):
+        results = await run_in_threadpool(run_readiness_checks, None, settings.readiness_timeout)
+    for name, result in results.items():
+        if not result["ok"]:
+            print(f"⚠️ 就绪检查未通过: {name} - {result.get('error')}")
+    # 最新更新缓冲区等索引必须在接收请求前加载，不受预热开关影响
+    with startup_report.phase("indexes"):
+        indexes = await run_in_threadpool(seed_indexes)
+    for name, result in indexes.items():
+        if not result["ok"]:
+            print(f"⚠️ 索引初始化失败: {name} - {result.get('error')}")
+    if settings.warmup_enabled:
+        # 预热完成后才报告就绪，各步骤耗时记入 /health/startup
+        with startup_report.phase("warmup"):
+            warmup = await run_in_threadpool(
+                run_warmup, settings.warmup_pool_connections, settings.warmup_popular_materials
+            )
+        for name, result in warmup.items():
+            if not result["ok"]:
+                print(f"⚠️ 预热步骤失败: {name} - {result.get('error')}")
+    startup_report.mark_ready()
+    print(f"✅ 启动完成: {startup_report.as_dict()}")
+    yield
+    # 写出尚在等待延迟写入的相似度快照
+    await run_in_threadpool(similarity_engine.flush)
+
 
 # 创建FastAPI应用
 app = FastAPI(
@@ -14,7 +69,23 @@ app = FastAPI(
     description="口译学习平台后端API接口文档",
     version="1.0.0",
     docs_url="/docs",  # 明确指定文档路径
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
+)
+
+# 上传准入控制，放在 CORS 内层，拒绝响应也带跨域头
+upload_admission = AdmissionController(
+    max_concurrent=settings.upload_max_concurrent,
+    max_inflight_bytes=settings.upload_max_inflight_bytes,
+    max_queue=settings.upload_queue_size,
+    queue_timeout=settings.upload_queue_timeout,
+    max_request_bytes=settings.upload_max_request_bytes,
+)
+app.add_middleware(
+    UploadAdmissionMiddleware,
+    controller=upload_admission,
+    paths=settings.upload_paths,
+    retry_after=settings.upload_retry_after,
 )
 
 # 配置CORS
@@ -34,13 +105,39 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 配置响应压缩（gzip / brotli）
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.compression_minimum_size,
+    gzip_level=settings.compression_gzip_level,
+    brotli_quality=settings.compression_brotli_quality,
+)
+
+# 按请求性能分析，放在最外层以计入所有中间件的耗时；关闭时不注册，没有任何开销
+if settings.profiling_enabled:
+    install_sql_hooks()
+    app.add_middleware(
+        ProfilingMiddleware,
+        store=profile_store,
+        sample_rate=settings.profiling_sample_rate,
+        interval=settings.profiling_interval,
+    )
+
 # 挂载静态文件目录
-app.mount("/static", StaticFiles(directory="static"), name="static")
+os.makedirs(settings.static_dir, exist_ok=True)
+app.mount("/static", StaticFiles(directory=settings.static_dir), name="static")
 
 # 注册路由
 app.include_router(materials_router)
 app.include_router(study_record_router)
 app.include_router(daily_sentence_router)
+app.include_router(glossary_router)
+app.include_router(similarity_router)
+app.include_router(recommendations_router)
+app.include_router(export_router)
+app.include_router(auth_router)
+app.include_router(user_router)
+app.include_router(profiling_router)
 
 @app.get("/")
 def read_root():
@@ -52,4 +149,45 @@ def read_root():
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy", "service": "interpreting-platform"}
\ No newline at end of file
+    return {"status": "healthy", "service": "interpreting-platform"}
+
+
+@app.get("/health/live")
+def liveness_check():
+    """存活检查：进程能响应即可，不访问任何依赖"""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+def readiness_check():
+    """就绪检查：并发检查数据库连接和数据表"""
+    checks = run_readiness_checks(timeout=settings.readiness_timeout)
+    ready = all(result["ok"] for result in checks.values())
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "unavailable", "checks": checks}
+    )
+
+
+@app.get("/health/replicas")
+def replica_status():
+    """只读副本健康状态"""
+    return {"replicas": replica_router.status()}
+
+
+@app.get("/health/uploads")
+def upload_admission_status():
+    """本 worker 的上传准入计数：在途上传、队列深度和拒绝次数"""
+    return upload_admission.stats()
+
+
+@app.get("/health/cache")
+def cache_status():
+    """本 worker 的缓存命中统计：共享缓存按命名空间，预压缩响应体缓存单独统计"""
+    return {**shared_cache.stats(), "compressed_bodies": compressed_bodies.stats()}
+
+
+@app.get("/health/startup")
+def startup_timing():
+    """启动各阶段耗时"""
+    return startup_report.as_dict()
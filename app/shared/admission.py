@@ -0,0 +1,132 @@
+# app/shared/admission.py
+"""
+上传准入控制
+
+按 Content-Length 统计每个 worker 正在处理的上传数量和字节数，超过上限的请求进入有界等待队列；
+队列已满立即返回 429，等待超时返回 503，均带 Retry-After，避免突发的大文件上传耗尽内存。
+"""
+import asyncio
+from typing import Iterable, Optional
+
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+
+
+class AdmissionController:
+    """单个 worker 内的上传准入状态，在事件循环线程中使用"""
+
+    def __init__(self, max_concurrent: int = 4, max_inflight_bytes: int = 256 * 1024 * 1024,
+                 max_queue: int = 8, queue_timeout: float = 10.0, max_request_bytes: Optional[int] = None):
+        self.max_concurrent = max_concurrent
+        self.max_inflight_bytes = max_inflight_bytes
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.max_request_bytes = max_request_bytes
+        self.active = 0
+        self.inflight_bytes = 0
+        self.waiting = 0
+        self.counters = {
+            "admitted": 0,
+            "queued": 0,
+            "rejected_queue_full": 0,
+            "rejected_timeout": 0,
+            "rejected_too_large": 0,
+            "max_queue_depth": 0,
+        }
+        self._condition: Optional[asyncio.Condition] = None
+
+    def _fits(self, size: int) -> bool:
+        if self.active >= self.max_concurrent:
+            return False
+        # 没有在处理的上传时总是放行，保证单个大请求不会永远排队
+        return self.active == 0 or self.inflight_bytes + size <= self.max_inflight_bytes
+
+    async def acquire(self, size: int) -> Optional[int]:
+        """成功准入返回 None，否则返回应响应的状态码"""
+        if self.max_request_bytes is not None and size > self.max_request_bytes:
+            self.counters["rejected_too_large"] += 1
+            return 413
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+
+        async with self._condition:
+            if not self._fits(size):
+                if self.waiting >= self.max_queue:
+                    self.counters["rejected_queue_full"] += 1
+                    return 429
+
+                self.waiting += 1
+                self.counters["queued"] += 1
+                self.counters["max_queue_depth"] = max(self.counters["max_queue_depth"], self.waiting)
+                try:
+                    await asyncio.wait_for(self._condition.wait_for(lambda: self._fits(size)), self.queue_timeout)
+                except asyncio.TimeoutError:
+                    self.counters["rejected_timeout"] += 1
+                    return 503
+                finally:
+                    self.waiting -= 1
+
+            self.active += 1
+            self.inflight_bytes += size
+            self.counters["admitted"] += 1
+            return None
+
+    async def release(self, size: int):
+        async with self._condition:
+            self.active -= 1
+            self.inflight_bytes -= size
+            self._condition.notify_all()
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "inflight_bytes": self.inflight_bytes,
+            "queue_depth": self.waiting,
+            "limits": {
+                "max_concurrent": self.max_concurrent,
+                "max_inflight_bytes": self.max_inflight_bytes,
+                "max_queue": self.max_queue,
+                "queue_timeout": self.queue_timeout,
+            },
+            **self.counters,
+        }
+
+
+REJECT_MESSAGES = {
+    413: "上传文件过大",
+    429: "上传请求过多，请稍后重试",
+    503: "服务器繁忙，上传排队超时，请稍后重试",
+}
+
+
+class UploadAdmissionMiddleware:
+    """纯 ASGI 中间件，只对指定路径的 POST / PUT 请求生效"""
+
+    def __init__(self, app, controller: AdmissionController, paths: Iterable[str], retry_after: int = 5):
+        self.app = app
+        self.controller = controller
+        self.paths = tuple(paths)
+        self.retry_after = retry_after
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or scope["method"] not in ("POST", "PUT")
+                or scope["path"] not in self.paths):
+            await self.app(scope, receive, send)
+            return
+
+        content_length = Headers(scope=scope).get("content-length")
+        # 没有 Content-Length（分块上传）时按单个请求上限估算
+        size = int(content_length) if content_length and content_length.isdigit() \
+            else (self.controller.max_request_bytes or 0)
+
+        status = await self.controller.acquire(size)
+        if status is not None:
+            headers = {"Retry-After": str(self.retry_after)} if status != 413 else {}
+            response = JSONResponse({"detail": REJECT_MESSAGES[status]}, status_code=status, headers=headers)
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            await self.controller.release(size)
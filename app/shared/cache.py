@@ -0,0 +1,488 @@
+# app/shared/cache.py
+"""
+跨 worker 共享缓存
+
+- LocalBackend：进程内字典，单 worker 或开发环境使用
+- SharedMemoryBackend：基于 /dev/shm 文件 + mmap，同一主机上的多个 uvicorn worker 共享（默认）
+- NetworkBackend：可插拔的网络缓存（接口与 redis-py 一致），测试时可用 InMemoryNetworkClient 代替
+
+失效通过命名空间版本号实现：写操作只需把共享的版本计数器加一，
+所有 worker 在下一次读取时都会看到新版本，相当于向全部 worker 广播失效。
+"""
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict, defaultdict
+from typing import Callable, Dict, Optional, Tuple
+
+from app.config import settings
+from app.shared.startup import LazyResource
+
+# 命名空间
+CATALOG = "catalog"  # 材料列表等依赖整个目录的数据，新增材料时失效
+MATERIAL_DETAIL = "material_detail"  # 单个材料详情
+DAILY_SENTENCE = "daily_sentence"
+# 材料被下架等非追加式变更时递增，进程内的目录索引据此全量重建
+CATALOG_RESET = "catalog_reset"
+
+
+def user_stats_namespace(user_id: int) -> str:
+    """每个用户独立的统计命名空间，写学习记录时只失效该用户"""
+    return f"user_stats:{user_id}"
+
+
+def recommendations_namespace(user_id: int) -> str:
+    """每个用户的推荐候选列表，学习进度变化时失效"""
+    return f"recommendations:{user_id}"
+
+
+_EXPIRES = struct.Struct("<d")
+_COUNTER = struct.Struct("<q")
+
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def deployment_key() -> str:
+    """同一数据库、同一代码目录的 worker 共用一个缓存目录，同主机上的其他部署互不影响"""
+    source = f"{settings.database_url}|{os.path.dirname(_APP_DIR)}"
+    return hashlib.sha1(source.encode("utf-8")).hexdigest()[:12]
+
+
+def release_fingerprint() -> str:
+    """当前发布的标识：优先用 APP_RELEASE，否则按 app 目录下源码文件的路径、大小和修改时间计算"""
+    if settings.app_release:
+        return settings.app_release
+    digest = hashlib.sha1()
+    for root, dirs, files in os.walk(_APP_DIR):
+        dirs.sort()
+        for name in sorted(files):
+            if name.endswith(".py"):
+                stat = os.stat(os.path.join(root, name))
+                digest.update(f"{os.path.relpath(os.path.join(root, name), _APP_DIR)}|{stat.st_size}|"
+                              f"{stat.st_mtime_ns}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class CacheBackend:
+    """缓存后端接口，值统一为 bytes"""
+    # 是否在多个 worker 之间共享；幂等键、令牌吊销、副本写入标记都依赖共享后端
+    shared = True
+
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl: int):
+        raise NotImplementedError
+
+    def add(self, key: str, value: bytes, ttl: int) -> bool:
+        """仅在键不存在（或已过期）时写入，返回是否写入成功，用于跨 worker 抢占"""
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def incr(self, key: str) -> int:
+        """计数器加一并返回新值"""
+        raise NotImplementedError
+
+    def get_counter(self, key: str) -> int:
+        raise NotImplementedError
+
+
+class LocalBackend(CacheBackend):
+    """进程内 LRU 缓存，不跨 worker 共享，按条目数和字节数限制内存"""
+    shared = False
+
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._bytes = 0
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _pop(self, key):
+        item = self._data.pop(key, None)
+        if item is not None:
+            self._bytes -= len(item[1])
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.time():
+                self._pop(key)
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def _store(self, key, value, ttl):
+        self._pop(key)
+        self._data[key] = (time.time() + ttl, value)
+        self._bytes += len(value)
+        # 超出限制时淘汰最久未使用的条目
+        while self._data and (len(self._data) > self.max_entries or self._bytes > self.max_bytes):
+            oldest = next(iter(self._data))
+            self._pop(oldest)
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._store(key, value, ttl)
+
+    def add(self, key, value, ttl):
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[0] >= time.time():
+                return False
+            self._store(key, value, ttl)
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._pop(key)
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def get_counter(self, key):
+        return self._counters.get(key, 0)
+
+
+class SharedMemoryBackend(CacheBackend):
+    """
+    单主机多 worker 共享缓存
+
+    每个条目是共享内存目录下的一个文件（8 字节过期时间 + 值），写入时先写临时文件再原子替换，
+    读取时 mmap。版本计数器集中在一个 mmap 的定长槽位文件中，加一时用 flock 互斥。
+
+    目录默认按部署区分（数据库地址 + 代码目录），目录中记录发布标识；新发布的第一个 worker
+    启动时清空旧发布留下的条目和计数器，旧版本的响应体不会在部署后继续命中。
+    过期清理和容量淘汰每 256 次写入在后台线程执行一次，不占用请求线程。
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = 256 * 1024 * 1024,
+                 counter_slots: int = 4096, release: Optional[str] = None):
+        import fcntl  # 仅 POSIX 可用
+
+        self._fcntl = fcntl
+        if directory is None:
+            base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+            directory = os.path.join(base, f"transclass-cache-{deployment_key()}")
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.counter_slots = counter_slots
+        self._writes = 0
+        self._sweep_lock = threading.Lock()
+        os.makedirs(os.path.join(directory, "entries"), exist_ok=True)
+
+        counters_path = os.path.join(directory, "counters.bin")
+        size = counter_slots * _COUNTER.size
+        self._counters_fd = os.open(counters_path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self._counters_fd, fcntl.LOCK_EX)
+        try:
+            if release is not None:
+                self._claim_release(release)
+            if os.fstat(self._counters_fd).st_size < size:
+                os.ftruncate(self._counters_fd, size)
+        finally:
+            fcntl.flock(self._counters_fd, fcntl.LOCK_UN)
+        self._counters = mmap.mmap(self._counters_fd, size)
+
+    def _claim_release(self, release: str):
+        """持有计数器文件锁时调用：目录属于其他发布时清空条目和计数器，并记录当前发布"""
+        release_path = os.path.join(self.directory, "release")
+        try:
+            with open(release_path, encoding="utf-8") as f:
+                if f.read() == release:
+                    return
+        except FileNotFoundError:
+            pass
+        entries_dir = os.path.join(self.directory, "entries")
+        for entry in os.scandir(entries_dir):
+            try:
+                os.unlink(entry.path)
+            except FileNotFoundError:
+                pass
+        # 计数器原地清零（不截断文件，仍在运行的旧 worker 的 mmap 不会越界）；旧条目已删除，版本号重复也不会命中
+        size = os.fstat(self._counters_fd).st_size
+        if size:
+            os.pwrite(self._counters_fd, bytes(size), 0)
+        with open(release_path, "w", encoding="utf-8") as f:
+            f.write(release)
+        print(f"🧹 新发布启动，已清空共享缓存目录: {self.directory}")
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, "entries", hashlib.sha1(key.encode("utf-8")).hexdigest())
+
+    def _slot(self, key: str) -> int:
+        # 不同键落到同一槽位只会多失效一次，不影响正确性
+        return (zlib.crc32(key.encode("utf-8")) % self.counter_slots) * _COUNTER.size
+
+    def get(self, key):
+        try:
+            with open(self._path(key), "rb") as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                    (expires_at,) = _EXPIRES.unpack_from(m, 0)
+                    if expires_at < time.time():
+                        return None
+                    return m[_EXPIRES.size:]
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def set(self, key, value, ttl):
+        path = self._path(key)
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp", dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_EXPIRES.pack(time.time() + ttl))
+                f.write(value)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            # 写缓存失败不影响请求本身
+            print(f"⚠️ 共享缓存写入失败: {e}")
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            return
+
+        self._writes += 1
+        if self._writes % 256 == 0:
+            threading.Thread(target=self._sweep_in_background, name="cache-sweep", daemon=True).start()
+
+    def add(self, key, value, ttl):
+        path = self._path(key)
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp", dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_EXPIRES.pack(time.time() + ttl))
+                f.write(value)
+            for _ in range(2):
+                try:
+                    # link 在目标已存在时失败，保证只有一个 worker 写入成功
+                    os.link(tmp_path, path)
+                    return True
+                except FileExistsError:
+                    if self.get(key) is not None:
+                        return False
+                    # 已过期的条目，删除后重试一次
+                    self.delete(key)
+            return False
+        finally:
+            os.unlink(tmp_path)
+
+    def delete(self, key):
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def incr(self, key):
+        offset = self._slot(key)
+        self._fcntl.flock(self._counters_fd, self._fcntl.LOCK_EX)
+        try:
+            (value,) = _COUNTER.unpack_from(self._counters, offset)
+            value += 1
+            _COUNTER.pack_into(self._counters, offset, value)
+            return value
+        finally:
+            self._fcntl.flock(self._counters_fd, self._fcntl.LOCK_UN)
+
+    def get_counter(self, key):
+        (value,) = _COUNTER.unpack_from(self._counters, self._slot(key))
+        return value
+
+    def _sweep_in_background(self):
+        # 上一次清理还没结束时跳过
+        if not self._sweep_lock.acquire(blocking=False):
+            return
+        try:
+            self.sweep()
+        except OSError as e:
+            print(f"⚠️ 共享缓存清理失败: {e}")
+        finally:
+            self._sweep_lock.release()
+
+    def sweep(self):
+        """清理过期条目，总大小超限时按修改时间淘汰最旧的条目"""
+        entries_dir = os.path.join(self.directory, "entries")
+        now = time.time()
+        alive = []
+        total = 0
+        for entry in os.scandir(entries_dir):
+            if entry.name.startswith("."):
+                continue
+            try:
+                stat = entry.stat()
+                with open(entry.path, "rb") as f:
+                    header = f.read(_EXPIRES.size)
+                if len(header) == _EXPIRES.size and _EXPIRES.unpack(header)[0] < now:
+                    os.unlink(entry.path)
+                    continue
+            except (FileNotFoundError, struct.error):
+                continue
+            alive.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+        for _, size, path in sorted(alive):
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+
+class NetworkBackend(CacheBackend):
+    """网络缓存后端，client 需提供 redis-py 风格的 get/set/delete/incr"""
+
+    def __init__(self, client):
+        self.client = client
+        # 进程内的测试替身不跨 worker 共享
+        self.shared = not isinstance(client, InMemoryNetworkClient)
+
+    def get(self, key):
+        return self.client.get(key)
+
+    def set(self, key, value, ttl):
+        self.client.set(key, value, ex=ttl)
+
+    def add(self, key, value, ttl):
+        return bool(self.client.set(key, value, ex=ttl, nx=True))
+
+    def delete(self, key):
+        self.client.delete(key)
+
+    def incr(self, key):
+        return int(self.client.incr(key))
+
+    def get_counter(self, key):
+        value = self.client.get(key)
+        return int(value) if value is not None else 0
+
+
+class InMemoryNetworkClient:
+    """网络缓存的本地替身，接口与 redis-py 客户端一致，可直接用于测试"""
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[Optional[float], bytes]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at is not None and expires_at < time.time():
+            self._data.pop(key, None)
+            return None
+        return value
+
+    def set(self, key, value, ex=None, nx=False):
+        with self._lock:
+            if nx and self.get(key) is not None:
+                return None
+            self._data[key] = (time.time() + ex if ex else None, value)
+            return True
+
+    def delete(self, key):
+        self._data.pop(key, None)
+
+    def incr(self, key):
+        with self._lock:
+            value = int(self.get(key) or 0) + 1
+            self._data[key] = (None, str(value).encode())
+            return value
+
+
+def create_cache_backend() -> CacheBackend:
+    """根据配置创建缓存后端"""
+    backend = settings.cache_backend.lower()
+    if backend == "network":
+        if not settings.cache_network_url:
+            return NetworkBackend(InMemoryNetworkClient())
+        import redis  # 可选依赖，仅 network 后端需要
+        return NetworkBackend(redis.Redis.from_url(settings.cache_network_url))
+    if backend == "shm":
+        try:
+            return SharedMemoryBackend(settings.cache_dir, settings.cache_max_bytes, settings.cache_counter_slots,
+                                       release_fingerprint())
+        except ImportError:
+            # 非 POSIX 平台没有 fcntl
+            print("⚠️ 当前平台不支持 shm 共享缓存，改用进程内缓存，只能单 worker 运行")
+    elif backend != "local":
+        print(f"⚠️ 未知的缓存后端 {settings.cache_backend}，改用进程内缓存")
+    if int(os.getenv("WEB_CONCURRENCY", "1") or 1) > 1:
+        print("⚠️ 多个 worker 使用进程内缓存：缓存失效、幂等键、令牌吊销和副本写入标记不会在 worker 间同步，"
+              "请设置 CACHE_BACKEND=shm 或 network")
+    return LocalBackend(max_bytes=settings.cache_max_bytes)
+
+
+class SharedCache:
+    """带命名空间版本号的共享缓存"""
+
+    def __init__(self, backend_factory: Callable[[], CacheBackend], default_ttl: int = 300):
+        self._backend = LazyResource("cache_backend", backend_factory)
+        self.default_ttl = default_ttl
+        # 本进程的命中统计，按命名空间前缀聚合（user_stats:1 计入 user_stats）
+        self._stats: Dict[str, list] = defaultdict(lambda: [0, 0])
+
+    def _record(self, namespace: str, hit: bool):
+        self._stats[namespace.split(":", 1)[0]][0 if hit else 1] += 1
+
+    @property
+    def backend(self) -> CacheBackend:
+        return self._backend.get()
+
+    def version(self, namespace: str) -> int:
+        return self.backend.get_counter(f"ns:{namespace}")
+
+    def _key(self, namespace: str, key: str) -> str:
+        return f"{namespace}:{self.version(namespace)}:{key}"
+
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        value = self.backend.get(self._key(namespace, key))
+        self._record(namespace, value is not None)
+        return value
+
+    def set(self, namespace: str, key: str, value: bytes, ttl: Optional[int] = None):
+        self.backend.set(self._key(namespace, key), value, ttl or self.default_ttl)
+
+    def get_or_set(self, namespace: str, key: str, build: Callable[[], bytes],
+                   ttl: Optional[int] = None) -> bytes:
+        """命中则直接返回，否则调用 build 生成并写入"""
+        full_key = self._key(namespace, key)
+        value = self.backend.get(full_key)
+        self._record(namespace, value is not None)
+        if value is None:
+            value = build()
+            self.backend.set(full_key, value, ttl or self.default_ttl)
+        return value
+
+    def invalidate(self, namespace: str) -> int:
+        """版本号加一，所有 worker 上该命名空间的旧条目立即失效"""
+        return self.backend.incr(f"ns:{namespace}")
+
+    def stats(self) -> dict:
+        namespaces = {}
+        for namespace, (hits, misses) in sorted(self._stats.items()):
+            total = hits + misses
+            namespaces[namespace] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / total, 4) if total else None,
+            }
+        return {"backend": type(self.backend).__name__, "namespaces": namespaces}
+
+
+shared_cache = SharedCache(create_cache_backend, default_ttl=settings.cache_default_ttl)
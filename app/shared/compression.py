@@ -0,0 +1,267 @@
+# app/shared/compression.py
+"""
+响应压缩：gzip / brotli 协商、大小阈值、流式压缩，以及可缓存响应体的预压缩缓存
+"""
+import gzip
+import json
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+from fastapi.encoders import jsonable_encoder
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+from starlette.responses import Response
+
+try:  # brotli 为可选依赖，未安装时只协商 gzip
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+# 只压缩文本类内容，音视频和图片本身已经是压缩格式
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "application/x-ndjson",
+)
+
+
+def supported_encodings():
+    """当前进程支持的编码，按优先级排列"""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """根据 Accept-Encoding 选择编码，无可用编码时返回 None"""
+    if not accept_encoding:
+        return None
+
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name] = q
+
+    best, best_q = None, 0.0
+    for encoding in supported_encodings():
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress_body(body: bytes, encoding: str, gzip_level: int = 6, brotli_quality: int = 5) -> bytes:
+    """一次性压缩完整响应体"""
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+
+class _StreamCompressor:
+    """增量压缩器，每个分块都 flush，保证流式响应能及时到达客户端"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.flush()
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+def _is_compressible(headers: Headers) -> bool:
+    if "content-encoding" in headers:
+        return False
+    content_type = headers.get("content-type", "")
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class CompressionMiddleware:
+    """纯 ASGI 压缩中间件，支持普通响应与流式响应"""
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 5):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor: Optional[_StreamCompressor] = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, compressor, passthrough
+
+            if message["type"] == "http.response.start":
+                # 等第一个 body 分块到达后再决定是否压缩
+                start_message = message
+                passthrough = not _is_compressible(Headers(raw=message["headers"]))
+                return
+
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            if passthrough:
+                if start_message is not None:
+                    await send(start_message)
+                    start_message = None
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if start_message is not None:
+                headers = MutableHeaders(raw=start_message["headers"])
+                if not more_body:
+                    # 完整响应：低于阈值直接原样返回
+                    if len(body) >= self.minimum_size:
+                        body = compress_body(body, encoding, self.gzip_level, self.brotli_quality)
+                        headers["Content-Encoding"] = encoding
+                        headers["Content-Length"] = str(len(body))
+                        headers.add_vary_header("Accept-Encoding")
+                    await send(start_message)
+                    start_message = None
+                    await send({"type": "http.response.body", "body": body})
+                    return
+
+                # 流式响应：去掉 Content-Length，逐块压缩
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if "content-length" in headers:
+                    del headers["Content-Length"]
+                compressor = _StreamCompressor(encoding, self.gzip_level, self.brotli_quality)
+                await send(start_message)
+                start_message = None
+
+            if compressor is None:
+                await send(message)
+                return
+
+            chunk = compressor.compress(body) if body else b""
+            if not more_body:
+                chunk += compressor.finish()
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def encode_json(data) -> bytes:
+    """序列化为紧凑的 UTF-8 JSON 字节"""
+    return json.dumps(
+        jsonable_encoder(data), ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class CompressedBodyCache:
+    """
+    可缓存响应体的预压缩缓存
+
+    每个键保存一份原始响应体，各编码的压缩版本在首次请求时生成一次，之后直接复用。
+    """
+
+    def __init__(self, max_entries: int = 512, ttl: int = 60, minimum_size: int = 1024,
+                 gzip_level: int = 6, brotli_quality: int = 5):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _get_entry(self, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry["expires_at"] < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def respond(self, request: Request, key: str, build: Callable[[], bytes],
+                media_type: str = "application/json") -> Response:
+        """返回缓存的响应体，按需生成并缓存对应编码的压缩版本"""
+        encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+
+        with self._lock:
+            entry = self._get_entry(key)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if entry is None:
+            # 构建过程可能访问数据库，不持有锁
+            entry = {"identity": build(), "expires_at": time.monotonic() + self.ttl}
+            with self._lock:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+        body = entry["identity"]
+        headers = {"Vary": "Accept-Encoding"}
+        if encoding is not None and len(body) >= self.minimum_size:
+            compressed = entry.get(encoding)
+            if compressed is None:
+                compressed = compress_body(body, encoding, self.gzip_level, self.brotli_quality)
+                entry[encoding] = compressed
+            body = compressed
+            headers["Content-Encoding"] = encoding
+
+        return Response(content=body, media_type=media_type, headers=headers)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else None,
+        }
+
+    def invalidate(self, prefix: Optional[str] = None):
+        """按前缀失效缓存，不传前缀则清空"""
+        with self._lock:
+            if prefix is None:
+                self._entries.clear()
+                return
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                del self._entries[key]
@@ -0,0 +1,82 @@
+# app/shared/idempotency.py
+"""
+Idempotency-Key 支持
+
+同一个键的第一个请求在共享缓存中抢占一条 "处理中" 记录，完成后替换为结果并保留 ttl 秒。
+重试请求直接返回保存的结果；原请求仍在处理时等待其完成，不重复执行上传和写库。
+处理中的记录带较短的过期时间，处理请求的 worker 崩溃后键会自动释放。
+"""
+import asyncio
+import hashlib
+import json
+import time
+from typing import Optional
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+from app.shared.cache import shared_cache
+from app.shared.compression import encode_json
+
+PENDING = "pending"
+DONE = "done"
+
+
+def request_fingerprint(*parts) -> str:
+    """请求内容摘要，用于识别同一个键被用在了不同的请求上"""
+    return hashlib.sha256(json.dumps(parts, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()
+
+
+class IdempotencyStore:
+
+    def __init__(self, ttl: int = 24 * 3600, pending_ttl: int = 600, wait_timeout: float = 30.0,
+                 poll_interval: float = 0.2):
+        self.ttl = ttl
+        self.pending_ttl = pending_ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+
+    def _key(self, scope: str, key: str) -> str:
+        return f"idempotency:{scope}:{hashlib.sha256(key.encode('utf-8')).hexdigest()}"
+
+    def _load(self, scope: str, key: str) -> Optional[dict]:
+        value = shared_cache.backend.get(self._key(scope, key))
+        return json.loads(value) if value is not None else None
+
+    async def begin(self, scope: str, key: str, fingerprint: str) -> Optional[JSONResponse]:
+        """
+        抢占键：返回 None 表示由当前请求处理，处理结束后必须调用 complete 或 release；
+        否则返回原请求保存的响应
+        """
+        record = {"state": PENDING, "fingerprint": fingerprint}
+        if shared_cache.backend.add(self._key(scope, key), encode_json(record), self.pending_ttl):
+            return None
+
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            existing = self._load(scope, key)
+            if existing is None:
+                # 原请求失败释放了键，由当前请求接手
+                if shared_cache.backend.add(self._key(scope, key), encode_json(record), self.pending_ttl):
+                    return None
+                # 其他请求抢先接手了键，和等待处理中的请求一样按间隔重试，不在事件循环上空转
+            else:
+                if existing["fingerprint"] != fingerprint:
+                    raise HTTPException(status_code=422, detail="Idempotency-Key 已用于内容不同的请求")
+                if existing["state"] == DONE:
+                    return JSONResponse(
+                        status_code=existing["status_code"], content=existing["body"],
+                        headers={"Idempotent-Replayed": "true"}
+                    )
+            if time.monotonic() >= deadline:
+                raise HTTPException(status_code=409, detail="相同 Idempotency-Key 的请求仍在处理中，请稍后重试",
+                                    headers={"Retry-After": "5"})
+            await asyncio.sleep(self.poll_interval)
+
+    def complete(self, scope: str, key: str, fingerprint: str, status_code: int, body):
+        record = {"state": DONE, "fingerprint": fingerprint, "status_code": status_code, "body": body}
+        shared_cache.backend.set(self._key(scope, key), encode_json(record), self.ttl)
+
+    def release(self, scope: str, key: str):
+        """处理失败时释放键，允许客户端重试"""
+        shared_cache.backend.delete(self._key(scope, key))
@@ -0,0 +1,298 @@
+# app/shared/profiling.py
+"""
+按请求性能分析
+
+只对携带正确 X-Profile-Token 头或按采样率抽中的请求启用：后台线程按固定间隔采样调用栈，
+SQLAlchemy 游标事件按语句累计执行次数和耗时，请求结束后把报告写入有上限的磁盘环形目录。
+报告包含热点函数、SQL 汇总和折叠栈（flamegraph.pl / speedscope 可直接打开）。
+
+未启用时既不注册中间件也不注册 SQL 事件，请求路径上没有任何额外开销。
+
+采样线程采集事件循环线程，以及执行过本请求 SQL 或正在执行本请求端点函数的线程池线程；
+同一时刻的并发请求也可能出现在事件循环线程的栈里。
+"""
+import hmac
+import json
+import os
+import random
+import re
+import secrets
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+
+from app.config import settings
+
+PROFILE_HEADER = "x-profile-token"
+PROFILE_ID_HEADER = "X-Profile-Id"
+# 查看报告的接口本身不做分析，避免查看时把要看的报告轮转掉
+PROFILE_API_PREFIX = "/api/profiles"
+
+# 报告 id：毫秒时间戳 + 随机后缀，按文件名排序即按时间排序
+_PROFILE_ID = re.compile(r"^\d{17}-[0-9a-f]{6}$")
+
+# 报告中保留的热点函数和 SQL 条数，单条 SQL 截断长度
+TOP_FRAMES = 40
+TOP_STATEMENTS = 40
+MAX_STATEMENT_CHARS = 2000
+
+# 列表接口返回的摘要字段
+SUMMARY_FIELDS = ("id", "method", "path", "status", "created_at", "duration_ms", "samples")
+
+_active_profile: ContextVar[Optional["RequestProfile"]] = ContextVar("active_profile", default=None)
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _frame_label(code) -> str:
+    filename = code.co_filename
+    if filename.startswith(_ROOT):
+        filename = os.path.relpath(filename, _ROOT)
+    else:
+        filename = "/".join(filename.replace("\\", "/").split("/")[-2:])
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class RequestProfile:
+    """一次请求的采样数据：折叠栈计数和按语句聚合的 SQL 耗时"""
+
+    def __init__(self, profile_id: str, scope, loop_thread: int, interval: float):
+        self.id = profile_id
+        self.scope = scope
+        self.interval = interval
+        self.threads = {loop_thread}
+        self.stacks: Counter = Counter()
+        self.sql: Dict[str, list] = defaultdict(lambda: [0, 0.0])
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"profiler-{profile_id}", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self.elapsed = time.perf_counter() - self.started
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            endpoint = getattr(self.scope.get("endpoint"), "__code__", None)
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == me:
+                    continue
+                codes = []
+                while frame is not None:
+                    codes.append(frame.f_code)
+                    frame = frame.f_back
+                if thread_id not in self.threads:
+                    if endpoint is None or endpoint not in codes:
+                        continue
+                    self.threads.add(thread_id)
+                self.stacks[";".join(_frame_label(code) for code in reversed(codes))] += 1
+
+    def add_sql(self, statement: str, seconds: float):
+        entry = self.sql[statement]
+        entry[0] += 1
+        entry[1] += seconds
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def report(self, status: Optional[int]) -> dict:
+        samples = sum(self.stacks.values())
+        own: Counter = Counter()
+        total: Counter = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            own[frames[-1]] += count
+            for frame in set(frames):
+                total[frame] += count
+
+        def share(count: int) -> float:
+            return round(count / samples * 100, 2) if samples else 0.0
+
+        sql_seconds = sum(seconds for _, seconds in self.sql.values())
+        statements = sorted(self.sql.items(), key=lambda item: item[1][1], reverse=True)
+        return {
+            "id": self.id,
+            "method": self.scope["method"],
+            "path": self.scope["path"],
+            "query_string": self.scope.get("query_string", b"").decode("latin-1"),
+            "status": status,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "duration_ms": round(self.elapsed * 1000, 2),
+            "sample_interval_ms": round(self.interval * 1000, 3),
+            "samples": samples,
+            "sql": {
+                "statements": sum(count for count, _ in self.sql.values()),
+                "total_ms": round(sql_seconds * 1000, 2),
+                "top": [
+                    {"statement": statement[:MAX_STATEMENT_CHARS], "count": count,
+                     "total_ms": round(seconds * 1000, 2)}
+                    for statement, (count, seconds) in statements[:TOP_STATEMENTS]
+                ],
+            },
+            # 按采样占比统计：self 为栈顶函数，total 为出现在栈中的函数
+            "frames": [
+                {"frame": frame, "total_pct": share(count), "self_pct": share(own[frame])}
+                for frame, count in total.most_common(TOP_FRAMES)
+            ],
+        }
+
+
+class ProfileStore:
+    """磁盘上的报告环形目录：每份报告一个 .json 和一个 .folded 文件，超过上限删除最旧的"""
+
+    def __init__(self, directory: str, max_reports: int = 50):
+        self.directory = directory
+        self.max_reports = max_reports
+
+    def _path(self, profile_id: str, extension: str) -> str:
+        return os.path.join(self.directory, f"{profile_id}.{extension}")
+
+    def _write(self, path: str, data: bytes):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def save(self, report: dict, folded: str):
+        os.makedirs(self.directory, exist_ok=True)
+        self._write(self._path(report["id"], "folded"), folded.encode("utf-8"))
+        # .json 最后写入，列表只认 .json，不会列出写了一半的报告
+        self._write(self._path(report["id"], "json"), json.dumps(report, ensure_ascii=False).encode("utf-8"))
+        self._prune()
+
+    def _ids(self) -> List[str]:
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted(name[:-5] for name in names if name.endswith(".json") and _PROFILE_ID.match(name[:-5]))
+
+    def _prune(self):
+        ids = self._ids()
+        for profile_id in ids[:max(len(ids) - self.max_reports, 0)]:
+            for extension in ("json", "folded"):
+                try:
+                    os.remove(self._path(profile_id, extension))
+                except FileNotFoundError:
+                    pass  # 其他 worker 已经删除
+
+    def list(self) -> List[dict]:
+        """最新的在前，只返回摘要字段"""
+        summaries = []
+        for profile_id in reversed(self._ids()):
+            try:
+                with open(self._path(profile_id, "json"), encoding="utf-8") as f:
+                    report = json.load(f)
+            except (FileNotFoundError, ValueError):
+                continue
+            summary = {key: report.get(key) for key in SUMMARY_FIELDS}
+            summary["sql_ms"] = report.get("sql", {}).get("total_ms")
+            summaries.append(summary)
+        return summaries
+
+    def path(self, profile_id: str, extension: str) -> Optional[str]:
+        if not _PROFILE_ID.match(profile_id):
+            return None
+        path = self._path(profile_id, extension)
+        return path if os.path.exists(path) else None
+
+
+def new_profile_id() -> str:
+    return f"{datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S%f')[:17]}-{secrets.token_hex(3)}"
+
+
+def check_profile_token(token: Optional[str]) -> bool:
+    return bool(settings.profiling_token and token
+                and hmac.compare_digest(token.encode("utf-8"), settings.profiling_token.encode("utf-8")))
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _active_profile.get()
+    if profile is not None:
+        profile.threads.add(threading.get_ident())
+        conn.info.setdefault("profile_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _active_profile.get()
+    if profile is not None and conn.info.get("profile_started"):
+        profile.add_sql(statement, time.perf_counter() - conn.info["profile_started"].pop())
+
+
+def install_sql_hooks():
+    """在 Engine 类上注册，主库和只读副本的语句都计入当前请求的报告"""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class ProfilingMiddleware:
+    """纯 ASGI 中间件：命中令牌或采样时分析该请求，响应头带 X-Profile-Id"""
+
+    def __init__(self, app, store: ProfileStore, sample_rate: float = 0.0, interval: float = 0.005):
+        self.app = app
+        self.store = store
+        self.sample_rate = sample_rate
+        self.interval = interval
+
+    def _should_profile(self, scope) -> bool:
+        token = Headers(scope=scope).get(PROFILE_HEADER)
+        if token is not None:
+            return check_profile_token(token)
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or scope["path"].startswith(PROFILE_API_PREFIX)
+                or not self._should_profile(scope)):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(new_profile_id(), scope, threading.get_ident(), self.interval)
+        status = None
+
+        async def send_with_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (PROFILE_ID_HEADER.lower().encode("latin-1"), profile.id.encode("latin-1"))
+                ]
+            await send(message)
+
+        # 线程池会复制上下文，端点和依赖在工作线程中也能拿到当前报告
+        context_token = _active_profile.set(profile)
+        profile.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profile.stop()
+            _active_profile.reset(context_token)
+            try:
+                await run_in_threadpool(self.store.save, profile.report(status), profile.folded())
+                print(f"🔬 已保存性能分析报告 {profile.id}: {scope['method']} {scope['path']} "
+                      f"{profile.elapsed * 1000:.1f}ms")
+            except OSError as e:
+                print(f"⚠️ 保存性能分析报告失败: {e}")
+
+
+profile_store = ProfileStore(
+    settings.profiling_dir
+    or os.path.join(os.path.dirname(os.path.abspath(settings.index_dir)), "profiles"),
+    settings.profiling_max_reports,
+)
@@ -0,0 +1,269 @@
+# app/shared/startup.py
+"""
+启动流程：分阶段计时、重型子系统的延迟初始化、共用连接池的并发就绪检查，
+报告就绪前的索引初始化（最新更新缓冲区、搜索索引、难度分布、术语表、相似度矩阵，不受预热开关影响），
+以及可选的预热（连接池、常用查询编译缓存、热门数据缓存）
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Generic, Optional, TypeVar
+
+from sqlalchemy import inspect, text
+
+T = TypeVar("T")
+
+REQUIRED_TABLES = (
+    "practice_materials", "study_records", "daily_sentences", "study_activity", "study_activity_daily",
+    "users", "material_media", "transcript_segments",
+)
+
+
+class StartupReport:
+    """记录启动各阶段耗时（毫秒），供 /health/startup 查询"""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.ready_at: Optional[float] = None
+        self.phases: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float):
+        with self._lock:
+            self.phases[name] = round(seconds * 1000, 2)
+
+    @contextmanager
+    def phase(self, name: str):
+        """计时上下文：with startup_report.phase("xxx"): ..."""
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - begin)
+
+    def mark_ready(self):
+        self.ready_at = time.perf_counter()
+
+    def as_dict(self) -> dict:
+        total = None
+        if self.ready_at is not None:
+            total = round((self.ready_at - self.started_at) * 1000, 2)
+        with self._lock:
+            phases = dict(self.phases)
+        return {"phases_ms": phases, "total_ms": total, "ready": self.ready_at is not None}
+
+
+startup_report = StartupReport()
+
+
+class LazyResource(Generic[T]):
+    """首次使用时才初始化的资源，初始化耗时记入启动报告"""
+
+    def __init__(self, name: str, factory: Callable[[], T]):
+        self.name = name
+        self._factory = factory
+        self._value: Optional[T] = None
+        self._ready = False
+        self._lock = threading.Lock()
+
+    def get(self) -> T:
+        if self._ready:
+            return self._value
+        with self._lock:
+            if not self._ready:
+                with startup_report.phase(f"lazy:{self.name}"):
+                    self._value = self._factory()
+                self._ready = True
+        return self._value
+
+    @property
+    def initialized(self) -> bool:
+        return self._ready
+
+
+def _timed(check: Callable[[], None]) -> dict:
+    begin = time.perf_counter()
+    try:
+        check()
+        result = {"ok": True}
+    except Exception as e:
+        result = {"ok": False, "error": str(e)}
+    result["ms"] = round((time.perf_counter() - begin) * 1000, 2)
+    return result
+
+
+def _check_connection(engine):
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+
+def _check_tables(engine):
+    # 一次查询拿到全部表名，不再逐表 SHOW TABLES
+    existing = set(inspect(engine).get_table_names())
+    missing = [table for table in REQUIRED_TABLES if table not in existing]
+    if missing:
+        raise RuntimeError(f"缺少数据库表: {', '.join(missing)}")
+
+
+def run_readiness_checks(engine=None, timeout: float = 5.0) -> Dict[str, dict]:
+    """并发执行就绪检查，所有检查共用同一个连接池"""
+    if engine is None:
+        from app.database import engine
+
+    checks = {
+        "database": lambda: _check_connection(engine),
+        "tables": lambda: _check_tables(engine),
+    }
+
+    results: Dict[str, dict] = {}
+    executor = ThreadPoolExecutor(max_workers=len(checks), thread_name_prefix="readiness")
+    try:
+        futures = {name: executor.submit(_timed, check) for name, check in checks.items()}
+        deadline = time.monotonic() + timeout
+        for name, future in futures.items():
+            try:
+                results[name] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except Exception:
+                results[name] = {"ok": False, "error": f"检查超时（{timeout}秒）", "ms": timeout * 1000}
+    finally:
+        # 超时的检查不阻塞调用方
+        executor.shutdown(wait=False)
+    return results
+
+
+def _prewarm_pool(engine, connections: int):
+    """并发签出若干连接再全部归还，池中留下已建立好的空闲连接"""
+    size = engine.pool.size() if callable(getattr(engine.pool, "size", None)) else 1
+    count = max(1, min(connections, size))
+    with ThreadPoolExecutor(max_workers=count, thread_name_prefix="warmup-pool") as executor:
+        opened = list(executor.map(lambda _: engine.connect(), range(count)))
+    for connection in opened:
+        connection.execute(text("SELECT 1"))
+        connection.close()
+
+
+def _warm_pools(connections: int):
+    from app.database import engine, replica_router
+    _prewarm_pool(engine, connections)
+    for replica in replica_router.replicas:
+        try:
+            _prewarm_pool(replica.engine, connections)
+        except Exception as e:
+            print(f"⚠️ 只读副本连接预热失败: {replica.display_url} - {e}")
+
+
+def _compile_queries(db):
+    """每种主要查询形状执行一次，填充 SQLAlchemy 的语句编译缓存；取值不影响缓存键"""
+    from app.core.materials.router import SORT_ORDERS, compute_facets, load_material_page
+    from app.core.materials.schemas import MaterialFilter
+    from app.core.study_records.models import StudyRecord
+    from app.core.study_records.router import study_records_query
+
+    sentinel = "__warmup__"
+    shapes = [
+        MaterialFilter(),
+        MaterialFilter(theme=sentinel),
+        MaterialFilter(type=sentinel),
+        MaterialFilter(practice_type=sentinel),
+        MaterialFilter(practice_type=sentinel, language=sentinel),
+        MaterialFilter(practice_type=sentinel, difficulty_min=0, difficulty_max=0),
+        MaterialFilter(language=sentinel, difficulty_min=0),
+        MaterialFilter(format=sentinel),
+    ]
+    for filters in shapes:
+        load_material_page(db, filters, 0, 1)
+    for sort in SORT_ORDERS:
+        load_material_page(db, MaterialFilter(), 0, 1, sort)
+    compute_facets(db, MaterialFilter())
+    db.query(StudyRecord).filter(StudyRecord.user_id == 0, StudyRecord.material_id == 0).first()
+    study_records_query(db, 0).order_by(StudyRecord.last_studied_at.desc()).first()
+
+
+def _preload_popular(db, count: int):
+    """按学习人数预加载热门材料详情（不足时用最新材料补齐），以及默认的列表首页"""
+    from sqlalchemy import func
+    from fastapi import HTTPException
+    from app.core.materials.models import PracticeMaterial
+    from app.core.materials.router import cached_material_detail, cached_material_page
+    from app.core.materials.schemas import MaterialFilter
+    from app.core.study_records.models import StudyRecord
+
+    learners = func.count(StudyRecord.id)
+    ids = [
+        material_id for material_id, _ in db.query(StudyRecord.material_id, learners)
+        .group_by(StudyRecord.material_id).order_by(learners.desc()).limit(count).all()
+    ]
+    if len(ids) < count:
+        ids += [
+            material_id for (material_id,) in db.query(PracticeMaterial.id)
+            .filter(PracticeMaterial.is_active == True, PracticeMaterial.id.notin_(ids or [0]))
+            .order_by(PracticeMaterial.id.desc()).limit(count - len(ids)).all()
+        ]
+
+    for material_id in ids:
+        try:
+            cached_material_detail(db, material_id)
+        except HTTPException:
+            pass  # 已下架
+    cached_material_page(db, MaterialFilter())
+
+
+def _preload_daily_sentence(db):
+    from datetime import datetime
+    from app.core.daily_sentence.router import cached_daily_sentence
+    cached_daily_sentence(db, datetime.now().date())
+
+
+def seed_indexes() -> Dict[str, dict]:
+    """加载材料事件维护的进程内索引并计时；未加载的索引会忽略本进程新增的材料，所以总是执行"""
+    from app.core.glossary.index import glossary_index
+    from app.core.materials.difficulty import difficulty_stats
+    from app.core.materials.feed import recent_feed
+    from app.core.search.bm25 import search_index
+    from app.core.similarity.engine import similarity_engine
+    from app.database import SessionLocal
+
+    results: Dict[str, dict] = {}
+    db = SessionLocal()
+    try:
+        steps = {
+            "recent_feed": lambda: recent_feed.ensure_fresh(db),
+            "search_index": lambda: search_index.ensure_fresh(db),
+            "difficulty_stats": lambda: difficulty_stats.ensure_fresh(db),
+            "glossary_index": lambda: glossary_index.ensure_fresh(db),
+            "similarity_engine": lambda: similarity_engine.prepare(db),
+        }
+        for name, step in steps.items():
+            with startup_report.phase(f"indexes:{name}"):
+                results[name] = _timed(step)
+            if not results[name]["ok"]:
+                db.rollback()
+    finally:
+        db.close()
+    return results
+
+
+def run_warmup(pool_connections: int = 5, popular_materials: int = 20) -> Dict[str, dict]:
+    """依次执行预热步骤并计时；单个步骤失败只记录，不影响其他步骤和启动"""
+    from app.database import SessionLocal
+
+    results: Dict[str, dict] = {}
+    with startup_report.phase("warmup:pool"):
+        results["pool"] = _timed(lambda: _warm_pools(pool_connections))
+
+    db = SessionLocal()
+    try:
+        steps = {
+            "compile_queries": lambda: _compile_queries(db),
+            "popular_materials": lambda: _preload_popular(db, popular_materials),
+            "daily_sentence": lambda: _preload_daily_sentence(db),
+        }
+        for name, step in steps.items():
+            with startup_report.phase(f"warmup:{name}"):
+                results[name] = _timed(step)
+            if not results[name]["ok"]:
+                db.rollback()
+    finally:
+        db.close()
+    return results
@@ -0,0 +1,34 @@
+# app/shared/text.py
+"""
+中英文混合分词
+
+英文按单词切分并去掉常见停用词；中文不依赖分词词典，连续汉字切成二元组（单字保留为一元），
+对口译材料这种中英混排文本足够稳定，也便于相似度和检索共用同一套词项。
+"""
+import re
+from typing import List
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?|[\u3400-\u9fff\uf900-\ufaff]+")
+_CJK = re.compile(r"[\u3400-\u9fff\uf900-\ufaff]")
+
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have he her his i in is it its of on or our she
+that the their them they this to was we were will with you your not no so if do does did
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """把文本切成检索词项"""
+    tokens: List[str] = []
+    if not text:
+        return tokens
+    for match in _TOKEN.finditer(text.casefold()):
+        word = match.group()
+        if _CJK.match(word):
+            if len(word) == 1:
+                tokens.append(word)
+            else:
+                tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        elif len(word) > 1 and word not in STOPWORDS:
+            tokens.append(word)
+    return tokens
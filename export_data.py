@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+口译学习平台数据导出脚本
+
+流式导出材料或学习记录为 NDJSON / CSV / Parquet，内存占用与表大小无关。
+
+用法：
+    python export_data.py materials -f parquet -o materials.parquet
+    python export_data.py study_records -f csv --start 2024-01-01 --end 2024-06-30 -o records.csv
+"""
+
+import argparse
+import os
+import sys
+from datetime import date
+from loguru import logger
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+try:
+    from app.database import SessionLocal
+    from app.core.export.exporter import EXPORT_TABLES, FORMATS, stream_export
+except ImportError as e:
+    logger.error(f"无法导入应用模块，请检查路径: {e}")
+    sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="流式导出口译学习平台数据")
+    parser.add_argument("table", choices=list(EXPORT_TABLES))
+    parser.add_argument("-f", "--format", choices=list(FORMATS), default="ndjson")
+    parser.add_argument("--start", type=date.fromisoformat, help="开始日期(YYYY-MM-DD)")
+    parser.add_argument("--end", type=date.fromisoformat, help="结束日期(YYYY-MM-DD)，包含当天")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("-o", "--output", help="输出文件，默认 <table>.<format>")
+    args = parser.parse_args()
+
+    output = args.output or f"{args.table}.{args.format}"
+    db = SessionLocal()
+    written = 0
+    try:
+        chunks = stream_export(db, args.table, args.format, args.start, args.end, args.batch_size)
+        with open(output, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+                written += len(chunk)
+    except ValueError as e:
+        logger.error(str(e))
+        sys.exit(1)
+    finally:
+        db.close()
+
+    logger.info(f"✅ 已导出 {args.table} 到 {output}（{written / 1024:.1f} KB）")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,7 @@
 
 import os
 import sys
+from datetime import date
 from loguru import logger
 from sqlalchemy import create_engine, text
 from sqlalchemy.exc import SQLAlchemyError
@@ -34,6 +35,18 @@ def check_database_connection():
         logger.error(f"数据库连接失败: {e}")
         return False
 
+def activity_partitions_sql(months=24):
+    """学习活动表的按月分区：从本月开始建 months 个分区，再加一个兜底分区"""
+    today = date.today()
+    year, month = today.year, today.month
+    partitions = []
+    for _ in range(months):
+        name = f"p{year}{month:02d}"
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        partitions.append(f"PARTITION {name} VALUES LESS THAN (TO_DAYS('{year}-{month:02d}-01'))")
+    partitions.append("PARTITION p_future VALUES LESS THAN MAXVALUE")
+    return "PARTITION BY RANGE (TO_DAYS(occurred_at)) (\n                " + ",\n                ".join(partitions) + "\n            )"
+
 def create_interpreting_tables():
     """创建口译学习相关的表"""
     try:
@@ -74,7 +87,29 @@ def create_interpreting_tables():
                 INDEX idx_type (type),
                 INDEX idx_language (language),
                 INDEX idx_format (format),
-                INDEX idx_difficulty (difficulty)
+                INDEX idx_difficulty (difficulty),
+                -- 复合/覆盖索引，与 migrate_mysql_indexes.py 保持一致
+                INDEX idx_active_created (is_active, created_at),
+                INDEX idx_active_practice_lang_diff (is_active, practice_type, language, difficulty),
+                INDEX idx_active_theme_diff (is_active, theme, difficulty),
+                INDEX idx_active_type_diff (is_active, type, difficulty),
+                INDEX idx_active_language_diff (is_active, language, difficulty),
+                INDEX idx_active_format (is_active, format),
+                INDEX idx_active_difficulty (is_active, difficulty),
+                INDEX idx_active_date (is_active, date),
+                INDEX idx_active_duration (is_active, duration)
+            );
+
+            -- 用户表
+            CREATE TABLE IF NOT EXISTS users (
+                id BIGINT PRIMARY KEY AUTO_INCREMENT,
+                username VARCHAR(50) NOT NULL,
+                password_hash VARCHAR(200) NOT NULL,
+                display_name VARCHAR(100),
+                is_active BOOLEAN DEFAULT TRUE,
+                token_version INT NOT NULL DEFAULT 0 COMMENT '递增后旧令牌全部失效',
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE KEY unique_username (username)
             );
 
             -- 学习记录表
@@ -89,7 +124,53 @@ def create_interpreting_tables():
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 UNIQUE KEY unique_user_material (user_id, material_id),
                 INDEX idx_user_id (user_id),
-                INDEX idx_last_studied (last_studied_at)
+                INDEX idx_last_studied (last_studied_at),
+                INDEX idx_user_history (user_id, last_studied_at, material_id, progress, study_duration_seconds)
+            );
+
+            -- 原文/译文对齐分段表
+            CREATE TABLE IF NOT EXISTS transcript_segments (
+                id BIGINT PRIMARY KEY AUTO_INCREMENT,
+                material_id BIGINT NOT NULL,
+                seq INT NOT NULL,
+                source_text TEXT NOT NULL,
+                target_text TEXT NOT NULL,
+                source_offset INT NOT NULL,
+                source_length INT NOT NULL,
+                target_offset INT NOT NULL,
+                target_length INT NOT NULL,
+                UNIQUE KEY unique_material_seq (material_id, seq)
+            );
+
+            -- 上传时解析的媒体信息和波形峰值
+            CREATE TABLE IF NOT EXISTS material_media (
+                material_id BIGINT PRIMARY KEY,
+                duration_seconds DOUBLE NOT NULL,
+                sample_rate INT,
+                channels INT,
+                peaks JSON,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+
+            -- 学习活动日志（只追加），按月分区，分区由 activity_partitions_sql() 生成
+            CREATE TABLE IF NOT EXISTS study_activity (
+                id BIGINT NOT NULL AUTO_INCREMENT,
+                user_id BIGINT NOT NULL,
+                material_id BIGINT NOT NULL,
+                occurred_at DATETIME NOT NULL,
+                seconds INT NOT NULL DEFAULT 0,
+                PRIMARY KEY (id, occurred_at),
+                INDEX idx_user_occurred (user_id, occurred_at)
+            )
+            {activity_partitions};
+
+            -- 学习活动按天预聚合
+            CREATE TABLE IF NOT EXISTS study_activity_daily (
+                user_id BIGINT NOT NULL,
+                day DATE NOT NULL,
+                seconds INT NOT NULL DEFAULT 0,
+                sessions INT NOT NULL DEFAULT 0,
+                PRIMARY KEY (user_id, day)
             );
 
             -- 每日一句表
@@ -102,9 +183,10 @@ def create_interpreting_tables():
                 is_active BOOLEAN DEFAULT TRUE,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 UNIQUE KEY unique_date (sentence_date),
-                INDEX idx_date (sentence_date)
+                INDEX idx_date (sentence_date),
+                INDEX idx_active_date (is_active, sentence_date)
             );
-            """
+            """.replace("{activity_partitions}", activity_partitions_sql())
 
             for statement in create_tables_sql.split(';'):
                 if statement.strip():
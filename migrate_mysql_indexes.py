@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+口译学习平台MySQL索引迁移脚本
+
+为路由中实际使用的筛选/排序组合补建复合索引和覆盖索引，可重复执行（已存在的索引会跳过）。
+
+用法：
+    python migrate_mysql_indexes.py            # 补建缺失的索引
+    python migrate_mysql_indexes.py --dry-run  # 只打印将要执行的 DDL
+    python migrate_mysql_indexes.py --check    # 对各路由查询执行 EXPLAIN，出现全表扫描或非覆盖的全索引扫描时以非零状态退出
+"""
+
+import argparse
+import os
+import sys
+from datetime import date
+from loguru import logger
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# 导入配置
+try:
+    from app.config import settings
+except ImportError:
+    logger.error("无法导入 app.config.settings，请检查路径")
+    sys.exit(1)
+
+# (表名, 索引名, 列)；每个查询都带 is_active = 1，因此材料表的复合索引都以 is_active 开头
+INDEXES = [
+    # 最新更新：WHERE is_active AND created_at >= ? ORDER BY created_at DESC
+    ("practice_materials", "idx_active_created", ("is_active", "created_at")),
+    # 练习类型 + 语言 + 难度区间，以及随机取某练习类型的材料
+    ("practice_materials", "idx_active_practice_lang_diff", ("is_active", "practice_type", "language", "difficulty")),
+    ("practice_materials", "idx_active_theme_diff", ("is_active", "theme", "difficulty")),
+    ("practice_materials", "idx_active_type_diff", ("is_active", "type", "difficulty")),
+    ("practice_materials", "idx_active_language_diff", ("is_active", "language", "difficulty")),
+    ("practice_materials", "idx_active_format", ("is_active", "format")),
+    ("practice_materials", "idx_active_difficulty", ("is_active", "difficulty")),
+    ("practice_materials", "idx_active_date", ("is_active", "date")),
+    # 覆盖索引：时长筛选只读取 id 和 duration，不回表
+    ("practice_materials", "idx_active_duration", ("is_active", "duration")),
+    # 覆盖索引：学习记录列表和推荐用的学习历史按最近学习时间排序
+    ("study_records", "idx_user_history",
+     ("user_id", "last_studied_at", "material_id", "progress", "study_duration_seconds")),
+    # 今日没有句子时回退到最近一条
+    ("daily_sentences", "idx_active_date", ("is_active", "sentence_date")),
+]
+
+
+# 本身就要读取全部有效材料的查询：只记录计划，不算失败
+EXPECTED_SCANS = {
+    # skills 是 JSON 数组，只能逐行读出后在内存中计数；结果按目录版本缓存
+    "materials:facets_skills": "JSON 列逐行计数",
+    # 标题/原文的 ILIKE 带前导通配符，B-tree 索引无法使用；结果按目录版本缓存，排序由 BM25 负责
+    "materials:search_ids": "ILIKE 前导通配符",
+}
+
+
+def existing_indexes(conn):
+    """读取当前库中已有的索引名"""
+    rows = conn.execute(text(
+        "SELECT DISTINCT table_name, index_name FROM information_schema.statistics "
+        "WHERE table_schema = DATABASE()"
+    )).all()
+    return {(table.lower(), index) for table, index in rows}
+
+
+def apply_indexes(engine, dry_run=False):
+    """补建缺失的索引，返回新建数量"""
+    created = 0
+    with engine.connect() as conn:
+        existing = existing_indexes(conn)
+        for table, name, columns in INDEXES:
+            if (table, name) in existing:
+                logger.info(f"跳过已存在的索引 {table}.{name}")
+                continue
+            ddl = f"ALTER TABLE {table} ADD INDEX {name} ({', '.join(columns)})"
+            if dry_run:
+                logger.info(f"[dry-run] {ddl}")
+                continue
+            logger.info(ddl)
+            conn.execute(text(ddl))
+            conn.commit()
+            created += 1
+    return created
+
+
+def query_shapes(db):
+    """各路由实际发出的查询形状，全部由路由自己的查询构建函数生成，不手写副本"""
+    from app.core.daily_sentence.router import latest_sentence_query, today_sentence_query
+    from app.core.materials.feed import recent_feed
+    from app.core.materials.models import PracticeMaterial
+    from app.core.materials.router import (
+        apply_material_filters, facet_count_query, facet_skills_query, material_id_query, random_material_query,
+        recent_updates_query,
+    )
+    from app.core.materials.schemas import MaterialFilter
+    from app.core.recommendations.engine import study_history_query
+    from app.core.study_records.models import StudyRecord
+    from app.core.study_records.router import study_records_query
+
+    def materials(**filters):
+        return apply_material_filters(db, MaterialFilter(**filters)).limit(100)
+
+    return {
+        "materials:theme": materials(theme="环境"),
+        "materials:type": materials(type="演讲"),
+        "materials:practice_type+language": materials(practice_type="篇章", language="en"),
+        "materials:practice_type+difficulty": materials(practice_type="篇章", difficulty_min=2, difficulty_max=4),
+        "materials:language+difficulty": materials(language="en", difficulty_min=2),
+        "materials:format": materials(format="audio"),
+        "materials:difficulty": materials(difficulty_min=4),
+        "materials:date": materials(date_start="2024-01-01", date_end="2024-12-31"),
+        # 时长筛选先在基础查询上只取 id 和 duration 两列扫描
+        "materials:duration_scan": apply_material_filters(db, MaterialFilter()).with_entities(
+            PracticeMaterial.id, PracticeMaterial.duration
+        ),
+        # /facets：单值字段的 UNION ALL 分组计数和技能列扫描，带筛选时同样基于筛选后的查询
+        "materials:facets": facet_count_query(apply_material_filters(db, MaterialFilter())),
+        "materials:facets_filtered": facet_count_query(
+            apply_material_filters(db, MaterialFilter(practice_type="篇章", language="en"))
+        ),
+        "materials:facets_skills": facet_skills_query(apply_material_filters(db, MaterialFilter())),
+        # 带搜索词的列表先取全部匹配 id 再按 BM25 排序
+        "materials:search_ids": material_id_query(apply_material_filters(db, MaterialFilter(search="climate"))),
+        "materials:recent_updates": recent_updates_query(db, recent_feed.days).limit(20),
+        "materials:recent_updates_cursor": recent_updates_query(db, recent_feed.days, before_id=1000).limit(20),
+        "materials:random_practice_type": random_material_query(db, "篇章").limit(1),
+        "study_records:list": study_records_query(db, 1).order_by(StudyRecord.last_studied_at.desc()),
+        "recommendations:history": study_history_query(db, 1),
+        "daily_sentence:today": today_sentence_query(db, date.today()).limit(1),
+        "daily_sentence:latest": latest_sentence_query(db).limit(1),
+    }
+
+
+def plan_problem(row) -> str:
+    """EXPLAIN 行的问题：全表扫描，或没有用覆盖索引的全索引扫描（复合索引列序不对时常见）；没有问题时返回空串"""
+    if (row["table"] or "").startswith("<"):
+        # <derivedN>、<unionM,N> 是子查询和 UNION 的临时结果，不是基表
+        return ""
+    if row["type"] == "ALL":
+        return "全表扫描"
+    extra = [part.strip() for part in (row.get("Extra") or "").split(";")]
+    if row["type"] == "index" and "Using index" not in extra:
+        return "全索引扫描（非覆盖）"
+    return ""
+
+
+def check_query_plans(engine, min_rows=1000):
+    """对每个查询形状执行 EXPLAIN，返回出现全表扫描或非覆盖全索引扫描的查询名"""
+    with engine.connect() as conn:
+        table_rows = {
+            table.lower(): rows or 0
+            for table, rows in conn.execute(text(
+                "SELECT table_name, table_rows FROM information_schema.tables WHERE table_schema = DATABASE()"
+            )).all()
+        }
+
+        failures = []
+        db = Session(bind=engine)
+        try:
+            for name, query in query_shapes(db).items():
+                sql = query.statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True})
+                for row in conn.execute(text(f"EXPLAIN {sql}")).mappings():
+                    table = (row["table"] or "").lower()
+                    detail = f"type={row['type']} key={row['key']} rows={row['rows']} extra={row.get('Extra')}"
+                    problem = plan_problem(row)
+                    if not problem:
+                        logger.info(f"✅ {name} [{table}] {detail}")
+                    elif name in EXPECTED_SCANS:
+                        logger.warning(f"⚠️ {name} [{table}] {detail} {problem}（{EXPECTED_SCANS[name]}，预期如此）")
+                    elif table_rows.get(table, 0) < min_rows:
+                        # 数据量很小时优化器本来就倾向全表扫描，不算失败
+                        logger.warning(f"⚠️ {name} [{table}] {detail} {problem}（表行数少于 {min_rows}，忽略）")
+                    else:
+                        logger.error(f"❌ {name} [{table}] {detail} {problem}")
+                        if name not in failures:
+                            failures.append(name)
+        finally:
+            db.close()
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="补建复合/覆盖索引并检查查询计划")
+    parser.add_argument("--dry-run", action="store_true", help="只打印 DDL，不执行")
+    parser.add_argument("--check", action="store_true", help="执行 EXPLAIN 检查，出现全表扫描时失败")
+    parser.add_argument("--min-rows", type=int, default=1000, help="表行数低于该值时不把全表扫描视为失败")
+    args = parser.parse_args()
+
+    try:
+        engine = create_engine(settings.database_url)
+        if args.check:
+            failures = check_query_plans(engine, args.min_rows)
+            if failures:
+                logger.error(f"以下查询出现全表扫描或非覆盖的全索引扫描: {', '.join(failures)}")
+                sys.exit(1)
+            logger.info("✅ 所有查询均使用了索引")
+            return
+
+        created = apply_indexes(engine, dry_run=args.dry_run)
+        logger.info(f"✅ 索引迁移完成，新建 {created} 个索引")
+    except SQLAlchemyError as e:
+        logger.error(f"索引迁移失败: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -81,50 +81,20 @@ def debug_config_loading():
         return None
 
 
-def check_database_connection(settings):
-    """检查数据库连接并详细追踪错误"""
-    logger.info("🔍 开始检查数据库连接...")
-
-    try:
-        from sqlalchemy import create_engine, text
-
-        # 打印连接详情
-        logger.info(f"尝试连接URL: {settings.database_url}")
-
-        # 创建引擎
-        engine = create_engine(settings.database_url)
-
-        # 尝试连接
-        with engine.connect() as connection:
-            result = connection.execute(text("SELECT 1"))
-            logger.info("✅ MySQL数据库连接正常")
-            return True
-
-    except Exception as e:
-        logger.error(f"❌ MySQL数据库连接失败")
-        logger.error(f"错误类型: {type(e).__name__}")
-        logger.error(f"错误详情: {str(e)}")
-
-        # 详细分析错误
-        error_str = str(e)
-        if "Unknown database" in error_str:
-            import re
-            match = re.search(r"Unknown database '([^']+)'", error_str)
-            if match:
-                wrong_db_name = match.group(1)
-                logger.error(f"🔍 错误中提到的数据库名: '{wrong_db_name}'")
-                logger.error(f"🔍 配置中的数据库名: '{settings.mysql_database}'")
-
-                if wrong_db_name != settings.mysql_database:
-                    logger.error("❌ 数据库名不匹配！")
-                    logger.error(f"  配置中: '{settings.mysql_database}'")
-                    logger.error(f"  错误中: '{wrong_db_name}'")
-
-        # 打印完整的错误堆栈
-        logger.error("🔍 完整错误堆栈:")
-        traceback.print_exc()
-
-        return False
+def explain_database_error(settings, error_str: str):
+    """详细分析数据库连接错误"""
+    if "Unknown database" in error_str:
+        import re
+        match = re.search(r"Unknown database '([^']+)'", error_str)
+        if match:
+            wrong_db_name = match.group(1)
+            logger.error(f"🔍 错误中提到的数据库名: '{wrong_db_name}'")
+            logger.error(f"🔍 配置中的数据库名: '{settings.mysql_database}'")
+
+            if wrong_db_name != settings.mysql_database:
+                logger.error("❌ 数据库名不匹配！")
+                logger.error(f"  配置中: '{settings.mysql_database}'")
+                logger.error(f"  错误中: '{wrong_db_name}'")
 
 
 def check_environment():
@@ -141,42 +111,35 @@ def check_environment():
     # 检查必要的目录
     logger.info("📁 检查目录...")
     os.makedirs(settings.static_dir, exist_ok=True)
-    os.makedirs(settings.materials_dir, exist_ok=True)
     os.makedirs("logs", exist_ok=True)
     logger.info("✅ 目录检查完成")
 
-    # 检查MySQL连接
-    if not check_database_connection(settings):
+    # 并发执行就绪检查，共用 app.database 的连接池
+    logger.info("🔍 开始检查数据库连接和数据表...")
+    try:
+        from app.shared.startup import run_readiness_checks
+        results = run_readiness_checks(timeout=settings.readiness_timeout)
+    except Exception as e:
+        logger.error(f"❌ 就绪检查执行失败: {str(e)}")
+        traceback.print_exc()
+        return False
+
+    for name, result in results.items():
+        if result["ok"]:
+            logger.info(f"✅ {name} 检查通过 ({result['ms']}ms)")
+        else:
+            logger.error(f"❌ {name} 检查失败 ({result['ms']}ms): {result.get('error')}")
+
+    if not results["database"]["ok"]:
+        explain_database_error(settings, results["database"].get("error", ""))
         logger.info("💡 建议操作:")
-        logger.info("1. 运行 'python init_interpreting_db.py' 初始化数据库")
+        logger.info("1. 运行 'python init_mysql_db.py' 初始化数据库")
         logger.info("2. 检查 MySQL 服务是否运行")
         logger.info("3. 检查数据库名拼写")
         return False
 
-    # 检查必要的表是否存在
-    logger.info("📊 检查数据库表...")
-    try:
-        from sqlalchemy import create_engine, text
-        engine = create_engine(settings.database_url)
-        with engine.connect() as connection:
-            tables_to_check = ['practice_materials', 'study_records', 'daily_sentences']
-            all_tables_exist = True
-
-            for table in tables_to_check:
-                result = connection.execute(text(f"SHOW TABLES LIKE '{table}'"))
-                if result.fetchone():
-                    logger.info(f"✅ 表 {table} 存在")
-                else:
-                    logger.error(f"❌ 表 {table} 不存在")
-                    all_tables_exist = False
-
-            if not all_tables_exist:
-                logger.error("❌ 缺少必要的数据库表")
-                return False
-
-    except Exception as e:
-        logger.error(f"❌ 检查数据库表失败: {str(e)}")
-        traceback.print_exc()
+    if not results["tables"]["ok"]:
+        logger.error("❌ 缺少必要的数据库表")
         return False
 
     logger.info("✅ 环境检查完成")
@@ -198,6 +161,11 @@ def main():
     # 设置日志
     setup_logging(args.debug)
 
+    # 进程内缓存不在 worker 间共享，多 worker 时必须使用 shm 或 network 后端
+    if args.workers > 1 and not args.reload and os.getenv("CACHE_BACKEND", "").lower() == "local":
+        logger.error("❌ CACHE_BACKEND=local 不能用于多 worker，请改为 shm 或 network")
+        sys.exit(1)
+
     # 检查环境
     if not check_environment():
         logger.error("❌ 环境检查失败，请解决上述问题后重试")
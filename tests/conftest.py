@@ -0,0 +1,66 @@
+# tests/conftest.py
+"""
+测试环境：用临时目录中的 SQLite 文件代替 MySQL，必须在导入 app 之前设置环境变量
+"""
+import os
+import tempfile
+
+import pytest
+
+_TMP = tempfile.mkdtemp(prefix="transclass-tests-")
+
+os.environ.setdefault("MYSQL_HOST", "localhost")
+os.environ.setdefault("MYSQL_PORT", "3306")
+os.environ.setdefault("MYSQL_USERNAME", "test")
+os.environ.setdefault("MYSQL_PASSWORD", "test")
+os.environ.setdefault("MYSQL_DATABASE", "test")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_TMP, 'primary.db')}"
+os.environ["INDEX_DIR"] = os.path.join(_TMP, "indexes")
+os.environ["STATIC_DIR"] = os.path.join(_TMP, "static")
+os.environ["CACHE_DIR"] = os.path.join(_TMP, "cache")
+os.environ["WARMUP_ENABLED"] = "false"
+
+
+@pytest.fixture(scope="session")
+def tmp_root():
+    return _TMP
+
+
+@pytest.fixture(scope="session")
+def engine():
+    from app.database import Base, engine
+    import app.core.daily_sentence.models  # noqa: F401  注册全部模型
+    import app.core.materials.models  # noqa: F401
+    import app.core.study_records.models  # noqa: F401
+    import app.core.user.models  # noqa: F401
+    Base.metadata.create_all(engine)
+    return engine
+
+
+@pytest.fixture(scope="session")
+def client(engine):
+    from fastapi.testclient import TestClient
+    from app.main import app
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+MATERIAL_FORM = {
+    "title": "Climate talk",
+    "chinese_title": "气候演讲",
+    "theme": "环境",
+    "type": "演讲",
+    "practice_type": "篇章",
+    "difficulty": "3.5",
+    "date": "2024-01-01",
+    "format": "audio",
+    "language": "en",
+    "skills": '["笔记"]',
+    "transcript": "Climate change is real. We must act now!",
+    "translation": "气候变化是真实的。我们必须现在行动！",
+}
+
+
+@pytest.fixture
+def material_form():
+    return dict(MATERIAL_FORM)
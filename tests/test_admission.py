@@ -0,0 +1,73 @@
+# tests/test_admission.py
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.shared.admission import AdmissionController, UploadAdmissionMiddleware
+
+
+def _run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_requests_over_the_limits_queue_until_released():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout=1.0)
+        assert await controller.acquire(100) is None
+        waiter = asyncio.ensure_future(controller.acquire(100))
+        await asyncio.sleep(0.01)
+        assert controller.waiting == 1 and not waiter.done()
+
+        await controller.release(100)
+        assert await waiter is None
+        return controller.stats()
+
+    stats = _run(scenario())
+    assert stats["admitted"] == 2 and stats["queued"] == 1 and stats["max_queue_depth"] == 1
+
+
+def test_full_queue_times_out_and_oversized_requests_are_rejected():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout=0.05, max_request_bytes=1000)
+        assert await controller.acquire(10) is None
+        waiter = asyncio.ensure_future(controller.acquire(10))
+        await asyncio.sleep(0.01)
+        assert await controller.acquire(10) == 429
+        assert await waiter == 503
+        assert await controller.acquire(5000) == 413
+        return controller.stats()
+
+    stats = _run(scenario())
+    assert stats["rejected_queue_full"] == 1
+    assert stats["rejected_timeout"] == 1
+    assert stats["rejected_too_large"] == 1
+
+
+def test_inflight_bytes_limit_admits_a_single_large_upload():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=4, max_inflight_bytes=100, queue_timeout=0.05)
+        assert await controller.acquire(500) is None
+        assert await controller.acquire(10) == 503
+
+    _run(scenario())
+
+
+def test_middleware_rejects_oversized_uploads_and_ignores_other_paths():
+    app = FastAPI()
+    controller = AdmissionController(max_concurrent=1, max_queue=0, max_request_bytes=10)
+    app.add_middleware(UploadAdmissionMiddleware, controller=controller, paths=["/upload"], retry_after=7)
+
+    @app.post("/upload")
+    def upload():
+        return {"ok": True}
+
+    @app.post("/other")
+    def other():
+        return {"ok": True}
+
+    client = TestClient(app)
+    assert client.post("/upload", content=b"12345").status_code == 200
+    assert client.post("/upload", content=b"x" * 100).status_code == 413
+    assert client.post("/other", content=b"x" * 100).status_code == 200
+    assert controller.active == 0 and controller.inflight_bytes == 0
@@ -0,0 +1,55 @@
+# tests/test_auth.py
+import pytest
+
+from app.core.auth import tokens
+from app.shared.cache import LocalBackend
+
+
+def _login(client, username):
+    client.post("/api/users/", json={"username": username, "password": "secret12345"})
+    response = client.post("/api/auth/login", json={"username": username, "password": "secret12345"})
+    assert response.status_code == 200, response.text
+    return response.json()["access_token"]
+
+
+def test_non_ascii_token_is_rejected_with_401(client):
+    for token in ("1.0.9999999999.签名", "用户.0.1.abc"):
+        response = client.get("/api/users/me", headers={"Authorization": f"Bearer {token}".encode("utf-8")})
+        assert response.status_code == 401
+
+
+def test_decode_token_rejects_non_ascii_signature():
+    with pytest.raises(ValueError):
+        tokens.decode_token("1.0.9999999999.签名")
+
+
+def test_revocation_falls_back_to_database_with_local_cache(client, monkeypatch):
+    token = _login(client, "revoked_user")
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/api/users/me", headers=headers).status_code == 200
+
+    from app.database import SessionLocal
+    from app.core.user.models import User
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.username == "revoked_user").one()
+        # 模拟另一个 worker：进程内缓存里仍是旧的版本号，已校验令牌也还在 LRU 中
+        local = LocalBackend()
+        local.set(tokens._version_key(user.id), str(user.token_version).encode(), 300)
+        monkeypatch.setattr(tokens.shared_cache._backend, "get", lambda: local)
+        monkeypatch.setattr(tokens.verified_tokens, "recheck_interval", 0)
+
+        user.token_version += 1
+        db.commit()
+    finally:
+        db.close()
+
+    assert client.get("/api/users/me", headers=headers).status_code == 401
+
+
+def test_requests_without_token_use_anonymous_user(client, monkeypatch):
+    assert client.get("/api/study-records/").status_code == 200
+    assert client.get("/api/study-records/user-stats").status_code == 200
+
+    monkeypatch.setattr(tokens.settings, "auth_anonymous_user_id", 0)
+    assert client.get("/api/study-records/").status_code == 401
@@ -0,0 +1,60 @@
+# tests/test_cache.py
+import threading
+import time
+
+from app.config import settings
+from app.shared.cache import (
+    InMemoryNetworkClient, LocalBackend, NetworkBackend, SharedMemoryBackend, deployment_key, shared_cache
+)
+
+
+def test_default_backend_is_shared_between_workers():
+    assert isinstance(shared_cache.backend, SharedMemoryBackend)
+    assert shared_cache.backend.shared
+
+
+def test_process_local_backends_are_not_shared():
+    assert not LocalBackend().shared
+    assert not NetworkBackend(InMemoryNetworkClient()).shared
+
+
+def test_shm_backends_see_each_others_writes(tmp_path):
+    first = SharedMemoryBackend(str(tmp_path))
+    second = SharedMemoryBackend(str(tmp_path))
+    assert first.add("idem:key", b"pending", 60)
+    assert not second.add("idem:key", b"pending", 60)
+    assert second.incr("ns:catalog") == first.get_counter("ns:catalog")
+
+
+def test_deployments_get_separate_shm_directories(monkeypatch):
+    first = deployment_key()
+    assert deployment_key() == first
+    monkeypatch.setattr(settings, "database_url", "mysql+pymysql://other/db")
+    assert deployment_key() != first
+
+
+def test_new_release_clears_previous_entries_and_counters(tmp_path):
+    old = SharedMemoryBackend(str(tmp_path), release="v1")
+    old.set("catalog:0:page", b"old shape", 60)
+    old.incr("ns:catalog")
+
+    same = SharedMemoryBackend(str(tmp_path), release="v1")
+    assert same.get("catalog:0:page") == b"old shape"
+
+    new = SharedMemoryBackend(str(tmp_path), release="v2")
+    assert new.get("catalog:0:page") is None
+    assert new.get_counter("ns:catalog") == 0
+    assert old.get_counter("ns:catalog") == 0
+
+
+def test_sweep_runs_off_the_request_thread(tmp_path, monkeypatch):
+    backend = SharedMemoryBackend(str(tmp_path))
+    threads = []
+    monkeypatch.setattr(backend, "sweep", lambda: threads.append(threading.current_thread()))
+    for i in range(256):
+        backend.set(f"key:{i}", b"value", 60)
+    for _ in range(100):
+        if threads:
+            break
+        time.sleep(0.01)
+    assert threads and threads[0] is not threading.current_thread()
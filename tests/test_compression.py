@@ -0,0 +1,69 @@
+# tests/test_compression.py
+import gzip
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.shared.compression import CompressionMiddleware, negotiate_encoding
+
+LARGE = "口译练习 " * 1000
+
+
+def _client():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+    @app.get("/large")
+    def large():
+        return {"text": LARGE}
+
+    @app.get("/small")
+    def small():
+        return {"text": "short"}
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse((f"{i}:{LARGE}\n" for i in range(3)), media_type="application/x-ndjson")
+
+    @app.get("/already")
+    def already():
+        return PlainTextResponse(gzip.compress(b"x" * 4096), headers={"Content-Encoding": "gzip"})
+
+    return TestClient(app)
+
+
+def test_negotiation_prefers_brotli_and_honours_q_values():
+    assert negotiate_encoding("gzip, deflate, br") == "br"
+    assert negotiate_encoding("gzip;q=1.0, br;q=0.5") == "gzip"
+    assert negotiate_encoding("br;q=0, gzip;q=0") is None
+    assert negotiate_encoding("*") == "br"
+    assert negotiate_encoding("") is None
+
+
+def test_large_response_is_compressed_with_negotiated_encoding():
+    client = _client()
+    for encoding in ("gzip", "br"):
+        response = client.get("/large", headers={"Accept-Encoding": encoding})
+        assert response.headers["content-encoding"] == encoding
+        assert "accept-encoding" in response.headers["vary"].lower()
+        assert int(response.headers["content-length"]) < len(LARGE.encode("utf-8"))
+        assert response.json() == {"text": LARGE}
+
+
+def test_small_or_unaccepted_responses_are_not_compressed():
+    client = _client()
+    assert "content-encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in client.get("/large", headers={"Accept-Encoding": "identity"}).headers
+
+
+def test_already_encoded_response_passes_through():
+    response = _client().get("/already", headers={"Accept-Encoding": "br"})
+    assert response.headers["content-encoding"] == "gzip"
+
+
+def test_streaming_response_is_compressed_incrementally():
+    response = _client().get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert response.text.splitlines()[2].startswith("2:")
@@ -0,0 +1,14 @@
+# tests/test_export.py
+from app.config import settings
+
+
+def test_export_requires_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "export_token", None)
+    assert client.get("/api/export/study_records").status_code == 404
+
+    monkeypatch.setattr(settings, "export_token", "admin-token")
+    assert client.get("/api/export/study_records").status_code == 403
+    assert client.get("/api/export/study_records", headers={"X-Export-Token": "wrong"}).status_code == 403
+
+    response = client.get("/api/export/materials", headers={"X-Export-Token": "admin-token"})
+    assert response.status_code == 200
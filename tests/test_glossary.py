@@ -0,0 +1,49 @@
+# tests/test_glossary.py
+import json
+from types import SimpleNamespace
+
+from app.core.glossary.index import EN_ZH, ZH_EN, GlossaryIndex
+
+
+def _row(material_id, terms):
+    return SimpleNamespace(id=material_id, terms=terms)
+
+
+def test_malformed_terms_are_skipped():
+    index = GlossaryIndex()
+    index.reset()
+    for row in (_row(1, ["a"]), _row(2, {"k": "v"}), _row(3, "not json"), _row(4, [{"term": 1}]),
+                _row(5, [{"term": "carbon tax", "translation": "碳税"}])):
+        index.add_row(row)
+    index.after_load()
+    assert [entry.term for entry in index.prefix("carbon")] == ["carbon tax"]
+    assert [entry.term for entry in index.prefix("碳")] == ["碳税"]
+
+
+def test_keys_are_sorted_once_after_bulk_load():
+    index = GlossaryIndex()
+    index.reset()
+    index.add_row(_row(1, [{"term": "zero emission", "translation": "零排放"},
+                           {"term": "carbon sink", "translation": "碳汇"}]))
+    index.add_row(_row(2, [{"term": "carbon tax", "translation": "碳税"}]))
+    index.after_load()
+    assert index._keys[EN_ZH] == sorted(index._keys[EN_ZH])
+    assert index._keys[ZH_EN] == sorted(index._keys[ZH_EN])
+    assert [entry.term for entry in index.prefix("carbon")] == ["carbon sink", "carbon tax"]
+
+
+def test_upload_rejects_terms_that_are_not_pairs(client, material_form):
+    material_form["duration"] = "1:00"
+    for terms in (["a"], {"k": "v"}, [{"term": "x", "translation": 1}]):
+        material_form["terms"] = json.dumps(terms)
+        assert client.post("/api/materials/", data=material_form).status_code == 400
+
+
+def test_autocomplete_includes_uploaded_terms(client, material_form):
+    material_form["duration"] = "1:00"
+    material_form["terms"] = json.dumps([{"term": "greenhouse gas", "translation": "温室气体"}])
+    assert client.post("/api/materials/", data=material_form).status_code == 200
+
+    suggestions = client.get("/api/glossary/autocomplete", params={"q": "greenh"}).json()
+    assert suggestions[0]["term"] == "greenhouse gas"
+    assert suggestions[0]["translations"] == ["温室气体"]
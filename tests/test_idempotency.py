@@ -0,0 +1,78 @@
+# tests/test_idempotency.py
+import asyncio
+import uuid
+
+import pytest
+from fastapi import HTTPException
+
+from app.shared import idempotency
+from app.shared.cache import LocalBackend, shared_cache
+from app.shared.idempotency import IdempotencyStore
+
+SCOPE = "test"
+
+
+def _store(**kwargs):
+    kwargs.setdefault("wait_timeout", 0.1)
+    kwargs.setdefault("poll_interval", 0.01)
+    return IdempotencyStore(**kwargs)
+
+
+def _begin(store, key, fingerprint="a"):
+    return asyncio.run(store.begin(SCOPE, key, fingerprint))
+
+
+def test_completed_key_is_replayed():
+    store, key = _store(), uuid.uuid4().hex
+    assert _begin(store, key) is None
+    store.complete(SCOPE, key, "a", 200, {"id": 1})
+
+    replay = _begin(store, key)
+    assert replay.status_code == 200
+    assert replay.body == b'{"id":1}'
+    assert replay.headers["Idempotent-Replayed"] == "true"
+
+
+def test_same_key_with_different_fingerprint_is_rejected():
+    store, key = _store(), uuid.uuid4().hex
+    assert _begin(store, key) is None
+    with pytest.raises(HTTPException) as error:
+        _begin(store, key, "b")
+    assert error.value.status_code == 422
+
+
+def test_pending_key_times_out_with_409():
+    store, key = _store(), uuid.uuid4().hex
+    assert _begin(store, key) is None
+    with pytest.raises(HTTPException) as error:
+        _begin(store, key)
+    assert error.value.status_code == 409
+    assert error.value.headers["Retry-After"] == "5"
+
+
+def test_released_key_can_be_taken_again():
+    store, key = _store(), uuid.uuid4().hex
+    assert _begin(store, key) is None
+    store.release(SCOPE, key)
+    assert _begin(store, key) is None
+
+
+def test_lost_takeover_race_sleeps_until_deadline(monkeypatch):
+    class RacingBackend(LocalBackend):
+        # 键总是刚被释放、又总被其他 worker 抢先接手
+        def add(self, key, value, ttl):
+            return False
+
+    monkeypatch.setattr(shared_cache._backend, "get", lambda: RacingBackend())
+    sleeps = []
+    real_sleep = asyncio.sleep
+
+    async def counting_sleep(seconds):
+        sleeps.append(seconds)
+        await real_sleep(seconds)
+
+    monkeypatch.setattr(idempotency.asyncio, "sleep", counting_sleep)
+    with pytest.raises(HTTPException) as error:
+        _begin(_store(wait_timeout=0.05), uuid.uuid4().hex)
+    assert error.value.status_code == 409
+    assert sleeps and all(seconds == 0.01 for seconds in sleeps)
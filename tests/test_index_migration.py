@@ -0,0 +1,54 @@
+# tests/test_index_migration.py
+import pytest
+from sqlalchemy.dialects import mysql
+
+pytest.importorskip("loguru")
+
+import migrate_mysql_indexes  # noqa: E402
+
+
+def _sql(query):
+    return str(query.statement.compile(dialect=mysql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def test_query_shapes_compile_for_mysql(engine):
+    from app.database import SessionLocal
+    db = SessionLocal()
+    try:
+        shapes = migrate_mysql_indexes.query_shapes(db)
+        sql = {name: _sql(query) for name, query in shapes.items()}
+    finally:
+        db.close()
+
+    # 与 /recent/updates 的回退查询一致：按 id 倒序，带游标
+    assert "ORDER BY practice_materials.id DESC" in sql["materials:recent_updates"]
+    assert "practice_materials.id < 1000" in sql["materials:recent_updates_cursor"]
+    assert "JOIN practice_materials" in sql["study_records:list"]
+
+
+def test_facets_and_search_scan_are_checked(engine):
+    from app.database import SessionLocal
+    db = SessionLocal()
+    try:
+        shapes = migrate_mysql_indexes.query_shapes(db)
+    finally:
+        db.close()
+    assert "UNION ALL" in _sql(shapes["materials:facets"])
+    assert "GROUP BY practice_materials.theme" in _sql(shapes["materials:facets"])
+    assert "practice_materials.language = 'en'" in _sql(shapes["materials:facets_filtered"])
+    assert _sql(shapes["materials:search_ids"]).startswith("SELECT practice_materials.id \nFROM")
+    assert set(migrate_mysql_indexes.EXPECTED_SCANS) <= set(shapes)
+
+
+def _row(type_, extra=None, table="practice_materials"):
+    return {"table": table, "type": type_, "Extra": extra}
+
+
+def test_full_index_scan_fails_unless_covering():
+    problem = migrate_mysql_indexes.plan_problem
+    assert problem(_row("ALL")) == "全表扫描"
+    assert problem(_row("index", "Using where")) == "全索引扫描（非覆盖）"
+    assert problem(_row("index", "Using index condition")) == "全索引扫描（非覆盖）"
+    assert problem(_row("index", "Using where; Using index")) == ""
+    assert problem(_row("ref", "Using where")) == ""
+    assert problem(_row("ALL", table="<derived2>")) == ""
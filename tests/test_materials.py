@@ -0,0 +1,116 @@
+# tests/test_materials.py
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.materials.difficulty import DifficultyStats
+
+
+def test_create_material_without_file(client, material_form):
+    material_form["duration"] = "8:30"
+    response = client.post("/api/materials/", data=material_form)
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["duration"] == "8:30"
+    assert body["content_url"] is None
+
+    waveform = client.get(f"/api/materials/{body['id']}/waveform")
+    assert waveform.status_code == 404
+
+
+def test_create_material_without_file_requires_duration(client, material_form):
+    response = client.post("/api/materials/", data=material_form)
+    assert response.status_code == 400
+
+
+def test_segments_of_deactivated_material_return_404(client, material_form):
+    material_form["duration"] = "1:00"
+    material_id = client.post("/api/materials/", data=material_form).json()["id"]
+    assert client.get(f"/api/materials/{material_id}/segments").status_code == 200
+
+    assert client.delete(f"/api/materials/{material_id}").status_code == 200
+    assert client.get(f"/api/materials/{material_id}/segments").status_code == 404
+    assert client.get(f"/api/materials/{material_id}/outline").status_code == 404
+
+
+def _create(client, material_form, **fields):
+    form = dict(material_form, duration="1:00", **fields)
+    response = client.post("/api/materials/", data=form)
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+def test_facets_count_values_within_filters(client, material_form):
+    theme = f"facets-{uuid.uuid4().hex[:8]}"
+    _create(client, material_form, theme=theme, language="en", difficulty="2.5", skills='["笔记", "听辨"]')
+    _create(client, material_form, theme=theme, language="en", difficulty="3", skills='["笔记"]')
+    _create(client, material_form, theme=theme, language="fr", difficulty="3.9", skills="[]")
+
+    facets = client.get("/api/materials/facets", params={"theme": theme}).json()
+    assert facets["total"] == 3
+    assert facets["theme"] == [{"value": theme, "count": 3}]
+    assert facets["language"] == [{"value": "en", "count": 2}, {"value": "fr", "count": 1}]
+    assert facets["difficulty"] == [{"value": "3", "count": 2}, {"value": "2", "count": 1}]
+    assert facets["skills"] == [{"value": "笔记", "count": 2}, {"value": "听辨", "count": 1}]
+
+    narrowed = client.get("/api/materials/facets", params={"theme": theme, "language": "fr"}).json()
+    assert narrowed["total"] == 1
+    assert narrowed["skills"] == []
+
+
+def test_batch_keeps_request_order_and_reports_missing(client, material_form):
+    first = _create(client, material_form, title="first")
+    second = _create(client, material_form, title="second")
+    removed = _create(client, material_form, title="removed")
+    client.delete(f"/api/materials/{removed}")
+    # 先读一次详情，让批量接口同时走缓存命中和 IN 查询两条路径
+    client.get(f"/api/materials/{second}")
+
+    batch = client.get("/api/materials/batch", params={"ids": f"{second},{first},{second},{removed},999999"}).json()
+    assert [material["id"] for material in batch["materials"]] == [second, first]
+    assert batch["missing"] == [removed, 999999]
+
+    projected = client.get("/api/materials/batch", params={"ids": f"{first}", "fields": "id,title"}).json()
+    assert projected["materials"] == [{"id": first, "title": "first"}]
+
+
+def test_batch_rejects_bad_requests(client):
+    assert client.get("/api/materials/batch", params={"ids": "1,x"}).status_code == 400
+    assert client.get("/api/materials/batch", params={"ids": "1", "fields": "id,secret"}).status_code == 400
+    too_many = ",".join(str(i) for i in range(1, 202))
+    assert client.get("/api/materials/batch", params={"ids": too_many}).status_code == 400
+
+
+def test_difficulty_stats_percentiles_histogram_and_quantiles():
+    stats = DifficultyStats()
+    stats.reset()
+    for material_id, difficulty in enumerate([1.0, 2.0, 2.0, 3.0, 5.0], start=1):
+        stats.add_row(SimpleNamespace(id=material_id, practice_type="篇章", language="en", difficulty=difficulty))
+    stats.add_row(SimpleNamespace(id=6, practice_type="句子", language="en", difficulty=4.0))
+    stats.add_row(SimpleNamespace(id=7, practice_type="句子", language="en", difficulty=None))
+
+    assert stats.percentile_rank(2.0) == (pytest.approx(100 / 6), 6)
+    assert stats.percentile_rank(3.0, "篇章", "en") == (60.0, 5)
+    assert stats.percentile_rank(1.0, "篇章") == (0.0, 5)
+    assert stats.percentile_rank(1.0, "对话") == (0.0, 0)
+    assert stats.histogram(2, "篇章") == [(1.0, 3.0, 3), (3.0, 5.0, 2)]
+    assert stats.quantiles(4, "篇章") == [2.0, 2.0, 3.0]
+    assert stats.material(7) is None
+
+
+def test_difficulty_endpoints_within_a_group(client, material_form):
+    practice_type = f"pt-{uuid.uuid4().hex[:8]}"
+    ids = [_create(client, material_form, practice_type=practice_type, difficulty=str(difficulty))
+           for difficulty in (1, 2, 3, 4)]
+
+    distribution = client.get("/api/materials/difficulty/distribution",
+                              params={"practice_type": practice_type, "bins": 3, "quantiles": 2}).json()
+    assert distribution["total"] == 4
+    assert (distribution["min"], distribution["max"]) == (1.0, 4.0)
+    assert [bucket["count"] for bucket in distribution["histogram"]] == [1, 1, 2]
+    assert distribution["quantiles"] == [3.0]
+
+    rank = client.get(f"/api/materials/{ids[2]}/difficulty-rank").json()
+    assert rank["group_percentile"] == 50.0 and rank["group_total"] == 4
+    assert client.get("/api/materials/999999/difficulty-rank").status_code == 404
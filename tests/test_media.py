@@ -0,0 +1,70 @@
+# tests/test_media.py
+import io
+import struct
+import wave
+
+import numpy as np
+import pytest
+
+from app.core.materials.media import WAVEFORM_BUCKETS, analyze_media, format_duration
+
+
+def _mp3_frames(count: int, layer_bits: int, bitrate_index: int, length: int) -> bytes:
+    # MPEG-1、无 CRC、44.1kHz、带填充位、单声道
+    header = (0x7FF << 21) | (3 << 19) | (layer_bits << 17) | (1 << 16) | (bitrate_index << 12) \
+        | (0 << 10) | (1 << 9) | (3 << 6)
+    frame = struct.pack(">I", header)
+    return (frame + bytes(length - len(frame))) * count
+
+
+def test_padded_layer1_frames_are_synced():
+    # Layer I 32kbps：(12 * 32000 // 44100 + 1) * 4 = 36 字节
+    info = analyze_media(_mp3_frames(100, 3, 1, 36), "mp3")
+    assert info.sample_rate == 44100 and info.channels == 1
+    assert info.duration_seconds == pytest.approx(100 * 36 * 8 / 32000)
+
+
+def test_padded_layer3_frames_are_synced():
+    # Layer III 128kbps：144 * 128000 // 44100 + 1 = 418 字节
+    info = analyze_media(_mp3_frames(50, 1, 9, 418), "mp3")
+    assert info.duration_seconds == pytest.approx(50 * 418 * 8 / 128000)
+
+
+def _wav(seconds: float, sample_rate: int = 8000) -> bytes:
+    # 前一半静音，后一半满幅方波
+    half = int(seconds * sample_rate / 2)
+    samples = np.concatenate([np.zeros(half), np.tile([32767, -32767], half // 2)]).astype("<i2")
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(samples.tobytes())
+    return buffer.getvalue()
+
+
+def test_wav_duration_and_waveform():
+    info = analyze_media(_wav(2.0), "wav")
+    assert info.duration_seconds == pytest.approx(2.0)
+    assert info.sample_rate == 8000 and info.channels == 1
+    assert len(info.peaks) == WAVEFORM_BUCKETS
+    assert info.peaks[0] == 0 and info.peaks[-1] == 255
+
+
+def _box(box_type: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I4s", 8 + len(payload), box_type) + payload
+
+
+def test_mp4_duration_from_movie_header():
+    # mvhd v0：版本/标志、创建时间、修改时间、timescale、duration
+    mvhd = _box(b"mvhd", struct.pack(">IIIII", 0, 0, 0, 600, 600 * 95) + bytes(80))
+    data = _box(b"ftyp", b"isom" + bytes(4)) + _box(b"moov", mvhd)
+    info = analyze_media(data, "m4a")
+    assert info.duration_seconds == pytest.approx(95.0)
+    assert format_duration(info.duration_seconds) == "1:35"
+
+
+def test_unknown_or_corrupt_media_returns_none():
+    assert analyze_media(b"RIFF", "wav") is None
+    assert analyze_media(b"\x00" * 64, "mp3") is None
+    assert analyze_media(_wav(1.0), "flac") is None
@@ -0,0 +1,68 @@
+# tests/test_profiling.py
+import json
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.config import settings
+from app.shared.profiling import ProfileStore, ProfilingMiddleware, install_sql_hooks
+
+TOKEN = "profile-secret"
+
+
+def _client(store):
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware, store=store, interval=0.001)
+    engine = create_engine("sqlite://")
+    install_sql_hooks()
+
+    @app.get("/work")
+    def work():
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1")).all()
+        time.sleep(0.02)
+        return {"ok": True}
+
+    return TestClient(app)
+
+
+def test_token_request_writes_report_with_sql_and_stacks(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "profiling_token", TOKEN)
+    store = ProfileStore(str(tmp_path))
+    client = _client(store)
+
+    assert "x-profile-id" not in client.get("/work").headers
+    assert "x-profile-id" not in client.get("/work", headers={"X-Profile-Token": "wrong"}).headers
+
+    response = client.get("/work", headers={"X-Profile-Token": TOKEN})
+    profile_id = response.headers["x-profile-id"]
+    assert [summary["id"] for summary in store.list()] == [profile_id]
+
+    with open(store.path(profile_id, "json"), encoding="utf-8") as f:
+        report = json.load(f)
+    assert report["path"] == "/work" and report["status"] == 200
+    assert report["sql"]["statements"] == 1
+    assert report["sql"]["top"][0]["statement"] == "SELECT 1"
+    assert report["samples"] > 0
+    with open(store.path(profile_id, "folded"), encoding="utf-8") as f:
+        assert "work (tests/test_profiling.py" in f.read()
+
+
+def test_store_keeps_only_the_newest_reports(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "profiling_token", TOKEN)
+    store = ProfileStore(str(tmp_path), max_reports=2)
+    client = _client(store)
+    ids = [client.get("/work", headers={"X-Profile-Token": TOKEN}).headers["x-profile-id"] for _ in range(3)]
+    assert [summary["id"] for summary in store.list()] == ids[:0:-1]
+    assert store.path(ids[0], "json") is None
+    assert store.path("../../etc/passwd", "json") is None
+
+
+def test_profile_api_requires_enabled_profiling_and_token(client, monkeypatch):
+    assert client.get("/api/profiles/").status_code == 404
+    monkeypatch.setattr(settings, "profiling_enabled", True)
+    monkeypatch.setattr(settings, "profiling_token", TOKEN)
+    assert client.get("/api/profiles/").status_code == 403
+    assert client.get("/api/profiles/", headers={"X-Profile-Token": TOKEN}).status_code == 200
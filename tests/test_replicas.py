@@ -0,0 +1,83 @@
+# tests/test_replicas.py
+"""只读副本路由：主库和副本各用一个 SQLite 文件"""
+import os
+
+import pytest
+from sqlalchemy import create_engine
+from starlette.requests import Request
+
+import app.database as database
+from app.database import Base, ReplicaRouter, get_read_db
+from app.core.materials.models import PracticeMaterial
+from app.shared.cache import shared_cache
+
+REPLICA_ONLY_ID = 9001
+
+
+def _request(headers=None):
+    raw = [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+def _read_session_url(request):
+    dependency = get_read_db(request)
+    db = next(dependency)
+    try:
+        return str(db.get_bind().url)
+    finally:
+        dependency.close()
+
+
+@pytest.fixture
+def replica_url(engine, tmp_root):
+    url = f"sqlite:///{os.path.join(tmp_root, 'replica.db')}"
+    replica_engine = create_engine(url)
+    Base.metadata.create_all(replica_engine)
+    with replica_engine.begin() as connection:
+        connection.execute(PracticeMaterial.__table__.delete())
+        connection.execute(PracticeMaterial.__table__.insert().values(
+            id=REPLICA_ONLY_ID, title="Replica only", theme="环境", type="演讲", practice_type="篇章",
+            difficulty=2.0, duration="1:00", date="2024-01-01", format="audio", language="en",
+            skills=[], transcript="t", translation="t", is_active=True,
+        ))
+    replica_engine.dispose()
+    return url
+
+
+@pytest.fixture
+def router(replica_url, monkeypatch):
+    replica_router = ReplicaRouter([replica_url], read_after_write_seconds=30)
+    monkeypatch.setattr(database, "replica_router", replica_router)
+    shared_cache.backend.delete(ReplicaRouter.WRITE_MARKER)
+    yield replica_router
+    shared_cache.backend.delete(ReplicaRouter.WRITE_MARKER)
+
+
+def test_reads_go_to_replica(router, replica_url):
+    assert _read_session_url(_request()) == replica_url
+
+
+def test_strong_consistency_reads_primary(router):
+    assert _read_session_url(_request({"X-Consistency": "strong"})) == str(database.engine.url)
+
+
+def test_reads_primary_right_after_write(router):
+    router.note_write()
+    assert _read_session_url(_request()) == str(database.engine.url)
+
+
+def test_unreachable_replica_falls_back_to_primary(router, tmp_root, monkeypatch):
+    broken = ReplicaRouter([f"sqlite:///{os.path.join(tmp_root, 'missing-dir', 'replica.db')}"])
+    monkeypatch.setattr(database, "replica_router", broken)
+    replica = broken.replicas[0]
+    # 健康检查结果尚未过期，仍被认为可用
+    replica.next_check_at = float("inf")
+
+    assert _read_session_url(_request()) == str(database.engine.url)
+    assert not replica.healthy
+
+
+def test_batch_endpoint_reads_from_replica(router, client):
+    response = client.get(f"/api/materials/batch?ids={REPLICA_ONLY_ID}")
+    assert response.status_code == 200
+    assert [material["id"] for material in response.json()["materials"]] == [REPLICA_ONLY_ID]
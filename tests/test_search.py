@@ -0,0 +1,61 @@
+# tests/test_search.py
+import uuid
+from types import SimpleNamespace
+
+from app.core.search.bm25 import BM25Index, write_snapshot
+
+DOCS = {
+    1: "carbon tax carbon tax carbon pricing",
+    2: "carbon emissions and the economy",
+    3: "football world cup final",
+    4: "a long speech about many things including one carbon mention and lots of other words here",
+}
+
+
+def _row(material_id, text):
+    return SimpleNamespace(id=material_id, title="", chinese_title="", transcript=text)
+
+
+def _index(tmp_path, snapshot_ids):
+    path = str(tmp_path / "bm25.idx")
+    write_snapshot([_row(i, DOCS[i]) for i in snapshot_ids], path)
+    index = BM25Index(path)
+    index.reset()
+    max_id = index.restore() or 0
+    for material_id, text in DOCS.items():
+        if material_id > max_id:
+            index.add_row(_row(material_id, text))
+    return index
+
+
+def test_ranking_prefers_frequent_terms_in_short_documents(tmp_path):
+    scores = _index(tmp_path, []).score("carbon tax")
+    ranked = sorted(scores, key=scores.get, reverse=True)
+    assert ranked == [1, 2, 4]
+    assert 3 not in scores
+
+
+def test_snapshot_and_delta_score_the_same(tmp_path):
+    in_memory = _index(tmp_path / "memory", [])
+    mixed = _index(tmp_path / "mixed", [1, 2])
+    expected = in_memory.score("carbon tax")
+    actual = mixed.score("carbon tax")
+    assert expected.keys() == actual.keys()
+    for material_id, score in expected.items():
+        assert abs(actual[material_id] - score) < 1e-5
+
+
+def test_candidates_limit_the_scored_materials(tmp_path):
+    assert set(_index(tmp_path, []).score("carbon", candidate_ids=[2, 3])) == {2}
+
+
+def test_search_results_are_ordered_by_relevance(client, material_form):
+    word = f"kw{uuid.uuid4().hex[:8]}"
+    form = dict(material_form, duration="1:00")
+    weak = client.post("/api/materials/", data=dict(
+        form, title=f"{word} once", transcript="long unrelated speech " * 20)).json()["id"]
+    strong = client.post("/api/materials/", data=dict(
+        form, title=f"{word} {word}", transcript=f"{word} again")).json()["id"]
+
+    results = client.get("/api/materials/", params={"search": word}).json()
+    assert [material["id"] for material in results] == [strong, weak]
@@ -0,0 +1,76 @@
+# tests/test_similarity.py
+import os
+from types import SimpleNamespace
+
+from app.core.similarity.engine import IDF_REFRESH_MIN, SimilarityEngine
+
+
+def _material(material_id: int, text: str):
+    return SimpleNamespace(id=material_id, title=text, chinese_title="", theme="", transcript=text)
+
+
+def test_new_materials_save_snapshot_once_in_background(tmp_path):
+    engine = SimilarityEngine(str(tmp_path), save_delay=60)
+    engine.reset()
+    engine._loaded = True
+    saves = []
+    engine.save = lambda: saves.append(len(engine._ids))
+
+    engine.add_material(_material(1, "climate change"))
+    engine.add_material(_material(2, "climate policy"))
+    assert saves == []
+
+    engine.flush()
+    assert saves == [2]
+    engine.flush()
+    assert saves == [2]
+
+
+def test_flushed_snapshot_restores(tmp_path):
+    engine = SimilarityEngine(str(tmp_path), save_delay=60)
+    engine.reset()
+    engine._loaded = True
+    engine.add_material(_material(1, "climate change"))
+    engine.add_material(_material(2, "climate policy"))
+    assert not os.path.exists(engine.path)
+
+    engine.flush()
+    restored = SimilarityEngine(str(tmp_path))
+    restored.reset()
+    assert restored.restore() == 2
+    assert [material_id for material_id, _ in restored.similar(1)] == [2]
+
+
+def _loaded_engine(tmp_path, count):
+    engine = SimilarityEngine(str(tmp_path), save_delay=60)
+    engine.reset()
+    engine._loaded = True
+    for i in range(1, count + 1):
+        engine.add_row(_material(i, f"climate topic{i} policy"))
+    return engine
+
+
+def test_new_materials_are_appended_without_rebuilding(tmp_path):
+    engine = _loaded_engine(tmp_path, 40)
+    before = engine.normalized()
+    idf = engine._idf
+
+    engine.add_material(_material(41, "climate policy carbon"))
+    after = engine.normalized()
+    assert after.shape[0] == 41
+    assert engine._idf_docs == 40
+    assert (engine._idf[:len(idf)] == idf).all()
+    assert (after[:40, :before.shape[1]] != before).nnz == 0
+    assert engine.similar(41)[0][0] in range(1, 41)
+    engine.flush()
+
+
+def test_idf_is_recomputed_after_many_new_materials(tmp_path):
+    engine = _loaded_engine(tmp_path, 40)
+    engine.normalized()
+    for i in range(41, 41 + IDF_REFRESH_MIN + 1):
+        engine.add_material(_material(i, f"climate topic{i}"))
+    engine.normalized()
+    assert engine._idf_docs == 40 + IDF_REFRESH_MIN + 1
+    assert engine._appended_rows == 0
+    engine.flush()
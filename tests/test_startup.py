@@ -0,0 +1,18 @@
+# tests/test_startup.py
+from app.config import settings
+
+
+def test_indexes_seeded_without_warmup(client):
+    from app.core.glossary.index import glossary_index
+    from app.core.materials.difficulty import difficulty_stats
+    from app.core.materials.feed import recent_feed
+    from app.core.search.bm25 import search_index
+
+    assert not settings.warmup_enabled
+    assert recent_feed.loaded and search_index.loaded and difficulty_stats.loaded and glossary_index.loaded
+
+    from app.core.similarity.engine import similarity_engine
+    assert similarity_engine.loaded and similarity_engine._normalized is not None
+
+    phases = client.get("/health/startup").json()
+    assert "indexes" in str(phases)
@@ -0,0 +1,88 @@
+# tests/test_study_stream.py
+import time
+
+import pytest
+
+from app.config import settings
+
+# 未携带令牌时服务端先读第一帧（可能带 token）再回复 ready，所以各用例的第一帧在 ready 之前发送
+WS_PATH = "/api/study-records/ws"
+
+
+@pytest.fixture
+def material_ids(client, material_form):
+    material_form["duration"] = "1:00"
+    return [client.post("/api/materials/", data=material_form).json()["id"] for _ in range(2)]
+
+
+def _progress(client, material_id):
+    return client.get(f"/api/study-records/material/{material_id}/progress").json()["progress"]
+
+
+def _saved(websocket):
+    message = websocket.receive_json()
+    assert message["type"] == "saved", message
+    return message["material_id"], message["progress"]
+
+
+def test_saves_only_on_meaningful_progress_change(client, material_ids):
+    material_id = material_ids[0]
+    with client.websocket_connect(WS_PATH) as websocket:
+        websocket.send_json({"material_id": material_id, "progress": 10, "play_duration": 1})
+        assert websocket.receive_json()["type"] == "ready"
+        assert _saved(websocket) == (material_id, 10)
+
+        # 小于 study_stream_progress_step 的变化不保存，也不回复
+        websocket.send_json({"progress": 11, "play_duration": 1})
+        websocket.send_json({"progress": 12, "play_duration": 1})
+        websocket.send_json({"progress": 10 + settings.study_stream_progress_step, "play_duration": 1})
+        assert _saved(websocket) == (material_id, 10 + settings.study_stream_progress_step)
+
+
+def test_restart_is_saved_immediately(client, material_ids):
+    material_id = material_ids[0]
+    with client.websocket_connect(WS_PATH) as websocket:
+        websocket.send_json({"material_id": material_id, "progress": 50})
+        assert websocket.receive_json()["type"] == "ready"
+        assert _saved(websocket) == (material_id, 50)
+        websocket.send_json({"progress": 0, "is_restart": True})
+        assert _saved(websocket) == (material_id, 0)
+
+
+def test_switching_material_saves_the_previous_one(client, material_ids):
+    first, second = material_ids
+    with client.websocket_connect(WS_PATH) as websocket:
+        websocket.send_json({"material_id": first, "progress": 20})
+        assert websocket.receive_json()["type"] == "ready"
+        assert _saved(websocket) == (first, 20)
+        websocket.send_json({"progress": 21})
+        websocket.send_json({"material_id": second, "progress": 5})
+        assert _saved(websocket) == (first, 21)
+        assert _saved(websocket) == (second, 5)
+
+
+def test_pending_progress_is_saved_on_disconnect(client, material_ids):
+    material_id = material_ids[0]
+    with client.websocket_connect(WS_PATH) as websocket:
+        websocket.send_json({"material_id": material_id, "progress": 30})
+        assert websocket.receive_json()["type"] == "ready"
+        assert _saved(websocket) == (material_id, 30)
+        websocket.send_json({"progress": 31})
+    # 断开后的保存在线程池中执行，测试客户端不等待它结束
+    for _ in range(100):
+        if _progress(client, material_id) == 31:
+            break
+        time.sleep(0.02)
+    assert _progress(client, material_id) == 31
+
+
+def test_pending_progress_is_saved_when_frames_stop(client, material_ids, monkeypatch):
+    monkeypatch.setattr(settings, "study_stream_flush_interval", 0.2)
+    material_id = material_ids[0]
+    with client.websocket_connect(WS_PATH) as websocket:
+        websocket.send_json({"material_id": material_id, "progress": 40})
+        assert websocket.receive_json()["type"] == "ready"
+        assert _saved(websocket) == (material_id, 40)
+        # 暂停：之后不再发送帧，超过最小间隔后服务端自行保存
+        websocket.send_json({"progress": 41, "play_duration": 3})
+        assert _saved(websocket) == (material_id, 41)